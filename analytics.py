@@ -2,6 +2,26 @@ import json
 import os
 from datetime import datetime
 
+from config import KPI_TIME_RESOLUTION, KPI_MAX_TIME, KPI_MAX_QUEUE, KPI_SUB_BUCKETS
+from histogram import LogHistogram
+
+
+# Per-phase KPIs: per-vehicle delay stopped in traffic, per-vehicle wait at the 4-way stop, queue length
+# per approach (sampled at fixed intervals), and emergency vehicle time through the intersection
+KPI_NAMES = ("stop_line_delay", "four_way_wait", "queue_N", "queue_S", "queue_E", "queue_W", "ev_intersection_time")
+
+
+def new_kpi_histograms():
+    """
+    Create an empty set of KPI histograms.
+
+    Returns:
+        dict: KPI name -> LogHistogram (times in seconds, queue lengths in vehicles).
+    """
+    return {name: LogHistogram(1, KPI_MAX_QUEUE, KPI_SUB_BUCKETS) if name.startswith("queue_")
+            else LogHistogram(KPI_TIME_RESOLUTION, KPI_MAX_TIME, KPI_SUB_BUCKETS) for name in KPI_NAMES}
+
+
 class Analytics:
     """
     Class for storing and updating analytics data when operating in analysis mode.
@@ -19,10 +39,14 @@ class Analytics:
         - no_erts_weighted_collision_rate (float): The weighted collision rate with ERTS inactive.
         - phase_duration (int): The duration of each phase of the simulation.
         - phase_two_active (bool): Whether or not phase two of the simulation is active.
+        - no_erts_kpis (dict): KPI histograms (see KPI_NAMES) recorded with ERTS inactive.
+        - erts_kpis (dict): KPI histograms recorded with ERTS active.
 
     Methods:
         - update: Update the analytics data with the latest collision data.
         - calculate_weighted_collision_rates: Calculate the weighted collision rates for ERTS and non-ERTS vehicles.
+        - summary: Get the finalized results as a flat dictionary (one row of a results table).
+        - kpi_summary: Get the median and 99th percentile of every KPI in both phases.
     """
     def __init__(self):
         self.erts_collision_count = 0
@@ -40,6 +64,8 @@ class Analytics:
         self.no_erts_extrapolated_collisions = 0
         self.phase_duration = 300
         self.phase_two_active = False
+        self.no_erts_kpis = new_kpi_histograms()
+        self.erts_kpis = new_kpi_histograms()
 
     def __repr__(self):
         return f"ERTS Collision Count: {self.erts_collision_count}\n" \
@@ -92,6 +118,43 @@ class Analytics:
         if export:
             self.export_to_json()
         
+    def summary(self):
+        """
+        Get the finalized results as a flat dictionary, suitable for one row of a results table.
+
+        Returns:
+            dict: Counts and rates for both phases, plus the reduction in weighted collision rate with ERTS.
+        """
+        return {
+            "no_erts_collision_count": self.no_erts_collision_count,
+            "no_erts_car_count": self.no_erts_car_count,
+            "no_erts_emergency_count": self.no_erts_emergency_count,
+            "no_erts_collision_rate": self.no_erts_collision_rate,
+            "no_erts_avg_weighted_collision_rate": self.no_erts_avg_weighted_collision_rate,
+            "erts_collision_count": self.erts_collision_count,
+            "erts_car_count": self.erts_car_count,
+            "erts_emergency_count": self.erts_emergency_count,
+            "erts_collision_rate": self.erts_collision_rate,
+            "erts_avg_weighted_collision_rate": self.erts_avg_weighted_collision_rate,
+            "erts_extrapolated_collisions": self.erts_extrapolated_collisions,
+            "erts_rate_reduction": self.no_erts_avg_weighted_collision_rate - self.erts_avg_weighted_collision_rate,
+            **self.kpi_summary(),
+        }
+
+    def kpi_summary(self):
+        """
+        Get the median and 99th percentile of every KPI in both phases.
+
+        Returns:
+            dict: e.g. "no_erts_stop_line_delay_p50" -> seconds, "erts_queue_N_p99" -> vehicles.
+        """
+        summary = {}
+        for prefix, kpis in (("no_erts", self.no_erts_kpis), ("erts", self.erts_kpis)):
+            for name, histogram in kpis.items():
+                summary[f"{prefix}_{name}_p50"] = histogram.percentile(50)
+                summary[f"{prefix}_{name}_p99"] = histogram.percentile(99)
+        return summary
+
     def calculate_weighted_collision_rate(self):
         """
         Calculate the weighted collision rate for ERTS vehicles.
@@ -161,7 +224,8 @@ class Analytics:
                     "Car Count": self.no_erts_car_count,
                     "Emergency Count": self.no_erts_emergency_count,
                     "Collision Rate": self.no_erts_collision_rate,
-                    "Avg Weighted Collision Rate": self.no_erts_avg_weighted_collision_rate
+                    "Avg Weighted Collision Rate": self.no_erts_avg_weighted_collision_rate,
+                    "KPI Histograms": {name: histogram.to_dict() for name, histogram in self.no_erts_kpis.items()}
                 },
                 "ERTS - Active": {
                     "Collision Count": self.erts_collision_count,
@@ -170,7 +234,8 @@ class Analytics:
                     "Collision Rate": self.erts_collision_rate,
                     "Base Weighted Collision Rate": self.erts_base_weighted_collision_rate,
                     "Avg Weighted Collision Rate": self.erts_avg_weighted_collision_rate,
-                    "Extrapolated Collision Count": self.erts_extrapolated_collisions
+                    "Extrapolated Collision Count": self.erts_extrapolated_collisions,
+                    "KPI Histograms": {name: histogram.to_dict() for name, histogram in self.erts_kpis.items()}
                 }
             }
         }
\ No newline at end of file
@@ -0,0 +1,256 @@
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from datetime import datetime
+
+import pygame as pg
+
+from config import FPS, CAPTURE_DIR, CAPTURE_EVERY_N, CAPTURE_QUEUE_SIZE, CAPTURE_DROP_FRAMES, CAPTURE_POLL_INTERVAL, SNAPSHOT_EVERY_N_TICKS, SNAPSHOT_ON_COLLISION
+
+
+class FrameCapture:
+    """
+    Class to record rendered frames without slowing down the simulation loop.
+
+    `capture` copies the window's pixels into a bounded queue and returns immediately. A background
+    writer thread drains the queue, piping raw frames to ffmpeg (an MP4 video) when it is installed,
+    or saving a numbered PNG sequence otherwise. If the writer falls behind and the queue fills up,
+    new frames are either dropped (counted in `dropped`) or `capture` waits for space (backpressure).
+    If the writer fails, it stops and its exception is raised again by the next `capture` or `close`, so
+    neither can wait forever on a queue nothing is draining.
+
+    Attributes:
+        - directory (str): Directory the PNG sequence or video is written to
+        - every_n (int): Capture one frame out of every N passed to `capture`
+        - drop_frames (bool): Drop frames when the queue is full (False to block until there is space)
+        - fps (int): Frame rate of the recorded video
+        - use_ffmpeg (bool): Whether frames are piped to ffmpeg instead of saved as PNGs
+        - frames (queue.Queue): Bounded queue of (index, pixels, size) waiting to be written
+        - frame_count (int): Number of frames passed to `capture`
+        - captured (int): Number of frames queued for writing
+        - dropped (int): Number of frames dropped because the queue was full
+        - written (int): Number of frames written by the background thread
+        - error (Exception): The exception that stopped the writer thread (None while it is running fine)
+        - writer (threading.Thread): The background writer thread
+        - ffmpeg (subprocess.Popen): The ffmpeg process (None until the first frame when using ffmpeg)
+        - output_path (str): Path of the video, or of the directory holding the PNG sequence
+
+    Methods:
+        - capture: Queue a copy of a rendered surface
+        - put: Queue an item for the writer, without waiting on a writer that has stopped
+        - close: Flush the queue and stop the writer
+    """
+    def __init__(self, directory=CAPTURE_DIR, every_n=CAPTURE_EVERY_N, queue_size=CAPTURE_QUEUE_SIZE,
+                 drop_frames=CAPTURE_DROP_FRAMES, fps=FPS, use_ffmpeg=None):
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.directory = directory
+        self.every_n = max(1, every_n)
+        self.drop_frames = drop_frames
+        self.fps = fps / self.every_n
+        self.use_ffmpeg = shutil.which("ffmpeg") is not None if use_ffmpeg is None else use_ffmpeg
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.frame_count = 0
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.error = None
+        self.ffmpeg = None
+
+        if self.use_ffmpeg:
+            os.makedirs(directory, exist_ok=True)
+            self.output_path = os.path.join(directory, f"capture-{timestamp}.mp4")
+        else:
+            self.output_path = os.path.join(directory, f"capture-{timestamp}")
+            os.makedirs(self.output_path, exist_ok=True)
+
+        self.writer = threading.Thread(target=self.write_frames, daemon=True)
+        self.writer.start()
+
+    def capture(self, surface, number=None):
+        """
+        Queue a copy of a rendered surface for writing (every Nth call only).
+
+        Args:
+            - surface (Surface): The rendered frame, e.g. the pygame window.
+            - number (int): Frame number to put in the PNG file name (None to number frames consecutively).
+
+        Returns:
+            - bool: True if the frame was queued, False if it was skipped or dropped.
+
+        Raises:
+            - Exception: The error that stopped the writer thread, if it has failed.
+        """
+        self.raise_writer_error()
+        self.frame_count += 1
+        if (self.frame_count - 1) % self.every_n:
+            return False
+
+        # Copy the pixels now; the surface is redrawn on the next frame
+        index = self.captured + self.dropped if number is None else number
+        frame = (index, pg.image.tobytes(surface, "RGB"), surface.get_size())
+        if self.drop_frames:
+            try:
+                self.frames.put_nowait(frame)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        else:
+            self.put(frame)
+        self.captured += 1
+        return True
+
+    def put(self, item):
+        """
+        Queue an item for the writer, waiting for space for as long as the writer is still running.
+
+        Args:
+            - item: A frame, or the None sentinel.
+
+        Raises:
+            - Exception: The error that stopped the writer thread, if it fails while waiting.
+        """
+        while True:
+            self.raise_writer_error()
+            try:
+                self.frames.put(item, timeout=CAPTURE_POLL_INTERVAL)
+                return
+            except queue.Full:
+                if not self.writer.is_alive():
+                    self.raise_writer_error()
+                    return      # Stopped cleanly; nothing will take the item
+
+    def raise_writer_error(self):
+        """
+        Raises:
+            - Exception: The error that stopped the writer thread, if it has failed.
+        """
+        if self.error is not None:
+            raise self.error
+
+    def write_frames(self):
+        """
+        Background thread: write queued frames until a None sentinel is received, or until writing fails
+        (the error is kept in `error`).
+        """
+        try:
+            while True:
+                frame = self.frames.get()
+                if frame is None:
+                    break
+                index, pixels, size = frame
+                if self.use_ffmpeg:
+                    self.write_video_frame(pixels, size)
+                else:
+                    image = pg.image.frombytes(pixels, size, "RGB")
+                    pg.image.save(image, os.path.join(self.output_path, f"frame-{index:06d}.png"))
+                self.written += 1
+        except Exception as error:
+            self.error = error
+        finally:
+            if self.ffmpeg:
+                try:
+                    self.ffmpeg.stdin.close()
+                except OSError:
+                    pass    # ffmpeg already exited (that is what stopped the writer)
+                self.ffmpeg.wait()
+
+    def write_video_frame(self, pixels, size):
+        """
+        Pipe one raw RGB frame to ffmpeg, starting it on the first frame (when the size is known).
+
+        Args:
+            - pixels (bytes): Raw RGB pixel data.
+            - size (tuple): (width, height) of the frame.
+        """
+        if self.ffmpeg is None:
+            width, height = size
+            self.ffmpeg = subprocess.Popen(
+                ["ffmpeg", "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                 "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-",
+                 "-pix_fmt", "yuv420p", self.output_path],
+                stdin=subprocess.PIPE,
+            )
+        self.ffmpeg.stdin.write(pixels)
+
+    def close(self):
+        """
+        Write any frames still queued, then stop the writer thread (and ffmpeg).
+
+        Returns:
+            - str: Path of the video or PNG directory.
+
+        Raises:
+            - Exception: The error that stopped the writer thread, if it failed.
+        """
+        if self.writer.is_alive():
+            try:
+                self.put(None)
+            finally:
+                self.writer.join()
+        self.raise_writer_error()
+        return self.output_path
+
+
+class PeriodicSnapshots:
+    """
+    Class to save PNG snapshots of a headless run, every N ticks and whenever a collision is counted.
+
+    `due` is all the simulation checks each tick, so runs pay next to nothing between snapshots. When one
+    is due, the simulation draws itself and `save` hands the pixels to a FrameCapture in PNG mode, whose
+    background thread does the encoding. Snapshots are never dropped; they are sparse enough that the
+    writer keeps up.
+
+    Attributes:
+        - every_n_ticks (int): Save a snapshot every N ticks (0 for none)
+        - on_collision (bool): Also save a snapshot after every tick that counts a collision
+        - next_tick (int): Tick at which the next periodic snapshot is due
+        - writer (FrameCapture): The background PNG writer
+
+    Methods:
+        - due: Check whether a snapshot is due after a tick
+        - save: Queue a snapshot, named after its tick
+        - close: Write any queued snapshots and stop the writer
+    """
+    def __init__(self, every_n_ticks=SNAPSHOT_EVERY_N_TICKS, on_collision=SNAPSHOT_ON_COLLISION, directory=CAPTURE_DIR,
+                 queue_size=CAPTURE_QUEUE_SIZE):
+        self.every_n_ticks = every_n_ticks
+        self.on_collision = on_collision
+        self.next_tick = every_n_ticks if every_n_ticks > 0 else float('inf')
+        self.writer = FrameCapture(directory, every_n=1, queue_size=queue_size, drop_frames=False, use_ffmpeg=False)
+
+    def due(self, tick, collided):
+        """
+        Check whether a snapshot is due after a tick.
+
+        Args:
+            - tick (int): The simulation's tick count.
+            - collided (bool): Whether the tick counted a collision.
+
+        Returns:
+            - bool: True if a snapshot should be saved.
+        """
+        if tick >= self.next_tick:
+            self.next_tick = (tick // self.every_n_ticks + 1) * self.every_n_ticks
+            return True
+        return collided and self.on_collision
+
+    def save(self, surface, tick):
+        """
+        Queue a snapshot for writing as frame-<tick>.png.
+
+        Args:
+            - surface (Surface): The rendered frame.
+            - tick (int): The simulation's tick count.
+        """
+        self.writer.capture(surface, tick)
+
+    def close(self):
+        """
+        Write any queued snapshots, then stop the writer.
+
+        Returns:
+            - str: Path of the directory holding the snapshots.
+        """
+        return self.writer.close()
@@ -1,25 +1,44 @@
-import pygame as pg
 from config import ROAD_COLOR, SIDEWALK_COLOR, BLOCK_COLOR, CROSSWALK_COLOR, TILE_SIZE, YELLOW_STRIPE, CROSSWALK_TILES, INTERSECTION_TILES
 
 
 class CityGrid:
     """
+    The city as three separate layers, combined only when a tile is queried:
+
+        - terrain: the permanent tile types ('road', 'sidewalk', 'empty'), built once and never changed
+        - signals: crosswalk control states ('red_light', 'green_light', '4_way_red'), written by the
+          intersection manager
+        - occupancy: the tiles vehicles are on, rebuilt from the vehicle positions every update
+
+    A signal takes precedence over occupancy, and occupancy over terrain, so `tile` returns what a vehicle
+    looking at that tile should react to. Each layer is reset on its own; clearing the dynamic layers on
+    reset just swaps in empty containers.
+
     Attributes:
         - grid_size (int): The size of the grid
-        - grid (list): 2D list representing the city grid
+        - terrain (tuple): Immutable rows of terrain types, indexed [row][column]
+        - signals (dict): (row, column) -> signal state of every crosswalk tile currently under control
+        - occupied (set): (row, column) of every tile a vehicle was on at the last occupancy rebuild
         - crosswalks (list): List of crosswalk coordinates
         - traffic_lights (list): List of traffic lights in the city
         - active_emergency_vehicles (list): List of active emergency vehicles in the city
 
     Methods:
         - create_grid: Creates a grid of size grid_size x grid_size
-        - set_city_elements: Sets up the roads, sidewalks, and crosswalks
+        - set_city_elements: Lays out the roads and sidewalks as the terrain layer
+        - reset: Clears the signal and occupancy layers
+        - tile: Gets the composed state of a tile (signal, else occupied, else terrain)
+        - set_signal: Sets the signal state of a crosswalk tile
+        - rebuild_occupancy: Replaces the occupancy layer with the tiles vehicles are on
+        - check_occupancy: Checks the occupancy layer's invariants after a rebuild (debugging)
         - draw: Draws the city grid on the screen
         - add_traffic_light: Adds a traffic light to the
     """
     def __init__(self, grid_size):
         self.grid_size = grid_size
-        self.grid = self.create_grid()
+        self.terrain = tuple(tuple(row) for row in self.create_grid())
+        self.signals = {}
+        self.occupied = set()
         self.crosswalks = CROSSWALK_TILES["EW"] + CROSSWALK_TILES["NS"]
         self.traffic_lights = []
         self.active_emergency_vehicles = []
@@ -33,32 +52,138 @@ class CityGrid:
         """
         return [['empty' for _ in range(self.grid_size)] for _ in range(self.grid_size)]
 
+    def reset(self):
+        """
+        Clears the signal and occupancy layers. The terrain never changes, so it is left as it is.
+        """
+        self.signals = {}
+        self.occupied = set()
+        self.active_emergency_vehicles = []
+
     def set_city_elements(self):
         """
-        Sets up the roads and sidewalks on the city grid.
+        Lays out the roads and sidewalks and freezes them as the terrain layer.
         """
-        self.set_roads()
-        self.set_sidewalks()
+        grid = self.create_grid()
+        self.set_roads(grid)
+        self.set_sidewalks(grid)
+        self.terrain = tuple(tuple(row) for row in grid)
 
-    def set_roads(self):
+    def tile(self, row, column):
+        """
+        Gets the state of a tile as a vehicle sees it.
+
+        Args:
+            row (int): The row index of the tile.
+            column (int): The column index of the tile.
+
+        Returns:
+            str: The tile's signal state if it has one, else 'occupied' if a vehicle is on it, else its terrain type.
+        """
+        signal = self.signals.get((row, column))
+        if signal is not None:
+            return signal
+        if (row, column) in self.occupied:
+            return 'occupied'
+        return self.terrain[row][column]
+
+    def set_signal(self, row, column, state):
+        """
+        Sets the signal state of a crosswalk tile.
+
+        Args:
+            row (int): The row index of the tile.
+            column (int): The column index of the tile.
+            state (str): 'red_light', 'green_light' or '4_way_red'.
+        """
+        self.signals[(row, column)] = state
+
+    def vehicle_tiles(self, vehicles):
+        """
+        Gets the tiles the given vehicles are on.
+
+        Args:
+            vehicles (list): The vehicles.
+
+        Returns:
+            set: (row, column) of every tile with a vehicle on it (vehicles off the grid are skipped).
+        """
+        size = self.grid_size
+        return {(int(vehicle.y), int(vehicle.x)) for vehicle in vehicles if 0 <= vehicle.x < size and 0 <= vehicle.y < size}
+
+    def rebuild_occupancy(self, vehicles):
+        """
+        Replaces the occupancy layer with exactly the tiles vehicles are on, so no stale ('ghost') occupied
+        tiles are left behind by vehicles that moved, pulled over, merged or left. The terrain and signal
+        layers are untouched, so nothing has to be restored or protected first.
+
+        This is the only place occupancy is written.
+
+        Args:
+            vehicles (list): Every vehicle in the simulation.
+        """
+        self.occupied = self.vehicle_tiles(vehicles)
+
+    def check_occupancy(self, vehicles, signals=None):
+        """
+        Checks the invariants of the occupancy layer after a rebuild (debugging aid). Each check walks the
+        vehicles on its own rather than going through vehicle_tiles, so a layer that drifted from the
+        vehicle positions, or a rebuild that wrote to the wrong layer, is caught.
+
+        Args:
+            vehicles (list): Every vehicle in the simulation.
+            signals (dict): Copy of the signal layer taken before the rebuild, or None to skip that check.
+
+        Raises:
+            AssertionError: If a tile is marked occupied with no vehicle on it (a ghost tile), a vehicle's
+            tile isn't marked, more tiles are occupied than there are vehicles on the grid, a vehicle is off
+            the road, or the signal layer changed during the rebuild.
+        """
+        size = self.grid_size
+        on_grid = [vehicle for vehicle in vehicles if 0 <= vehicle.x < size and 0 <= vehicle.y < size]
+        assert len(self.occupied) <= len(on_grid), \
+            f"{len(self.occupied)} tiles occupied by only {len(on_grid)} vehicles on the grid"
+        if on_grid:
+            assert self.occupied, f"no tiles occupied with {len(on_grid)} vehicles on the grid"
+
+        claimed = set()
+        for vehicle in on_grid:
+            row, column = int(vehicle.y), int(vehicle.x)
+            assert (row, column) in self.occupied, f"vehicle {vehicle.id} on unmarked tile {(row, column)}"
+            claimed.add((row, column))
+        ghosts = sorted(self.occupied - claimed)
+        assert not ghosts, f"ghost tiles with no vehicle on them: {ghosts}"
+
+        off_road = sorted(tile for tile in self.occupied if self.terrain[tile[0]][tile[1]] == 'empty')
+        assert not off_road, f"vehicles off the road on tiles {off_road}"
+        if signals is not None:
+            assert self.signals == signals, "signal layer changed while rebuilding occupancy"
+
+    def set_roads(self, grid):
         """
         Marks the road tiles on the grid.
+
+        Args:
+            grid (list): 2D list the terrain is being laid out in.
         """
         for i in range(self.grid_size):
-            self.grid[11][i] = 'road'
-            self.grid[i][11] = 'road'
-            self.grid[12][i] = 'road'
-            self.grid[i][12] = 'road'
+            grid[11][i] = 'road'
+            grid[i][11] = 'road'
+            grid[12][i] = 'road'
+            grid[i][12] = 'road'
 
-    def set_sidewalks(self):
+    def set_sidewalks(self, grid):
         """
         Marks the sidewalk tiles on the grid.
+
+        Args:
+            grid (list): 2D list the terrain is being laid out in.
         """
         for i in range(self.grid_size):
-            self.grid[10][i] = 'sidewalk'
-            self.grid[i][10] = 'sidewalk'
-            self.grid[13][i] = 'sidewalk'
-            self.grid[i][13] = 'sidewalk'
+            grid[10][i] = 'sidewalk'
+            grid[i][10] = 'sidewalk'
+            grid[13][i] = 'sidewalk'
+            grid[i][13] = 'sidewalk'
 
     def draw(self, win):
         """
@@ -80,9 +205,13 @@ class CityGrid:
             i (int): The row index of the tile.
             j (int): The column index of the tile.
         """
-        if self.grid[i][j] in ['road', 'occupied']:
+        # Imported here so the simulation core runs without pygame
+        import pygame as pg
+
+        terrain = self.terrain[i][j]
+        if terrain == 'road':
             color = ROAD_COLOR
-        elif self.grid[i][j] == 'sidewalk':
+        elif terrain == 'sidewalk':
             color = SIDEWALK_COLOR
         else:
             color = BLOCK_COLOR
@@ -94,7 +223,7 @@ class CityGrid:
         pg.draw.rect(win, color, (j * TILE_SIZE, i * TILE_SIZE, TILE_SIZE, TILE_SIZE))
 
         # Draw yellow line between road tiles, except at intersections
-        if self.grid[i][j] in ['road', 'occupied'] and (i, j) not in self.crosswalks and (i, j) not in INTERSECTION_TILES:
+        if terrain == 'road' and (i, j) not in self.crosswalks and (i, j) not in INTERSECTION_TILES:
             self.draw_yellow_stripe(win, i, j)
 
     def draw_yellow_stripe(self, win, i, j):
@@ -106,6 +235,8 @@ class CityGrid:
             i (int): The row index of the tile.
             j (int): The column index of the tile.
         """
+        import pygame as pg
+
         if i == 12:  # Horizontal roads (between rows 11 and 12)
             pg.draw.line(win, YELLOW_STRIPE, (j * TILE_SIZE, i * TILE_SIZE), ((j + 1) * TILE_SIZE, i * TILE_SIZE))
         if j == 12:  # Vertical roads (between columns 11 and 12)
@@ -1,3 +1,6 @@
+from dataclasses import dataclass
+
+
 # Basic Simulation Parameters
 TILE_SIZE = 32              # pixels
 WIDTH, HEIGHT = 768, 768    # pixels
@@ -14,16 +17,125 @@ YELLOW_LIGHT = (255, 255, 0)
 OFF_LIGHT = (108, 108, 120)
 YELLOW_STRIPE = (235, 189, 52)
 
+# Timing Parameters
+FPS = 60                                # frames per second for the interactive window
+DEFAULT_DT = 1 / FPS                    # seconds of simulated time per update when running interactively
+IDLE_EVENT_TIMEOUT = 500                # milliseconds an idle screen (paused, settings, results) waits for input before checking again
+
 # Vehicle Parameters
-FREQUENCY_OF_EVENTS = 0.03              # frequency of vehicle generation, 0.03 = 3% chance per frame. (~83% chance per second)
-VEHICLE_BASE_SPEED = 0.2                # tiles per frame (0.2 = 12 tiles per second)        
+FREQUENCY_OF_EVENTS = 1.8               # vehicles generated per second (Poisson rate, same as the old 3% chance per frame at 60 FPS)
+EMERGENCY_FREQUENCY_OF_EVENTS = FREQUENCY_OF_EVENTS / 5     # emergency vehicles generated per second
+VEHICLE_BASE_SPEED = 12                 # tiles per second
+PRE_DRAWN_SPAWNS = True                 # draw arrivals in bulk ahead of time instead of rolling for them every tick
+SPAWN_CHUNK_SIZE = 4096                 # arrivals drawn per kind each time the pre-drawn stream runs out
 GREEN_LIGHT_DURATION = 10               # seconds
 YELLOW_LIGHT_DURATION = 3               # seconds
 RED_LIGHT_DURATION = 13                 # seconds
+YELLOW_AS_RED_AFTER = 0.8               # seconds into a yellow light after which crosswalks are treated as red
+EV_FLASH_INTERVAL = 1 / 60              # seconds between emergency light color changes
+FREE_FLOW_ENABLED = True                # move unconstrained vehicles analytically, skipping per-tick look-ahead checks
+NUMBA_KERNELS = True                    # move vehicles and find collisions with compiled kernels when numba is installed (same results)
+
+# Intersection Parameters
+FOUR_WAY_STOP_WAIT = 2                  # seconds a vehicle must wait at a 4-way stop before proceeding
+FOUR_WAY_BUFFER_DELAY = 1.5             # seconds between vehicles proceeding through a 4-way stop
+FOUR_WAY_INITIAL_DELAY = 0.5            # seconds before the first vehicle may proceed after the 4-way stop starts
+COLLISION_COOLDOWN = 1                  # seconds a vehicle pair must be apart before it can be counted again
+DEBUG_OCCUPANCY = False                 # check the occupied tiles against the vehicle positions after every update (slow)
+
+# Event-Driven Engine Parameters
+EVENT_MAX_STEP = 0.1                    # seconds, longest step while any vehicle is queued or near the intersection (< 1 tile per step)
+EVENT_TIME_EPSILON = 1e-6               # seconds added past each event time so timers reliably cross their thresholds
+
+# Result Cache Parameters
+RESULT_CACHE_DIR = "cache"              # directory for cached analysis results
+RESULT_CACHE_MAX_ENTRIES = 10000        # cached results kept before the least recently used are evicted
+
+# Sweep Queue Parameters
+SWEEP_SHARD_SIZE = 8                    # (config, seed) runs a worker claims at a time
+SWEEP_LEASE_DURATION = 120              # seconds a claim stays valid unless renewed; after that other workers may take the shard over
+
+# Ensemble Parameters
+ENSEMBLE_SAMPLE_INTERVAL = 1            # seconds of simulated time between trace samples of each ensemble replicate
+ENSEMBLE_MAX_VEHICLES = 64              # vehicle states kept per trace sample (vehicles beyond this are only counted)
+
+# Capture Parameters
+CAPTURE_DIR = "captures"                # directory for recorded videos and PNG sequences
+CAPTURE_EVERY_N = 1                     # record one frame out of every N rendered
+CAPTURE_QUEUE_SIZE = 120                # frames buffered for the background writer (about 2 seconds at 60 FPS)
+CAPTURE_DROP_FRAMES = True              # drop frames when the writer falls behind (False to slow the simulation instead)
+CAPTURE_POLL_INTERVAL = 0.1             # seconds between checks that the writer is still running while waiting for queue space
+SNAPSHOT_EVERY_N_TICKS = 600            # headless runs save a PNG snapshot every N simulation updates (0 for none)
+SNAPSHOT_ON_COLLISION = True            # headless runs also save a snapshot after every update that counts a collision
+
+# Sequential Analysis Parameters
+SEQUENTIAL_BLOCK_DURATION = 60          # seconds of simulated time per ERTS off / ERTS on block
+SEQUENTIAL_CONFIDENCE = 0.95            # confidence level of the interval on the collision rate difference
+SEQUENTIAL_MIN_PAIRS = 5                # block pairs run before early stopping is considered
+SEQUENTIAL_MAX_PAIRS = 720              # block pairs run at most (12 hours per arm with 60 second blocks)
+
+# KPI Histogram Parameters
+KPI_TIME_RESOLUTION = 0.01              # seconds, smallest difference the delay and clearance time histograms tell apart
+KPI_MAX_TIME = 3600                     # seconds, longer times are counted in the top bucket
+KPI_MAX_QUEUE = 1000                    # vehicles, longer queues are counted in the top bucket
+KPI_SUB_BUCKETS = 64                    # histogram buckets per power of two (values kept to within about 3%)
+KPI_SAMPLE_INTERVAL = 1                 # seconds of simulated time between queue length samples
+
+# Telemetry Parameters
+TELEMETRY_HOST = "127.0.0.1"            # only reachable from this machine
+TELEMETRY_PORT = 8765
+TELEMETRY_MAX_RATE = 5                  # telemetry records built and sent per second, at most
+TELEMETRY_SEND_TIMEOUT = 5              # seconds a client may stall before it is disconnected
 
 
 # Element References
 EW_CROSSWALKS = [(10,11), (10, 12), (13, 11), (13, 12)]
 NS_CROSSWALKS = [(11,10), (12,10), (11, 13), (12, 13)]
 CROSSWALK_TILES = {"EW": EW_CROSSWALKS, "NS": NS_CROSSWALKS}
-INTERSECTION_TILES = [(11, 11), (11, 12), (12, 11), (12, 12)]
\ No newline at end of file
+INTERSECTION_TILES = [(11, 11), (11, 12), (12, 11), (12, 12)]
+CONFLICT_ZONE = (9, 14)                 # tiles, [min, max) on both axes where crossing vehicles are checked for collisions
+
+
+@dataclass(frozen=True)
+class SimConfig:
+    """
+    Immutable set of simulation parameters, passed into the Simulation and the entities it creates.
+
+    The module-level constants above are the defaults. Use `dataclasses.replace` to derive variants,
+    so several configurations can be run side by side in one process.
+
+    Attributes:
+        - grid_size (int): Width and height of the city grid in tiles
+        - frequency_of_events (float): Vehicles generated per second
+        - emergency_frequency_of_events (float): Emergency vehicles generated per second
+        - vehicle_base_speed (float): Base vehicle speed in tiles per second
+        - green_light_duration (float): Seconds a light stays green
+        - yellow_light_duration (float): Seconds a light stays yellow
+        - red_light_duration (float): Seconds a light stays red
+        - yellow_as_red_after (float): Seconds into a yellow light after which crosswalks are treated as red
+        - four_way_stop_wait (float): Seconds a vehicle must wait at a 4-way stop before proceeding
+        - four_way_buffer_delay (float): Seconds between vehicles proceeding through a 4-way stop
+        - four_way_initial_delay (float): Seconds before the first vehicle may proceed after the 4-way stop starts
+        - collision_cooldown (float): Seconds a vehicle pair must be apart before it can be counted again
+        - free_flow_enabled (bool): Whether unconstrained vehicles move analytically
+        - event_max_step (float): Longest event-engine step while any vehicle needs per-step checks
+        - pre_drawn_spawns (bool): Whether arrivals come from a stream drawn in bulk ahead of time
+    """
+    grid_size: int = GRID_SIZE
+    frequency_of_events: float = FREQUENCY_OF_EVENTS
+    emergency_frequency_of_events: float = EMERGENCY_FREQUENCY_OF_EVENTS
+    vehicle_base_speed: float = VEHICLE_BASE_SPEED
+    green_light_duration: float = GREEN_LIGHT_DURATION
+    yellow_light_duration: float = YELLOW_LIGHT_DURATION
+    red_light_duration: float = RED_LIGHT_DURATION
+    yellow_as_red_after: float = YELLOW_AS_RED_AFTER
+    four_way_stop_wait: float = FOUR_WAY_STOP_WAIT
+    four_way_buffer_delay: float = FOUR_WAY_BUFFER_DELAY
+    four_way_initial_delay: float = FOUR_WAY_INITIAL_DELAY
+    collision_cooldown: float = COLLISION_COOLDOWN
+    free_flow_enabled: bool = FREE_FLOW_ENABLED
+    event_max_step: float = EVENT_MAX_STEP
+    pre_drawn_spawns: bool = PRE_DRAWN_SPAWNS
+
+
+DEFAULT_CONFIG = SimConfig()
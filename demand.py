@@ -0,0 +1,324 @@
+import weakref
+from dataclasses import dataclass
+
+import numpy as np
+
+from config import DEFAULT_CONFIG
+from entities.vehicle import spawn_position
+from spawn_stream import Arrival
+
+DIRECTIONS = ("N", "S", "E", "W")
+EVEN = {direction: 0.25 for direction in DIRECTIONS}
+
+
+@dataclass(frozen=True)
+class DemandProfile:
+    """
+    Time-varying demand per approach, as piecewise-constant segments that repeat every `period` seconds.
+
+    Rates are multiples of the config's arrival rates, so a profile scales with `frequency_of_events`
+    and `emergency_frequency_of_events` (shares summing to 1 keep the config's overall rate).
+
+    Attributes:
+        - name (str): Name of the profile
+        - period (float): Seconds after which the profile repeats (86400 for a daily profile)
+        - segments (tuple): (start second, vehicle shares, emergency shares) per segment, in order of start;
+          the shares map each direction (N, S, E, W) to a multiple of the corresponding config rate
+    """
+    name: str
+    period: float
+    segments: tuple
+
+
+def hourly_profile(name, hourly_factors, direction_shares=None, emergency_shares=EVEN):
+    """
+    Build a daily profile from one demand factor per hour.
+
+    Args:
+        - name (str): Name of the profile.
+        - hourly_factors (list): 24 multipliers of the overall vehicle rate, one per hour of the day.
+        - direction_shares (dict): Hour -> share of traffic per direction, for hours that aren't evenly split.
+        - emergency_shares (dict): Emergency vehicle shares per direction (the same all day).
+
+    Returns:
+        - DemandProfile: The profile.
+    """
+    direction_shares = direction_shares or {}
+    segments = []
+    for hour, factor in enumerate(hourly_factors):
+        shares = direction_shares.get(hour, EVEN)
+        segments.append((hour * 3600, {direction: factor * share for direction, share in shares.items()}, emergency_shares))
+    return DemandProfile(name, 86400, tuple(segments))
+
+
+MORNING_INBOUND = {"N": 0.4, "S": 0.2, "E": 0.2, "W": 0.2}
+EVENING_OUTBOUND = {"N": 0.2, "S": 0.4, "E": 0.2, "W": 0.2}
+
+PROFILES = {
+    # The default behaviour: the config rates, split evenly, all the time
+    "constant": DemandProfile("constant", 3600, ((0, EVEN, EVEN),)),
+    # A weekday: quiet nights, a northbound morning peak and a southbound evening peak
+    "rush_hour": hourly_profile(
+        "rush_hour",
+        [0.2, 0.15, 0.1, 0.1, 0.15, 0.4, 0.9, 1.8, 2.0, 1.3, 1.0, 1.0,
+         1.1, 1.0, 1.0, 1.2, 1.7, 2.0, 1.8, 1.2, 0.9, 0.7, 0.5, 0.3],
+        {**{hour: MORNING_INBOUND for hour in range(6, 10)}, **{hour: EVENING_OUTBOUND for hour in range(15, 19)}},
+    ),
+    # A busy east-west arterial crossing a quiet side street
+    "corridor": DemandProfile("corridor", 3600, ((0, {"N": 0.1, "S": 0.1, "E": 0.4, "W": 0.4}, EVEN),)),
+    # An hour of normal traffic, then half an hour of crowds leaving a venue to the west, then back to normal
+    "event_surge": DemandProfile("event_surge", 7200, (
+        (0, EVEN, EVEN),
+        (3600, {"N": 0.3, "S": 0.3, "E": 1.5, "W": 0.25}, {"N": 0.25, "S": 0.25, "E": 0.75, "W": 0.25}),
+        (5400, EVEN, EVEN),
+    )),
+}
+
+
+class CompiledArrivals:
+    """
+    Arrivals compiled from a demand profile, shared by every ArrivalSchedule copied from one schedule.
+
+    The first `duration` seconds are compiled up front and kept, as every rewind replays them. After that
+    the profile is compiled one more period at a time, when a schedule reaches it, so the traffic keeps
+    following the profile however long the simulation runs. Each extra period draws from its own
+    generators, so it is not a copy of the first one, and copies of a schedule share the extra periods,
+    so they keep seeing the same traffic. An extra period is dropped once every live schedule has passed
+    it, so memory is bounded by the up-front arrivals plus the periods between the slowest and the
+    fastest schedule; as each period is drawn from its own seed, a schedule rewound to an earlier point
+    recompiles a dropped period to exactly the same arrivals.
+
+    Attributes:
+        - profile (DemandProfile): The demand profile
+        - seed (int): Seed of the arrivals
+        - config (SimConfig): The simulation parameters
+        - arrivals (list): The arrivals (Arrival) of the first `duration` seconds, ordered by time
+        - duration (float): Seconds compiled up front
+        - extra_periods (dict): Number (from 1) -> arrivals of each extra period still kept
+        - schedules (WeakSet): The live schedules reading these arrivals
+
+    Methods:
+        - period_arrivals: Get the arrivals of the up-front duration or of an extra period
+        - period_end: Get the time an extra period ends
+        - release: Drop the extra periods every live schedule has passed
+    """
+    def __init__(self, profile, seed, config, duration):
+        self.profile = profile
+        self.seed = seed
+        self.config = config
+        self.arrivals = draw_arrivals(profile, [seed], config, 0, duration)
+        self.duration = duration
+        self.extra_periods = {}
+        self.schedules = weakref.WeakSet()
+
+    def period_arrivals(self, period):
+        """
+        Get the arrivals of the up-front duration (period 0) or of an extra period, compiling it if needed.
+
+        Args:
+            - period (int): Number of the period.
+
+        Returns:
+            - list: Its arrivals (Arrival), ordered by time.
+        """
+        if period == 0:
+            return self.arrivals
+        arrivals = self.extra_periods.get(period)
+        if arrivals is None:
+            start = self.period_end(period - 1)
+            arrivals = draw_arrivals(self.profile, [self.seed, period], self.config, start, start + self.profile.period)
+            self.extra_periods[period] = arrivals
+        return arrivals
+
+    def period_end(self, period):
+        """
+        Returns:
+            - float: Seconds into the profile at which a period (0 for the up-front duration) ends.
+        """
+        return self.duration + period * self.profile.period
+
+    def release(self):
+        """
+        Drop the extra periods that every live schedule has passed.
+        """
+        lowest = min((schedule.period for schedule in self.schedules), default=0)
+        for period in [period for period in self.extra_periods if period < lowest]:
+            del self.extra_periods[period]
+
+
+class ArrivalSchedule:
+    """
+    Precomputed, time-ordered arrivals compiled from a demand profile.
+
+    Has the same interface as SpawnStream, so a simulation spawns from it by just popping the arrivals
+    that are due; the cost per tick doesn't depend on how complicated the profile is. When it reaches
+    the end of what has been compiled, the next period of the profile is compiled, so it never runs dry.
+
+    Attributes:
+        - compiled (CompiledArrivals): The arrivals compiled so far (shared with copies of this schedule)
+        - start_time (float): Simulation time at which the schedule (re)started
+        - period (int): Period the cursor is in (0 for the up-front duration, see CompiledArrivals)
+        - cursor (int): Index of the next arrival to spawn in that period
+        - next_due (float): Simulation time of the next arrival
+
+    Methods:
+        - copy: Get an independent cursor over the same arrivals
+        - rewind: Replay the schedule from the start at a new simulation time
+        - next_time: Get the simulation time of the next arrival
+        - pop_due: Remove and return the arrivals due by a simulation time
+        - counts: Count the arrivals compiled up front per direction
+    """
+    def __init__(self, compiled, start_time=0):
+        self.compiled = compiled
+        compiled.schedules.add(self)
+        self.rewind(start_time)
+
+    @property
+    def arrivals(self):
+        return self.compiled.arrivals
+
+    @property
+    def duration(self):
+        return self.compiled.duration
+
+    def copy(self):
+        """
+        Returns:
+            - ArrivalSchedule: A schedule sharing the same arrivals, with its own cursor, rewound to the start.
+        """
+        return ArrivalSchedule(self.compiled, self.start_time)
+
+    def rewind(self, start_time):
+        """
+        Replay the schedule from its first arrival, starting at the given simulation time.
+
+        Args:
+            - start_time (float): Simulation time of the start of the replay.
+        """
+        self.start_time = start_time
+        self.period = 0
+        self.cursor = 0
+        self.next_due = self.find_next_due()
+
+    def find_next_due(self):
+        """
+        Get the simulation time of the next arrival, moving the cursor on to the next period (compiling
+        it if needed) once every arrival of its period has been spawned.
+
+        Returns:
+            - float: Simulation time of the next arrival (or, if the period has none, the end of the period).
+        """
+        arrivals = self.compiled.period_arrivals(self.period)
+        if self.cursor == len(arrivals):
+            self.period += 1
+            self.cursor = 0
+            self.compiled.release()
+            arrivals = self.compiled.period_arrivals(self.period)
+        if self.cursor < len(arrivals):
+            return self.start_time + arrivals[self.cursor].time
+        return self.start_time + self.compiled.period_end(self.period)
+
+    def next_time(self):
+        """
+        Returns:
+            - float: Simulation time of the next arrival.
+        """
+        return self.next_due
+
+    def pop_due(self, now):
+        """
+        Remove and return every arrival due at or before a simulation time, in time order.
+
+        Args:
+            - now (float): The current simulation time.
+
+        Returns:
+            - list: The due arrivals (Arrival).
+        """
+        due = []
+        while self.next_due <= now:
+            arrivals = self.compiled.period_arrivals(self.period)
+            start = self.cursor
+            while self.cursor < len(arrivals) and self.start_time + arrivals[self.cursor].time <= now:
+                self.cursor += 1
+            due.extend(arrivals[start:self.cursor])
+            self.next_due = self.find_next_due()
+        return due
+
+    def counts(self):
+        """
+        Returns:
+            - dict: (direction, emergency) -> number of arrivals compiled up front.
+        """
+        counts = {}
+        for arrival in self.arrivals:
+            key = (arrival.direction, arrival.emergency)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+def draw_arrivals(profile, key, config, start, end):
+    """
+    Draw the arrivals of a demand profile between two times.
+
+    Every direction and vehicle kind is a Poisson process with its own generator, whose rate is constant
+    within each segment. Each segment is drawn in bulk: the number of arrivals is Poisson, and given the
+    count their times are uniform over the segment, so times, colors and speeds are each one vectorized
+    draw. The arrivals are then merged into one time-ordered list.
+
+    Args:
+        - profile (DemandProfile): The demand profile.
+        - key (list): Seed of the generators (each one adds its kind and direction to it).
+        - config (SimConfig): The simulation parameters (base rates, grid size, vehicle speed).
+        - start (float): Seconds into the profile of the first possible arrival.
+        - end (float): Seconds into the profile after which nothing is drawn.
+
+    Returns:
+        - list: The arrivals (Arrival), ordered by time.
+    """
+    arrivals = []
+    for kind, emergency in enumerate((False, True)):
+        base_rate = config.emergency_frequency_of_events if emergency else config.frequency_of_events
+        low, high = (0.7, 1.2) if emergency else (0.3, 0.7)
+        for d, direction in enumerate(DIRECTIONS):
+            rng = np.random.default_rng([*key, kind, d])
+            x, y = spawn_position(direction, config.grid_size)
+            period_start = start // profile.period * profile.period
+            while period_start < end:
+                for i, (segment_start, vehicle_shares, emergency_shares) in enumerate(profile.segments):
+                    segment_end = profile.segments[i + 1][0] if i + 1 < len(profile.segments) else profile.period
+                    segment_start = max(period_start + segment_start, start)
+                    segment_end = min(period_start + segment_end, end)
+                    rate = base_rate * (emergency_shares if emergency else vehicle_shares).get(direction, 0)
+                    if rate <= 0 or segment_start >= segment_end:
+                        continue
+                    count = rng.poisson(rate * (segment_end - segment_start))
+                    times = np.sort(rng.uniform(segment_start, segment_end, count)).tolist()
+                    speeds = (rng.uniform(low, high, count) * config.vehicle_base_speed).tolist()
+                    if emergency:
+                        colors = [(255, 255, 255)] * count
+                    else:
+                        colors = map(tuple, rng.integers(0, 256, (count, 3)).tolist())
+                    arrivals.extend(Arrival(time, emergency, x, y, direction, color, speed)
+                                    for time, color, speed in zip(times, colors, speeds))
+                period_start += profile.period
+    arrivals.sort(key=lambda arrival: arrival.time)
+    return arrivals
+
+
+def compile_schedule(profile, seed, config=DEFAULT_CONFIG, duration=None):
+    """
+    Compile a demand profile into an arrival schedule (see draw_arrivals). Arrivals past `duration` are
+    compiled a period at a time as the schedule reaches them.
+
+    Args:
+        - profile (DemandProfile): The demand profile.
+        - seed (int): Seed of the arrivals.
+        - config (SimConfig): The simulation parameters (base rates, grid size, vehicle speed).
+        - duration (float): Seconds to compile up front (one profile period by default).
+
+    Returns:
+        - ArrivalSchedule: The schedule.
+    """
+    duration = profile.period if duration is None else duration
+    return ArrivalSchedule(CompiledArrivals(profile, seed, config, duration))
@@ -0,0 +1,343 @@
+import csv
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from analytics import Analytics, KPI_NAMES, new_kpi_histograms
+from config import DEFAULT_CONFIG, ENSEMBLE_SAMPLE_INTERVAL, ENSEMBLE_MAX_VEHICLES
+from entities.vehicle import EmergencyVehicle
+from event_engine import EventDrivenSimulation
+from kernels import DIRECTION_CODES
+from simulation import SimulationModel
+
+# Per-sample metrics of each replicate ("collisions" counts the current phase only, as in the analysis)
+TRACE_FIELDS = ("sim_time", "erts_active", "collisions", "vehicles", "emergency_vehicles",
+                "queued_N", "queued_S", "queued_E", "queued_W")
+
+# Per-sample state of each vehicle on the grid (direction as a kernels.DIRECTION_CODES code, NaN for empty slots)
+VEHICLE_FIELDS = ("x", "y", "direction", "emergency", "queued")
+
+# Analytics counts of each replicate, per phase
+COUNT_FIELDS = ("no_erts_collision_count", "no_erts_car_count", "no_erts_emergency_count",
+                "erts_collision_count", "erts_car_count", "erts_emergency_count")
+
+# Totals of each KPI histogram, next to its bucket counts
+KPI_STAT_FIELDS = ("total", "sum", "min", "max")
+
+
+def ensemble_layout(replicates, samples, max_vehicles):
+    """
+    Get the shape and type of every shared array of an ensemble.
+
+    Args:
+        - replicates (int): Number of replicates.
+        - samples (int): Trace samples per replicate.
+        - max_vehicles (int): Vehicle states kept per sample.
+
+    Returns:
+        - dict: Array name -> (shape, dtype); the first axis of every array is the replicate.
+    """
+    buckets = max(len(histogram.counts) for histogram in new_kpi_histograms().values())
+    return {
+        "traces": ((replicates, samples, len(TRACE_FIELDS)), np.float64),
+        "vehicle_states": ((replicates, samples, max_vehicles, len(VEHICLE_FIELDS)), np.float64),
+        "counts": ((replicates, len(COUNT_FIELDS)), np.int64),
+        "kpi_counts": ((replicates, 2, len(KPI_NAMES), buckets), np.int64),
+        "kpi_stats": ((replicates, 2, len(KPI_NAMES), len(KPI_STAT_FIELDS)), np.float64),
+    }
+
+
+def attach_arrays(spec):
+    """
+    Attach to shared arrays allocated by another process.
+
+    Args:
+        - spec (dict): Array name -> (shared memory block name, shape, dtype string), from Ensemble.spec.
+
+    Returns:
+        - tuple: The SharedMemory blocks (close them once the arrays are dropped) and the arrays (name -> ndarray view).
+    """
+    blocks, arrays = [], {}
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)
+    return blocks, arrays
+
+
+def record_sample(simulation, trace, vehicle_states):
+    """
+    Write the current state of a simulation into one sample of a replicate's trace.
+
+    Args:
+        - simulation (SimulationModel): The simulation.
+        - trace (ndarray): The sample's row of metrics (TRACE_FIELDS).
+        - vehicle_states (ndarray): The sample's vehicle slots (max vehicles x VEHICLE_FIELDS).
+    """
+    queues = simulation.queue_lengths()
+    emergency_vehicles = sum(isinstance(vehicle, EmergencyVehicle) for vehicle in simulation.vehicles)
+    trace[:] = (simulation.sim_time, simulation.intersection_manager.four_way_active, simulation.collision_count,
+                len(simulation.vehicles), emergency_vehicles, queues["N"], queues["S"], queues["E"], queues["W"])
+
+    vehicle_states[:] = np.nan
+    for slot, vehicle in zip(range(len(vehicle_states)), simulation.vehicles):
+        emergency = isinstance(vehicle, EmergencyVehicle)
+        vehicle_states[slot] = (vehicle.x, vehicle.y, DIRECTION_CODES[vehicle.direction], emergency,
+                                (vehicle.stopped or vehicle.pulled_over) and not emergency)
+
+
+def run_replicate(config, seed, phase_duration, sample_interval, arrays, replicate):
+    """
+    Run one headless ERTS off/on analysis, writing its trace, counts and KPI histograms straight into the
+    ensemble's arrays.
+
+    The trace is sampled after every engine step that reaches a sample time (a step that passes several
+    fills them all with its state), without changing the steps, so the results are exactly those of
+    sweep.run_point for the same config and seed.
+
+    Args:
+        - config (SimConfig): The simulation parameters.
+        - seed (int): Seed for the random number generator.
+        - phase_duration (int): Seconds of simulated time per phase.
+        - sample_interval (float): Seconds of simulated time between trace samples.
+        - arrays (dict): The ensemble's arrays (shared memory views in worker processes), from ensemble_layout.
+        - replicate (int): Index of this replicate in the arrays.
+    """
+    traces, vehicle_states = arrays["traces"][replicate], arrays["vehicle_states"][replicate]
+    random.seed(seed)
+    simulation = SimulationModel(config)
+    simulation.begin_analysis(phase_duration)
+    next_sample = 0
+
+    def sample_and_check():
+        nonlocal next_sample
+        while next_sample < len(traces) and simulation.sim_time >= next_sample * sample_interval:
+            record_sample(simulation, traces[next_sample], vehicle_states[next_sample])
+            next_sample += 1
+        return not simulation.analysis_mode
+
+    sample_and_check()
+    EventDrivenSimulation(simulation).run(stop=sample_and_check)
+    analytics = simulation.analytics
+
+    arrays["counts"][replicate] = [getattr(analytics, name) for name in COUNT_FIELDS]
+    for phase, kpis in enumerate((analytics.no_erts_kpis, analytics.erts_kpis)):
+        for k, name in enumerate(KPI_NAMES):
+            histogram = kpis[name]
+            arrays["kpi_counts"][replicate, phase, k, :len(histogram.counts)] = histogram.counts
+            arrays["kpi_stats"][replicate, phase, k] = (histogram.total, histogram.sum, histogram.min, histogram.max)
+
+
+def _run_replicate(task):
+    spec, replicate, config, seed, phase_duration, sample_interval = task
+    blocks, arrays = attach_arrays(spec)
+    try:
+        run_replicate(config, seed, phase_duration, sample_interval, arrays, replicate)
+    finally:
+        arrays.clear()      # Drop the views before closing the blocks they point into
+        for block in blocks:
+            block.close()
+    return replicate
+
+
+class Ensemble:
+    """
+    Replicates of one config, run across worker processes that write their results into shared memory.
+
+    The coordinator allocates one `multiprocessing.shared_memory` block per array (see ensemble_layout)
+    and hands the workers only the block names. Each worker attaches, runs its replicates and writes
+    per-sample traces, vehicle states, counts and KPI histogram buckets into its own rows, so nothing
+    is pickled back but the replicate index. The reducers below read the arrays as NumPy views in place.
+
+    Use it as a context manager, or call `close` when done: the blocks outlive the processes until they
+    are unlinked.
+
+    Attributes:
+        - config (SimConfig): The simulation parameters
+        - seeds (list): Seed of each replicate
+        - phase_duration (int): Seconds of simulated time per phase
+        - sample_interval (float): Seconds of simulated time between trace samples
+        - samples (int): Trace samples per replicate (the last one at the end of the analysis)
+        - blocks (dict): Array name -> SharedMemory block
+        - arrays (dict): Array name -> ndarray view of its block
+
+    Methods:
+        - spec: Get what a worker needs to attach to the arrays
+        - run: Run every replicate
+        - analytics: Reduce the counts and KPI histograms of some or all replicates into one Analytics
+        - trace: Get one trace field of every replicate
+        - trace_band: Get the mean and a percentile band of one trace field across replicates
+        - write_traces: Write the mean and band of every trace field to CSV
+        - close: Drop the views and free the shared memory
+    """
+    def __init__(self, config=DEFAULT_CONFIG, seeds=(0,), phase_duration=300, sample_interval=ENSEMBLE_SAMPLE_INTERVAL,
+                 max_vehicles=ENSEMBLE_MAX_VEHICLES):
+        self.config = config
+        self.seeds = list(seeds)
+        self.phase_duration = phase_duration
+        self.sample_interval = sample_interval
+        self.samples = math.floor(phase_duration * 2 / sample_interval) + 1
+        self.blocks = {}
+        self.arrays = {}
+        try:
+            for name, (shape, dtype) in ensemble_layout(len(self.seeds), self.samples, max_vehicles).items():
+                block = shared_memory.SharedMemory(create=True, size=max(1, math.prod(shape) * np.dtype(dtype).itemsize))
+                self.blocks[name] = block
+                self.arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)
+        except BaseException:
+            self.close()    # Unlink the blocks already created, which would otherwise outlive the process
+            raise
+        self.arrays["traces"].fill(np.nan)      # Samples after the end of a run stay NaN
+        self.arrays["vehicle_states"].fill(np.nan)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def spec(self):
+        """
+        Returns:
+            - dict: Array name -> (shared memory block name, shape, dtype string), for attach_arrays.
+        """
+        return {name: (self.blocks[name].name, array.shape, array.dtype.str) for name, array in self.arrays.items()}
+
+    def run(self, workers=None):
+        """
+        Run every replicate, each writing into its rows of the shared arrays.
+
+        Args:
+            - workers (int): Number of worker processes (None for one per CPU, 1 to run in this process).
+
+        Returns:
+            - Ensemble: self, for chaining.
+        """
+        if workers == 1:
+            for replicate, seed in enumerate(self.seeds):
+                run_replicate(self.config, seed, self.phase_duration, self.sample_interval, self.arrays, replicate)
+            return self
+
+        spec = self.spec()
+        tasks = [(spec, replicate, self.config, seed, self.phase_duration, self.sample_interval)
+                 for replicate, seed in enumerate(self.seeds)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_run_replicate, tasks))
+        return self
+
+    def analytics(self, replicates=None):
+        """
+        Reduce the counts and KPI histograms of some or all replicates into one finalized Analytics,
+        summing them straight from the shared arrays (pooled: rates are over the combined counts).
+
+        Args:
+            - replicates (list): Indices of the replicates to reduce (None for all of them).
+
+        Returns:
+            - Analytics: The pooled analytics.
+
+        Raises:
+            - ValueError: If no replicates are selected.
+        """
+        rows = slice(None) if replicates is None else list(replicates)
+        if len(self.arrays["counts"][rows]) == 0:
+            raise ValueError("no replicates to reduce")
+        analytics = Analytics()
+        analytics.phase_duration = self.phase_duration
+        for name, total in zip(COUNT_FIELDS, self.arrays["counts"][rows].sum(axis=0).tolist()):
+            setattr(analytics, name, total)
+
+        for phase, kpis in enumerate((analytics.no_erts_kpis, analytics.erts_kpis)):
+            for k, name in enumerate(KPI_NAMES):
+                histogram = kpis[name]
+                histogram.counts = self.arrays["kpi_counts"][rows, phase, k, :len(histogram.counts)].sum(axis=0).tolist()
+                stats = self.arrays["kpi_stats"][rows, phase, k]
+                histogram.total = int(stats[:, 0].sum())
+                histogram.sum = float(stats[:, 1].sum())
+                histogram.min = float(stats[:, 2].min())
+                histogram.max = float(stats[:, 3].max())
+        analytics.finalize_analysis(export=False)
+        return analytics
+
+    def trace(self, field):
+        """
+        Get one trace field of every replicate.
+
+        Args:
+            - field (str): One of TRACE_FIELDS.
+
+        Returns:
+            - ndarray: View of shape (replicates, samples) into the shared traces (NaN past the end of a run).
+        """
+        return self.arrays["traces"][:, :, TRACE_FIELDS.index(field)]
+
+    def trace_band(self, field, low=5, high=95):
+        """
+        Get the mean and a percentile band of one trace field across replicates, per sample.
+
+        Args:
+            - field (str): One of TRACE_FIELDS.
+            - low (float): Percentile of the lower edge of the band.
+            - high (float): Percentile of the upper edge of the band.
+
+        Returns:
+            - tuple: (sample times, mean, low percentile, high percentile), one value per sample.
+        """
+        values = self.trace(field)
+        times = np.arange(self.samples) * self.sample_interval
+        return times, np.nanmean(values, axis=0), np.nanpercentile(values, low, axis=0), np.nanpercentile(values, high, axis=0)
+
+    def write_traces(self, path, low=5, high=95):
+        """
+        Write the mean and percentile band of every trace field across replicates to CSV, one row per sample.
+
+        Args:
+            - path (str): The CSV file to write.
+            - low (float): Percentile of the lower edge of the band.
+            - high (float): Percentile of the upper edge of the band.
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        columns = {}
+        for field in TRACE_FIELDS[1:]:
+            times, mean, lower, upper = self.trace_band(field, low, high)
+            columns.update({f"{field}_mean": mean, f"{field}_p{low}": lower, f"{field}_p{high}": upper})
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["sim_time", *columns])
+            writer.writerows(zip(times.tolist(), *(column.tolist() for column in columns.values())))
+
+    def close(self):
+        """
+        Drop the views and free the shared memory (the arrays can't be used afterwards).
+        """
+        self.arrays.clear()
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks.clear()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run replicates of an ERTS off/on analysis into shared memory.")
+    parser.add_argument("--seeds", type=int, nargs="+", default=list(range(8)), help="seed of each replicate")
+    parser.add_argument("--phase", type=int, default=300, help="seconds of simulated time per phase")
+    parser.add_argument("--interval", type=float, default=ENSEMBLE_SAMPLE_INTERVAL, help="seconds between trace samples")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", help="write the mean and 5-95%% band of every trace field to this CSV file")
+    args = parser.parse_args()
+
+    with Ensemble(seeds=args.seeds, phase_duration=args.phase, sample_interval=args.interval) as ensemble:
+        ensemble.run(args.workers)
+        if args.out:
+            ensemble.write_traces(args.out)
+            print(f"Wrote {ensemble.samples} samples to {args.out}")
+        print(ensemble.analytics())
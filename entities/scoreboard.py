@@ -1,5 +1,7 @@
 import pygame as pg
 from config import TILE_SIZE, WIDTH, HEIGHT
+from resources import get_font, get_image
+from helpers import wait_for_events, needs_redraw
 
 class Scoreboard:
     """
@@ -16,16 +18,23 @@ class Scoreboard:
         - analysis_start_time (int): The time at which the analysis started
         
     Methods:
+        - reset: Reset the scoreboard to its initial state
         - update_collision_count: Update the collision count with the latest data
         - get_time_elapsed: Get the time elapsed since the simulation started
         - draw: Draw the scoreboard on the screen
         - display_analysis_results: Display the analysis results on the screen
     """
     def __init__(self):
-        self.big_font = pg.font.Font(None, 32)
-        self.font = pg.font.Font(None, 24)  
-        self.small_font = pg.font.Font(None, 20)
-        self.tiny_font = pg.font.Font(None, 16)
+        self.big_font = get_font(32)
+        self.font = get_font(24)  
+        self.small_font = get_font(20)
+        self.tiny_font = get_font(16)
+        self.reset()
+
+    def reset(self):
+        """
+        Reset the scoreboard to its initial state (restarting the timer).
+        """
         self.start_time = pg.time.get_ticks()
         self.collision_count = 0
         self.clearpath_enabled = False
@@ -149,8 +158,7 @@ class Logo:
         - draw: Draw the ClearPath logo on the screen
     """
     def __init__(self):
-        self.logo = pg.image.load('assets/clearpath-logo-sign.png')
-        self.logo = pg.transform.scale(self.logo, (8 * TILE_SIZE, 2.5 * TILE_SIZE))
+        self.logo = get_image('assets/clearpath-logo-sign.png', (8 * TILE_SIZE, 2.5 * TILE_SIZE))
 
     def draw(self, win):
         win.blit(self.logo, (1 * TILE_SIZE, 2 * TILE_SIZE))
@@ -168,10 +176,8 @@ class ERTSLogo:
         - draw: Draw the ERTS logo on the screen
     """
     def __init__(self):
-        self.logo_active = pg.image.load('assets/ERTS-active.png')
-        self.logo_inactive = pg.image.load('assets/ERTS-inactive.png')
-        self.logo_active = pg.transform.scale(self.logo_active, (8 * TILE_SIZE, 2.5 * TILE_SIZE))
-        self.logo_inactive = pg.transform.scale(self.logo_inactive, (8 * TILE_SIZE, 2.5 * TILE_SIZE))
+        self.logo_active = get_image('assets/ERTS-active.png', (8 * TILE_SIZE, 2.5 * TILE_SIZE))
+        self.logo_inactive = get_image('assets/ERTS-inactive.png', (8 * TILE_SIZE, 2.5 * TILE_SIZE))
 
     def draw(self, win, erts_active):
         if erts_active:
@@ -196,12 +202,22 @@ class AnalysisDisplay:
         - analytics (Analytics): The analytics object containing the results to display
 
     Methods:
+        - reset: Reset the display and attach it to a (new) analytics object
         - update: Update the analysis display with the latest data
         - draw: Draw the analysis display on the screen
     """
     def __init__(self, analytics):
-        self.font = pg.font.Font(None, 26)
-        self.big_font = pg.font.Font(None, 32)
+        self.font = get_font(26)
+        self.big_font = get_font(32)
+        self.reset(analytics)
+
+    def reset(self, analytics):
+        """
+        Reset the display and attach it to a (new) analytics object.
+
+        Args:
+            - analytics (Analytics): The analytics object containing the results to display.
+        """
         self.analysis_timer = 0
         self.erts_disabled_collision_count = 0
         self.erts_enabled_collision_count = 0
@@ -260,56 +276,86 @@ class AnalysisSettings:
         - big_font (Font): Font object for large text
         - analysis_time (int): The time to run the analysis for
         - export_results (bool): Whether or not to export the results to a file
+        - paired (bool): Whether to replay the same traffic in both phases
 
     Methods:
+        - reset: Reset the settings to their defaults
+        - draw: Draw the settings screen
         - get_analysis_settings: Get user input for analysis settings before running the analysis
     """
 
     def __init__(self):
-        self.small_font = pg.font.Font(None, 20)
-        self.font = pg.font.Font(None, 26)
-        self.big_font = pg.font.Font(None, 32)
+        self.small_font = get_font(20)
+        self.font = get_font(26)
+        self.big_font = get_font(32)
+        self.reset()
+
+    def reset(self):
+        """
+        Reset the settings to their defaults.
+        """
         self.analysis_time = 300
         self.export_results = True
+        self.paired = False
+
+    def draw(self, win):
+        """
+        Draw the settings screen.
+
+        Args:
+            - win (Surface): The pygame window to draw on.
+        """
+        win.fill((0, 0, 0))
+        analysis_text = self.big_font.render("Analysis Settings", True, (255, 255, 255))
+        analysis_time_text = self.font.render(f"Analysis Time: {self.analysis_time} seconds", True, (255, 255, 255))
+        analysis_time_instructions = self.font.render("Use arrow keys to adjust analysis time.", True, (150, 150, 150)) 
+        analysis_time_instructions_2 = self.small_font.render(f"**Time per phase (total runtime: {self.analysis_time * 2})", True, (150, 150, 150))
+        export_text = self.font.render(f"Export Results: {self.export_results}", True, (255, 255, 255))
+        export_instructions = self.font.render("Press 'e' to toggle export results", True, (150, 150, 150))
+        export_instructions_2 = self.small_font.render("**Results will be saved to 'exports/analytics-<DATETIME>.json", True, (150, 150, 150))
+        paired_text = self.font.render(f"Paired Phases: {self.paired}", True, (255, 255, 255))
+        paired_instructions = self.font.render("Press 'p' to toggle paired phases", True, (150, 150, 150))
+        paired_instructions_2 = self.small_font.render("**Both phases replay the same traffic from an empty grid", True, (150, 150, 150))
+        reset_text = self.font.render("Press 'a' to reset settings", True, (255, 255, 255))
+        start_text = self.font.render("Press 's' or 'Enter' to start analysis", True, (255, 255, 255))
+        cancel_text = self.font.render("Press 'esc' return to base sim", True, (255, 255, 255))
+        win.blit(analysis_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 10))
+        win.blit(analysis_time_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 11))
+        win.blit(analysis_time_instructions, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 11.5))
+        win.blit(analysis_time_instructions_2, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 12))
+        win.blit(export_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 13))
+        win.blit(export_instructions, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 13.5))
+        win.blit(export_instructions_2, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 14))
+        win.blit(paired_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 15))
+        win.blit(paired_instructions, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 15.5))
+        win.blit(paired_instructions_2, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 16))
+        win.blit(reset_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 17))
+        win.blit(start_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 18))
+        win.blit(cancel_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 19))
 
     def get_analysis_settings(self, win):
         """
         Get user input for analysis settings before running the analysis.
+
+        The screen waits for input rather than polling for it, and is only redrawn after a key press
+        (or when the window is uncovered).
         
         Args:
             - win (Surface): The pygame window to draw on.
             
         Returns:
-            - tuple: A tuple containing the analysis time and export results settings
+            - bool: True to start the analysis, False if cancelled (None if the window was closed)
         """
-        running = True
-        while running:
-            win.fill((0, 0, 0))
-            analysis_text = self.big_font.render("Analysis Settings", True, (255, 255, 255))
-            analysis_time_text = self.font.render(f"Analysis Time: {self.analysis_time} seconds", True, (255, 255, 255))
-            analysis_time_instructions = self.font.render("Use arrow keys to adjust analysis time.", True, (150, 150, 150)) 
-            analysis_time_instructions_2 = self.small_font.render(f"**Time per phase (total runtime: {self.analysis_time * 2})", True, (150, 150, 150))
-            export_text = self.font.render(f"Export Results: {self.export_results}", True, (255, 255, 255))
-            export_instructions = self.font.render("Press 'e' to toggle export results", True, (150, 150, 150))
-            export_instructions_2 = self.small_font.render("**Results will be saved to 'exports/analytics-<DATETIME>.json", True, (150, 150, 150))
-            reset_text = self.font.render("Press 'a' to reset settings", True, (255, 255, 255))
-            start_text = self.font.render("Press 's' or 'Enter' to start analysis", True, (255, 255, 255))
-            cancel_text = self.font.render("Press 'esc' return to base sim", True, (255, 255, 255))
-            win.blit(analysis_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 10))
-            win.blit(analysis_time_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 11))
-            win.blit(analysis_time_instructions, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 11.5))
-            win.blit(analysis_time_instructions_2, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 12))
-            win.blit(export_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 13))
-            win.blit(export_instructions, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 13.5))
-            win.blit(export_instructions_2, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 14))
-            win.blit(reset_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 15))
-            win.blit(start_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 16))
-            win.blit(cancel_text, (WIDTH // 2 - 4 * TILE_SIZE, TILE_SIZE * 17))
-            pg.display.flip()
-
-            for event in pg.event.get():
+        redraw = True
+        while True:
+            if redraw:
+                self.draw(win)
+                pg.display.flip()
+
+            events = wait_for_events()
+            redraw = needs_redraw(events)
+            for event in events:
                 if event.type == pg.QUIT:
-                    running = False
                     return None
                 if event.type == pg.KEYDOWN:
                     if event.key == pg.K_UP:
@@ -322,18 +368,16 @@ class AnalysisSettings:
                         self.analysis_time += 5
                     if event.key == pg.K_e:
                         self.export_results = not self.export_results
+                    if event.key == pg.K_p:
+                        self.paired = not self.paired
                     if event.key == pg.K_a:
-                        self.analysis_time = 300
-                        self.export_results = True
+                        self.reset()
                     if event.key == pg.K_ESCAPE or event.key == pg.K_q:
-                        running = False
                         return False
                     if event.key == pg.K_s or event.key == pg.K_RETURN:
-                        running = False
                         return True
                 if self.analysis_time < 30:
                     self.analysis_time = 30
                 if self.analysis_time > 43200:
                     self.analysis_time = 43200
-        return True
     
\ No newline at end of file
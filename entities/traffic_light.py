@@ -1,6 +1,4 @@
-import pygame as pg 
-
-from config import RED_LIGHT, YELLOW_LIGHT, GREEN_LIGHT, OFF_LIGHT, RED_LIGHT_DURATION, YELLOW_LIGHT_DURATION, GREEN_LIGHT_DURATION, TILE_SIZE, CROSSWALK_TILES
+from config import RED_LIGHT, YELLOW_LIGHT, GREEN_LIGHT, OFF_LIGHT, TILE_SIZE, CROSSWALK_TILES, DEFAULT_CONFIG
 
 
 class TrafficLight:
@@ -11,57 +9,74 @@ class TrafficLight:
         - x (int): x-coordinate of the traffic light
         - y (int): y-coordinate of the traffic light
         - state (str): Current state of the traffic light (RED, YELLOW, GREEN)
+        - initial_state (str): State the traffic light starts in (and returns to on reset)
         - active_color (tuple): RGB color of the active light
-        - timer (int): Timer to keep track of how long the light has been in its current state
-        - yellow_timer (int): Timer to keep track of how long the light has been in the yellow state
-        - blinking_red_timer (int): Timer to keep track of how long the light has been in the blinking red state
+        - timer (float): Seconds the light has been in its current state
+        - yellow_timer (float): Seconds the light has been in the yellow state
+        - blinking_red_timer (float): Seconds the light has been in the blinking red state
+        - config (SimConfig): The simulation parameters (light durations)
 
     Methods:
+        - reset: Return the traffic light to its initial state
         - update: Update the state of the traffic light based on the timer
+        - get_display_color: Get the color the traffic light currently shows
         - draw: Draw the traffic light on the screen
         - get_yellow_duration: Get the duration of the yellow light in seconds
     """
-    def __init__(self, x, y, state='RED'):
+    def __init__(self, x, y, state='RED', config=DEFAULT_CONFIG):
         self.x = x
         self.y = y
-        self.state = state
+        self.initial_state = state
+        self.config = config
+        self.reset()
+
+    def reset(self):
+        """
+        Return the traffic light to its initial state with all timers cleared.
+        """
+        self.state = self.initial_state
         self.active_color = RED_LIGHT
         self.timer = 0
         self.yellow_timer = 0
         self.blinking_red_timer = 0
 
-    def update(self):
+    def update(self, dt):
         """
         Update the state of the traffic light based on the timer
+
+        Args:
+            - dt (float): Seconds of simulated time since the last update
         
         Modifies:
             - state (str): Current state of the traffic light (RED, YELLOW, GREEN)
         """
-        self.timer += 1
+        self.timer += dt
         if self.state == 'YELLOW':
-            self.yellow_timer += 1
+            self.yellow_timer += dt
         else:
             self.yellow_timer = 0
 
-        if self.state == 'GREEN' and self.timer >= GREEN_LIGHT_DURATION * 60:
+        # Carry any overshoot into the next state so light cycles don't drift with large steps
+        config = self.config
+        if self.state == 'GREEN' and self.timer >= config.green_light_duration:
             self.state = 'YELLOW'
-            self.timer = 0
-        elif self.state == 'YELLOW' and self.timer >= YELLOW_LIGHT_DURATION * 60:
+            self.timer -= config.green_light_duration
+        elif self.state == 'YELLOW' and self.timer >= config.yellow_light_duration:
             self.state = 'RED'
-            self.timer = 0
-        elif self.state == 'RED' and self.timer >= RED_LIGHT_DURATION * 60:
+            self.timer -= config.yellow_light_duration
+        elif self.state == 'RED' and self.timer >= config.red_light_duration:
             self.state = 'GREEN'
-            self.timer = 0
+            self.timer -= config.red_light_duration
         elif self.state == '4_WAY_RED':
-            self.blinking_red_timer += 1
+            self.blinking_red_timer += dt
             self.timer = 0
 
-    def draw(self, win):
+    def get_display_color(self):
         """
-        Draw the traffic light on the screen
+        Get the color the traffic light currently shows (including the blinking 4-way red).
 
-        Args:
-            - win (pygame.Surface): The window to draw the traffic light on
+        Returns:
+            - tuple: RGB color of the light
         """
         if self.state == 'RED':
             color = RED_LIGHT
@@ -76,12 +91,24 @@ class TrafficLight:
                 color = OFF_LIGHT
 
             # Alternate between red and off every 0.5 seconds
-            if self.blinking_red_timer % 30 < 15:
+            if self.blinking_red_timer % 0.5 < 0.25:
                 if color == RED_LIGHT:
                     color = OFF_LIGHT
                 else:
                     color = RED_LIGHT
 
+        return color
+
+    def draw(self, win):
+        """
+        Draw the traffic light on the screen
+
+        Args:
+            - win (pygame.Surface): The window to draw the traffic light on
+        """
+        import pygame as pg
+
+        color = self.get_display_color()
         self.active_color = color
         pg.draw.rect(win, color, (self.y * TILE_SIZE, self.x * TILE_SIZE, TILE_SIZE, TILE_SIZE))
 
@@ -90,7 +117,7 @@ class TrafficLight:
         Returns:
             - float: Duration of the yellow light in seconds
         """
-        return self.yellow_timer / 60
+        return self.yellow_timer
 
 
 class IntersectionManager:
@@ -98,46 +125,58 @@ class IntersectionManager:
     Class to manage the state of the intersection
     
     Attributes:
-        - grid (list): 2D list representing the city grid
+        - city (CityGrid): The city grid whose crosswalk signal layer the manager writes
         - ew_traffic_lights (list): List of traffic lights on the east-west road
         - ns_traffic_lights (list): List of traffic lights on the north-south road
         - traffic_lights (list): List of all traffic lights 
         - four_way_active (bool): Flag to indicate if the intersection is in a 4-way stop state
         - vehicles_at_intersection (list): List of vehicles currently at the intersection
-        - buffer_delay (int): Delay to prevent vehicles from immediately proceeding after a 4-way stop
+        - buffer_delay (float): Seconds to wait before the next vehicle may proceed through a 4-way stop
+        - config (SimConfig): The simulation parameters (4-way stop timing)
     
     Methods:
+        - reset: Return the intersection to normal operation with no waiting vehicles
         - update_intersection: Update the state of the intersection based on the traffic light state
         - mark_crosswalks_occupied: Mark the crosswalks as occupied when the light is red or yellow
         - mark_crosswalks_clear: Mark the crosswalks as clear when the light is green
         - get_crosswalks_for_light: Get the crosswalks associated with a given traffic light
     """
-    def __init__(self, grid, ew_traffic_lights, ns_traffic_lights):
-        self.grid = grid
+    def __init__(self, city, ew_traffic_lights, ns_traffic_lights, config=DEFAULT_CONFIG):
+        self.city = city
         self.ew_traffic_lights = ew_traffic_lights
         self.ns_traffic_lights = ns_traffic_lights
         self.traffic_lights = self.ew_traffic_lights + self.ns_traffic_lights
+        self.config = config
+        self.reset()
+
+    def reset(self):
+        """
+        Return the intersection to normal operation with no waiting vehicles (the lights are reset separately).
+        """
         self.four_way_active = False
         self.vehicles_at_intersection = []
-        self.buffer_delay = 30
+        self.buffer_delay = self.config.four_way_initial_delay
 
-    def update_intersection(self):
+    def update_intersection(self, dt=0):
         """
         Update the state of the intersection based on the traffic light state
         
             - Mark the crosswalks as occupied when the light is red or yellow
             - Mark the crosswalks as clear when the light is green
+
+        Args:
+            - dt (float): Seconds of simulated time since the last update (0 when refreshing after a mode change)
             
         Returns:
             None
         """
         if self.four_way_active:
-            self.manage_four_way_stop()
+            self.manage_four_way_stop(dt)
         else:
             # Mark crosswalks as occupied or clear based on the light state 
             for light in self.traffic_lights:
                 # Yellow light is considered red if it's been active for more than 0.8 seconds
-                if light.state == 'RED' or (light.state == 'YELLOW' and light.get_yellow_duration() > 0.8):
+                if light.state == 'RED' or (light.state == 'YELLOW' and light.get_yellow_duration() > self.config.yellow_as_red_after):
                     self.mark_crosswalks_occupied(light)
                 else:
                     self.mark_crosswalks_clear(light)
@@ -154,7 +193,7 @@ class IntersectionManager:
         """
         crosswalks = self.get_crosswalks_for_light(light)
         for tile in crosswalks:
-            self.grid[tile[1]][tile[0]] = 'red_light'
+            self.city.set_signal(tile[1], tile[0], 'red_light')
 
     def mark_crosswalks_clear(self, light):
         """
@@ -168,7 +207,7 @@ class IntersectionManager:
         """
         crosswalks = self.get_crosswalks_for_light(light)
         for tile in crosswalks:
-            self.grid[tile[1]][tile[0]] = 'green_light'
+            self.city.set_signal(tile[1], tile[0], 'green_light')
 
     def get_crosswalks_for_light(self, light):
         """
@@ -217,7 +256,7 @@ class IntersectionManager:
 
         Modifies:
             - traffic_lights: Set all traffic lights to '4_WAY_RED' state
-            - grid: Mark all crosswalk tiles as '4_way
+            - city: Mark all crosswalk tiles as '4_way_red' in the signal layer
         """
         for light in self.traffic_lights:
             light.state = '4_WAY_RED'
@@ -227,7 +266,7 @@ class IntersectionManager:
         crosswalks = CROSSWALK_TILES['EW'] + CROSSWALK_TILES['NS']
         for tile in crosswalks:
             # Mark all crosswalk tiles as '4_way_stop'
-            self.grid[tile[0]][tile[1]] = '4_way_red'
+            self.city.set_signal(tile[0], tile[1], '4_way_red')
 
         self.four_way_active = True
         self.update_intersection()
@@ -253,24 +292,27 @@ class IntersectionManager:
 
         self.update_intersection()
 
-    def manage_four_way_stop(self):
+    def manage_four_way_stop(self, dt):
         """
         Manage the 4-way stop state of the intersection
         
         - Vehicles must wait for all other vehicles to clear the intersection before proceeding
+
+        Args:
+            - dt (float): Seconds of simulated time since the last update
         
         Modifies:
             - vehicles_at_intersection: Remove vehicles that have cleared the intersection
             - buffer_delay: Delay to prevent vehicles from immediately proceeding after a 4-way stop
         """
-        self.buffer_delay = max(0, self.buffer_delay - 1)
+        self.buffer_delay = max(0, self.buffer_delay - dt)
         self.vehicles_at_intersection = [v for v in self.vehicles_at_intersection if v.four_way_state == "waiting"]
         if self.vehicles_at_intersection:
             # Determine which vehicle has been waiting the longest
             first_vehicle = max(self.vehicles_at_intersection, key=lambda v: v.four_way_timer)
-            if first_vehicle.four_way_timer >= 120 and self.buffer_delay == 0:
+            if first_vehicle.four_way_timer >= self.config.four_way_stop_wait and self.buffer_delay == 0:
                 if first_vehicle.look_both_ways():
                     first_vehicle.four_way_state = "proceeding"
-                    self.buffer_delay = 90
+                    self.buffer_delay = self.config.four_way_buffer_delay
                 else:
                     first_vehicle.four_way_state = "waiting"
\ No newline at end of file
@@ -1,7 +1,17 @@
+import itertools
 import random
-import pygame as pg
 
-from config import VEHICLE_BASE_SPEED, GRID_SIZE, TILE_SIZE, WIDTH, HEIGHT
+from config import DEFAULT_CONFIG, GRID_SIZE, TILE_SIZE, WIDTH, HEIGHT, EV_FLASH_INTERVAL, CONFLICT_ZONE
+
+
+# Monotonic source of vehicle IDs, never reused within a process
+_vehicle_ids = itertools.count()
+
+# Unit (x, y) step for each direction of travel
+DIRECTION_STEPS = {"N": (0, -1), "S": (0, 1), "E": (1, 0), "W": (-1, 0)}
+
+# Tile states that make a vehicle stop when they appear in its look-ahead
+BLOCKING_TILES = ('occupied', 'red_light', '4_way_red')
 
 
 class Vehicle:
@@ -9,35 +19,46 @@ class Vehicle:
     A class to represent a vehicle in the simulation.
     
     Attributes:
+        - id (int): Unique, monotonically increasing ID of the vehicle
         - x (float): The x-coordinate of the vehicle
         - y (float): The y-coordinate of the vehicle
+        - start_x (float): The x-coordinate at the start of the current tick (used for swept collision checks)
+        - start_y (float): The y-coordinate at the start of the current tick (used for swept collision checks)
         - direction (str): The direction the vehicle is traveling (N, S, E, W)
         - color (tuple): The color of the vehicle
-        - speed (float): The speed of the vehicle
+        - speed (float): The speed of the vehicle in tiles per second
         - city (CityGrid): The city grid the vehicle is traveling on
-        - grid (list): The grid of the city
+        - config (SimConfig): The simulation parameters
         - stopped (bool): Whether the vehicle is stopped
         - pulled_over (bool): Whether the vehicle has pulled over for an emergency vehicle
         - at_red_light (bool): Whether the vehicle is at a red light
         - in_intersection (bool): Whether the vehicle is within the intersection
-        - four_way_timer (int): Timer for the 4-way stop
+        - four_way_timer (float): Seconds spent waiting at the 4-way stop
         - four_way_state (str): State of the 4-way stop
-        - wait_time (int): Time the vehicle has been waiting at a red light
+        - wait_time (float): Seconds the vehicle has been stopped in traffic (at a red light, a 4-way stop or behind another vehicle)
+        - free_flow_until (float): Simulation time until which the vehicle is guaranteed an unobstructed path
     
     Methods:
         - move: Move the vehicle in the direction it is traveling
+        - advance_free_flow: Move the vehicle without any checks while it is in free flow
+        - get_free_flow_horizon: Work out how long the vehicle can move before anything could stop it
         - check_ahead: Check if the next tile is occupied or if the vehicle should stop
+        - check_behind: Pull over for, or merge back in after, emergency vehicles in range
+        - is_emergency_vehicle_nearby: Check whether any emergency vehicle is in range
         - draw: Draw the vehicle on the screen
         - is_off_screen: Check if the vehicle is off the screen
     """
-    def __init__(self, x, y, direction, city, color=(255,255,255)):
+    def __init__(self, x, y, direction, city, color=(255,255,255), config=DEFAULT_CONFIG, speed=None):
+        self.id = next(_vehicle_ids)
         self.x = x
         self.y = y
+        self.start_x = x
+        self.start_y = y
         self.direction = direction
         self.color = color
-        self.speed = random.uniform(0.3, 0.7) * VEHICLE_BASE_SPEED
+        self.config = config
+        self.speed = speed if speed is not None else random.uniform(0.3, 0.7) * config.vehicle_base_speed
         self.city = city
-        self.grid = city.grid
         self.stopped = False
         self.pulled_over = False
         self.at_red_light = False
@@ -45,14 +66,18 @@ class Vehicle:
         self.four_way_timer = 0  
         self.four_way_state = "approaching"  
         self.wait_time = 0  
+        self.free_flow_until = 0
 
-    def move(self):
+    def move(self, dt):
         """
         Move the vehicle based on its direction and speed, updating its position on the grid.
 
         This method checks the traffic light ahead to determine if the vehicle should stop.
-        If movement is allowed, it updates the vehicle's position, marks the grid, and checks
-        if the vehicle is within an intersection.
+        If movement is allowed, it updates the vehicle's position and checks if the vehicle is within
+        an intersection. (The simulation marks occupied tiles once all vehicles have moved.)
+
+        Args:
+            - dt (float): Seconds of simulated time since the last update.
 
         Updates:
             - `self.stopped`: Whether the vehicle is stopped.
@@ -61,35 +86,122 @@ class Vehicle:
         Returns:
             None
         """
+        # Remember where this tick's movement starts, so collisions can be swept along the path
+        self.start_x, self.start_y = self.x, self.y
+
         # Check if the vehicle is pulled over for emergency vehicle
         if self.pulled_over:
             return
 
         # Check ahead for occupied tiles or red lights
-        if self.check_ahead():
+        if self.check_ahead(dt):
             self.stopped = True
+            self.wait_time += dt
             return
         else:
             self.stopped = False      
 
-        # Save the previous position
-        prev_x, prev_y = int(self.x), int(self.y)
-
         # Move the vehicle based on its direction and speed
+        distance = self.speed * dt
         if self.direction == 'N':
-            self.y -= self.speed
+            self.y -= distance
         elif self.direction == 'S':
-            self.y += self.speed
+            self.y += distance
         elif self.direction == 'E':
-            self.x += self.speed
+            self.x += distance
         elif self.direction == 'W':
-            self.x -= self.speed
+            self.x -= distance
 
-        # Update the grid to reflect the new position and check if the vehicle is in the intersection
-        current_x, current_y = int(self.x), int(self.y)
-        self.update_vehicle_grid_positions(prev_x, prev_y, current_x, current_y)
+        # Check if the vehicle is in the intersection
         self.in_intersection = self.check_if_in_intersection()
 
+    def advance_free_flow(self, dt):
+        """
+        Move the vehicle at full speed without checking ahead or behind.
+
+        Only valid while the simulation time is before `free_flow_until`, when nothing on the
+        vehicle's path can make it stop.
+
+        Args:
+            - dt (float): Seconds of simulated time since the last update.
+        """
+        self.start_x, self.start_y = self.x, self.y
+
+        step_x, step_y = DIRECTION_STEPS[self.direction]
+        distance = self.speed * dt
+        self.x += step_x * distance
+        self.y += step_y * distance
+
+    def get_free_flow_horizon(self, vehicles):
+        """
+        Work out how long the vehicle can keep moving at full speed before anything could make it stop.
+
+        Scans the lane ahead for the first blocking tile (a vehicle, a light, or the conflict zone around
+        the intersection) and checks when emergency vehicles in the same lane will come into range.
+
+        Args:
+            - vehicles (list): List of vehicles in the simulation.
+
+        Returns:
+            - float: Seconds of guaranteed free flow, 0 if the vehicle is queued or near the intersection.
+        """
+        if self.pulled_over or self.stopped or self.in_intersection or self.four_way_state != "approaching":
+            return 0
+
+        step_x, step_y = DIRECTION_STEPS[self.direction]
+        tile_x, tile_y = int(self.x), int(self.y)
+        zone_min, zone_max = CONFLICT_ZONE
+        if zone_min <= tile_x < zone_max and zone_min <= tile_y < zone_max:
+            return 0
+
+        # Distance already covered within the current tile, measured along the direction of travel
+        offset = (self.x - tile_x) * step_x + (self.y - tile_y) * step_y
+        covered = offset if offset >= 0 else 1 + offset
+        if step_x + step_y < 0 and offset == 0:
+            covered = 1
+
+        # Find the first tile ahead that check_ahead would stop for
+        first_blocker = None
+        tiles_ahead = 1
+        while 0 <= tile_x + step_x * tiles_ahead < self.config.grid_size and 0 <= tile_y + step_y * tiles_ahead < self.config.grid_size:
+            next_x, next_y = tile_x + step_x * tiles_ahead, tile_y + step_y * tiles_ahead
+            in_zone = zone_min <= next_x < zone_max and zone_min <= next_y < zone_max
+            if in_zone or self.city.tile(next_y, next_x) in BLOCKING_TILES:
+                first_blocker = tiles_ahead
+                break
+            tiles_ahead += 1
+
+        # Any vehicle ahead in the lane (or sharing this tile) may stop at any moment, or merge back
+        # in if pulled over, so treat the tile it is in now as a blocker
+        lane_position = tile_x * step_x + tile_y * step_y
+        for vehicle in vehicles:
+            if vehicle is not self and vehicle.direction == self.direction:
+                tiles_to_vehicle = int(vehicle.x) * step_x + int(vehicle.y) * step_y - lane_position
+                if 0 <= tiles_to_vehicle and (first_blocker is None or tiles_to_vehicle < first_blocker):
+                    first_blocker = tiles_to_vehicle
+
+        horizon = float('inf')
+        if first_blocker is not None:
+            # check_ahead looks two tiles ahead, so the vehicle must stay three tiles short of the blocker
+            free_distance = first_blocker - 2 - covered
+            if free_distance <= 0:
+                return 0
+            horizon = free_distance / self.speed
+
+        # Emergency vehicles in the same lane come into range 5 tiles behind or 2 tiles ahead
+        position = self.x * step_x + self.y * step_y
+        for vehicle in vehicles:
+            if isinstance(vehicle, EmergencyVehicle) and vehicle.direction == self.direction:
+                gap_behind = position - (vehicle.x * step_x + vehicle.y * step_y)
+                if -2 <= gap_behind <= 5:
+                    return 0
+                if gap_behind > 5 and vehicle.speed > self.speed:
+                    horizon = min(horizon, (gap_behind - 5) / (vehicle.speed - self.speed))
+                elif gap_behind < -2 and self.speed > vehicle.speed:
+                    horizon = min(horizon, (-2 - gap_behind) / (self.speed - vehicle.speed))
+
+        return horizon
+
     def draw(self, win):
         """
         Draw the vehicle on the screen.
@@ -100,17 +212,14 @@ class Vehicle:
         Returns:
             None
         """
-        # Only draw if the vehicle is at least partially on screen
-        if (0 <= int(self.x * TILE_SIZE) < WIDTH and 
-            0 <= int(self.y * TILE_SIZE) < HEIGHT):
-            pg.draw.rect(win, self.color, (int(self.x * TILE_SIZE), int(self.y * TILE_SIZE), TILE_SIZE, TILE_SIZE))
+        draw_vehicle_tile(win, self.x, self.y, self.color)
 
-    def check_ahead(self):
+    def check_ahead(self, dt):
         """
         Check if the vehicle should stop based on the traffic light ahead and the next tile.
         
         Args:
-            None
+            - dt (float): Seconds of simulated time since the last update (added to the 4-way stop timer).
             
         Returns:
             - bool: Whether the vehicle should stop.
@@ -133,8 +242,8 @@ class Vehicle:
                 next_x -= i
 
             # Ensure next_x and next_y are within bounds before accessing the grid
-            if 0 <= next_y < GRID_SIZE and 0 <= next_x < GRID_SIZE:
-                tile = self.grid[next_y][next_x]
+            if 0 <= next_y < self.config.grid_size and 0 <= next_x < self.config.grid_size:
+                tile = self.city.tile(next_y, next_x)
 
                 if tile == 'occupied' or tile == 'red_light':
                     return True
@@ -142,10 +251,10 @@ class Vehicle:
                 if tile == '4_way_red':
                     if self.four_way_state == "approaching":
                         self.four_way_state = "waiting"
-                        self.four_way_timer += 1
+                        self.four_way_timer += dt
                         return True
                     elif self.four_way_state == "waiting":
-                        self.four_way_timer += 1
+                        self.four_way_timer += dt
                         return True
 
         # If we've reached this point, there's no reason to stop
@@ -169,28 +278,43 @@ class Vehicle:
                     return False
         return True
     
-    def check_behind(self, vehicles):
+    def check_behind(self, vehicles, emergency_nearby=None):
         """
         Check 5 tiles behind and 2 tiles ahead of the vehicle to check for oncoming emergency vehicles in code 3 mode.
         
         Args:
             - vehicles (list): List of vehicles in the simulation.
+            - emergency_nearby (bool): Whether an emergency vehicle is in range, if already known (from kernels.emergency_nearby).
             
         Modifies:
             - self.stopped: Whether the vehicle should stop.
             - self.x, self.y: The position of the vehicle.
         """
+        if emergency_nearby is None:
+            emergency_nearby = self.is_emergency_vehicle_nearby(vehicles)
+
         if self.pulled_over:
             # If already pulled over, check if it's safe to merge back.
-            self.merge(vehicles)
-        else:
-            # Check the area behind and ahead for emergency vehicles
-            for vehicle in vehicles:
-                if isinstance(vehicle, EmergencyVehicle):
-                    if self.is_emergency_vehicle_in_range(vehicle):
-                        self.pull_over()
-                        self.stopped = True
-                        return
+            self.merge(vehicles, emergency_nearby)
+        elif emergency_nearby:
+            self.pull_over()
+            self.stopped = True
+
+    def is_emergency_vehicle_nearby(self, vehicles):
+        """
+        Check the area behind and ahead of the vehicle for emergency vehicles.
+
+        Args:
+            - vehicles (list): List of vehicles in the simulation.
+
+        Returns:
+            - bool: True if any emergency vehicle is within range.
+        """
+        for vehicle in vehicles:
+            if isinstance(vehicle, EmergencyVehicle):
+                if self.is_emergency_vehicle_in_range(vehicle):
+                    return True
+        return False
                     
     def is_emergency_vehicle_in_range(self, vehicle):
         """
@@ -232,9 +356,6 @@ class Vehicle:
         self.stopped = True
         self.pulled_over = True
 
-        # Save the previous position to keep it marked as occupied
-        prev_x, prev_y = int(self.x), int(self.y)
-
         # Move the vehicle to the right side of the road
         if self.direction == 'N':
             self.x += 1  # Move right
@@ -253,91 +374,61 @@ class Vehicle:
             if self.y == 11 or self.y == 12:
                 self.x -= 2 # Move left
 
-        # Mark the old position as occupied
-        if 0 <= prev_y < GRID_SIZE and 0 <= prev_x < GRID_SIZE:
-            if self.grid[prev_y][prev_x] != '4_way_red':
-                self.grid[prev_y][prev_x] = 'occupied'
-
-    def merge(self, vehicles):
+    def merge(self, vehicles, emergency_nearby=None):
         """
         Merge the vehicle back into the road after pulling over.
 
         Args:
             - vehicles (list): List of vehicles in the simulation.
+            - emergency_nearby (bool): Whether an emergency vehicle is in range, if already known.
 
         Modifies:
             - self.stopped: Whether the vehicle is stopped.
             - self.pulled_over: Whether the vehicle has pulled over.
             - self.x, self.y: The position of the vehicle.
         """
-        # Check if there's still an emergency vehicle within the danger zone
-        for vehicle in vehicles:
-            if isinstance(vehicle, EmergencyVehicle):
-                if self.is_emergency_vehicle_in_range(vehicle):
-                    return  # Stay pulled over if the emergency vehicle is still nearby
+        # Stay pulled over if there's still an emergency vehicle within the danger zone
+        if emergency_nearby is None:
+            emergency_nearby = self.is_emergency_vehicle_nearby(vehicles)
+        if emergency_nearby:
+            return
 
         # Define next_x and next_y based on current position
         next_x, next_y = self.x, self.y
 
         # Check the next space before merging back, with boundary checks
         if self.direction == 'N':
-            if int(self.y) - 2 >= 0 and self.grid[int(self.y - 2)][int(self.x)] == 'occupied':
+            if int(self.y) - 2 >= 0 and self.city.tile(int(self.y - 2), int(self.x)) == 'occupied':
                 return
-            if int(self.y) - 1 >= 0 and self.grid[int(self.y - 1)][int(self.x)] == 'occupied':
+            if int(self.y) - 1 >= 0 and self.city.tile(int(self.y - 1), int(self.x)) == 'occupied':
                 return
             next_x -= 1  # Move back to the left
         elif self.direction == 'S':
-            if int(self.y) + 2 < GRID_SIZE and self.grid[int(self.y + 2)][int(self.x)] == 'occupied':
+            if int(self.y) + 2 < self.config.grid_size and self.city.tile(int(self.y + 2), int(self.x)) == 'occupied':
                 return
-            if int(self.y) + 1 < GRID_SIZE and self.grid[int(self.y + 1)][int(self.x)] == 'occupied':
+            if int(self.y) + 1 < self.config.grid_size and self.city.tile(int(self.y + 1), int(self.x)) == 'occupied':
                 return
             next_x += 1  # Move back to the right
         elif self.direction == 'E':
-            if int(self.x) + 2 < GRID_SIZE and self.grid[int(self.y)][int(self.x + 2)] == 'occupied':
+            if int(self.x) + 2 < self.config.grid_size and self.city.tile(int(self.y), int(self.x + 2)) == 'occupied':
                 return
-            if int(self.x) + 1 < GRID_SIZE and self.grid[int(self.y)][int(self.x + 1)] == 'occupied':
+            if int(self.x) + 1 < self.config.grid_size and self.city.tile(int(self.y), int(self.x + 1)) == 'occupied':
                 return
             next_y -= 1  # Move back down
         elif self.direction == 'W':
-            if int(self.x) - 2 >= 0 and self.grid[int(self.y)][int(self.x - 2)] == 'occupied':
+            if int(self.x) - 2 >= 0 and self.city.tile(int(self.y), int(self.x - 2)) == 'occupied':
                 return
-            if int(self.x) - 1 >= 0 and self.grid[int(self.y)][int(self.x - 1)] == 'occupied':
+            if int(self.x) - 1 >= 0 and self.city.tile(int(self.y), int(self.x - 1)) == 'occupied':
                 return
             next_y += 1  # Move back up
 
-        # Update position and mark the grid as occupied
+        # Update position
         self.x, self.y = next_x, next_y
 
-        if self.grid[int(self.y)][int(self.x)] != '4_way_red':
-            self.grid[int(self.y)][int(self.x)] = 'occupied'
-
         # Reset the pulled over status
         self.pulled_over = False
         self.stopped = False
 
-    def update_vehicle_grid_positions(self, prev_x, prev_y, current_x, current_y):
-        """
-        Update the grid positions of the vehicle.
-
-        Args:
-            - prev_x (int): The previous x-coordinate of the vehicle.
-            - prev_y (int): The previous y-coordinate of the vehicle.
-            - current_x (int): The current x-coordinate of the vehicle.
-            - current_y (int): The current y-coordinate of the vehicle.
-
-        Modifies:
-            - self.grid: The grid of the city.
-        """
-        # Always mark the previous position as 'road'
-        if 0 <= prev_y < GRID_SIZE and 0 <= prev_x < GRID_SIZE:
-            if self.grid[prev_y][prev_x] != '4_way_red':
-                self.grid[prev_y][prev_x] = 'road'
-
-        # Set grid to occupied for the new position if it's within the grid
-        if 1 <= current_y < GRID_SIZE and 1 <= current_x < GRID_SIZE:  # Changed from 0 to 1 to fix negative indexing/'occupied' bug
-            if self.grid[current_y][current_x] != '4_way_red':
-                self.grid[current_y][current_x] = 'occupied'
-
     def check_if_in_intersection(self):
         """
         Check if the vehicle is within the intersection.
@@ -358,7 +449,7 @@ class Vehicle:
         Returns:
             - bool: Whether the vehicle is off the screen.
         """
-        return self.x < 0 or self.x > GRID_SIZE or self.y < 0 or self.y > GRID_SIZE
+        return self.x < 0 or self.x > self.config.grid_size or self.y < 0 or self.y > self.config.grid_size
     
 
 class EmergencyVehicle(Vehicle):
@@ -369,62 +460,131 @@ class EmergencyVehicle(Vehicle):
         - speed: The speed of the emergency vehicle is increased.
         - check_ahead: The emergency vehicle can pass through red lights.
         - flash_lights: The color of the emergency vehicle cycles between red, white, and blue.
+
+    Additional attributes:
+        - flash_timer (float): Seconds since the emergency lights last changed color
+        - intersection_time (float): Seconds spent within the intersection so far
     """
-    def __init__(self, x, y, direction, city, color=(255,255,255)):
-        super().__init__(x, y, direction, city, color)      # initialize the vehicle with the same attributes
-        self.speed = random.uniform(0.7, 1.2) * VEHICLE_BASE_SPEED    # increase the speed of the emergency vehicle
+    def __init__(self, x, y, direction, city, color=(255,255,255), config=DEFAULT_CONFIG, speed=None):
+        super().__init__(x, y, direction, city, color, config)      # initialize the vehicle with the same attributes
+        self.speed = speed if speed is not None else random.uniform(0.7, 1.2) * config.vehicle_base_speed    # increase the speed of the emergency vehicle
+        self.flash_timer = 0
+        self.intersection_time = 0
 
+    def move(self, dt):
+        """
+        Move the emergency vehicle, adding the part of this step spent within the intersection (the same
+        span as check_if_in_intersection) to its intersection time. The part is measured along the path
+        swept this step, so it is exact even for steps that cross the whole intersection at once.
 
-    def check_ahead(self):
+        Args:
+            - dt (float): Seconds of simulated time since the last update.
+        """
+        super().move(dt)
+        if self.direction in ('N', 'S'):
+            start, end = self.start_y, self.y
+        else:
+            start, end = self.start_x, self.x
+        inside = min(max(start, end), 13) - max(min(start, end), 10)
+        if inside > 0:
+            self.intersection_time += inside / self.speed
+
+
+    def check_ahead(self, dt):
         """
         Override the check_ahead method to allow the emergency vehicle to pass through red
         """
         return False
 
-    def flash_lights(self):
+    def flash_lights(self, dt):
         """This function makes the color of the emergency vehicle cycle between red, white, and blue"""
-        if self.color == (255, 0, 0):
-            self.color = (255, 255, 255)
-        elif self.color == (255, 255, 255):
-            self.color = (0, 0, 255)
-        else:
-            self.color = (255, 0, 0)
+        self.flash_timer += dt
+        flashes = int(self.flash_timer // EV_FLASH_INTERVAL)
+        self.flash_timer -= flashes * EV_FLASH_INTERVAL
+
+        # Only the position in the 3-color cycle matters, so large steps don't loop per flash
+        for _ in range(flashes % 3):
+            if self.color == (255, 0, 0):
+                self.color = (255, 255, 255)
+            elif self.color == (255, 255, 255):
+                self.color = (0, 0, 255)
+            else:
+                self.color = (255, 0, 0)
+
+
+def draw_vehicle_tile(win, x, y, color):
+    """
+    Draw a vehicle tile at a (fractional) grid position, if it is at least partially on screen.
+
+    Args:
+        - win (pygame.Surface): The window to draw the vehicle on.
+        - x (float): The x-coordinate of the vehicle.
+        - y (float): The y-coordinate of the vehicle.
+        - color (tuple): The color of the vehicle.
+    """
+    import pygame as pg
+
+    if (0 <= int(x * TILE_SIZE) < WIDTH and 
+        0 <= int(y * TILE_SIZE) < HEIGHT):
+        pg.draw.rect(win, color, (int(x * TILE_SIZE), int(y * TILE_SIZE), TILE_SIZE, TILE_SIZE))
 
 
 # Vehicle Generation Functions
-def generate_vehicle():
+def spawn_position(direction, grid_size=GRID_SIZE):
     """
-    Generate a vehicle with a random starting position, direction, and color.
+    Get the tile where vehicles traveling in a given direction enter the grid.
+
+    Args:
+        - direction (str): Direction of travel (N, S, E, W).
+        - grid_size (int): Width and height of the city grid in tiles.
 
     Returns:
-        - tuple: The x-coordinate, y-coordinate, direction, and color of the vehicle.
+        - tuple: The x-coordinate and y-coordinate of the entry tile.
     """
-    # Pick a random direction/starting point for the vehicle
-    direction = random.choice(['N', 'S', 'E', 'W'])
     if direction == 'N':
-        x, y = 12, 23
+        return 12, grid_size - 1
     elif direction == 'S':
-        x, y = 11, 0
+        return 11, 0
     elif direction == 'E':
-        x, y = 0, 12
+        return 0, 12
     else:
-        x, y = 23, 11
+        return grid_size - 1, 11
+
+
+def generate_vehicle(grid_size=GRID_SIZE, rng=random):
+    """
+    Generate a vehicle with a random starting position, direction, and color.
+
+    Args:
+        - grid_size (int): Width and height of the city grid in tiles.
+        - rng (random.Random): Source of randomness (the global generator by default).
+
+    Returns:
+        - tuple: The x-coordinate, y-coordinate, direction, and color of the vehicle.
+    """
+    # Pick a random direction/starting point for the vehicle
+    direction = rng.choice(['N', 'S', 'E', 'W'])
+    x, y = spawn_position(direction, grid_size)
 
     # Choose a random color for the vehicle
-    color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+    color = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
 
     return x, y, direction, color
 
 
-def generate_emergency_vehicle():
+def generate_emergency_vehicle(grid_size=GRID_SIZE, rng=random):
     """
     Generate an emergency vehicle with a random starting position, direction
 
+    Args:
+        - grid_size (int): Width and height of the city grid in tiles.
+        - rng (random.Random): Source of randomness (the global generator by default).
+
     Returns:
         - tuple: The x-coordinate, y-coordinate, direction, and color of the emergency vehicle.
     """
     # Pick a random direction/starting point for the vehicle
-    x, y, direction, color = generate_vehicle()
+    x, y, direction, color = generate_vehicle(grid_size, rng)
 
     # Set the base color of the emergency vehicle to white
     color = (255, 255, 255)
@@ -0,0 +1,272 @@
+import heapq
+import itertools
+import random
+
+from config import EVENT_TIME_EPSILON, TELEMETRY_PORT
+from entities.vehicle import EmergencyVehicle, DIRECTION_STEPS
+
+
+class EventQueue:
+    """
+    Priority queue of timed simulation events, ordered by time (ties keep insertion order).
+
+    Attributes:
+        - heap (list): Heap of (time, sequence, kind) entries
+        - counter (itertools.count): Sequence numbers used to break ties between events at the same time
+
+    Methods:
+        - push: Schedule an event
+        - peek_time: Get the time of the next event
+        - pop: Remove and return the next event
+    """
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, time, kind):
+        """
+        Schedule an event.
+
+        Args:
+            - time (float): Simulation time of the event in seconds.
+            - kind (str): The kind of event, e.g. 'vehicle_arrival'.
+        """
+        heapq.heappush(self.heap, (time, next(self.counter), kind))
+
+    def peek_time(self):
+        """
+        Returns:
+            - float: The time of the next event, or infinity if the queue is empty.
+        """
+        return self.heap[0][0] if self.heap else float('inf')
+
+    def pop(self):
+        """
+        Returns:
+            - tuple: The (time, kind) of the next event.
+        """
+        time, _, kind = heapq.heappop(self.heap)
+        return time, kind
+
+
+class EventDrivenSimulation:
+    """
+    Event-driven engine that advances a Simulation from one event to the next instead of in fixed ticks.
+
+    When the simulation has a spawn stream (pre-drawn arrivals or a demand schedule, the default), the
+    next arrival is the stream's next time. Otherwise arrivals are scheduled with exponential
+    inter-arrival times (the continuous-time version of the per-frame spawn chance) in an event queue,
+    which is only filled once a step finds no stream, so a run with a stream draws nothing from the
+    global random generator for arrivals. Everything else that changes the simulation at a known instant
+    is derived from its state after each step: light phase changes, a yellow light turning the crosswalks
+    red, vehicles reaching the end of their free-flow path (arrival at the stop line or at the back of a
+    queue), 4-way stop releases, emergency vehicles leaving the grid and the end of an analysis phase.
+    The engine jumps straight to the earliest of these. Only while a vehicle is queued, pulled over or
+    near the intersection does it fall back to steps of at most `max_step`. Rates and step limits default
+    to the simulation's SimConfig; the rates are only used without a spawn stream.
+
+    The saving depends on the traffic. At the default density there is nearly always a queue, so most of
+    a run is spent in `max_step` steps and a 2 x 600 s analysis runs about 3-4x faster than 60 Hz ticks,
+    not orders of magnitude faster. Sparse traffic, with long idle stretches to jump over, gains more.
+
+    Attributes:
+        - simulation (SimulationModel): The simulation being driven
+        - events (EventQueue): Scheduled arrival events (empty while the simulation spawns from a stream)
+        - max_step (float): Longest step in seconds while any vehicle needs per-step checks
+        - vehicle_rate (float): Vehicle arrivals per second
+        - emergency_rate (float): Emergency vehicle arrivals per second
+        - steps (int): Number of simulation updates performed
+        - events_processed (int): Number of arrival events processed
+
+    Methods:
+        - schedule_arrival: Schedule the next arrival of a given kind
+        - next_state_event_time: Get the earliest event time derived from the simulation state
+        - needs_fine_steps: Check whether any vehicle needs per-step checks
+        - step: Advance the simulation to the next event
+        - run: Advance the simulation until a time limit or stop condition
+    """
+    def __init__(self, simulation, max_step=None, vehicle_rate=None, emergency_rate=None):
+        config = simulation.config
+        self.simulation = simulation
+        self.events = EventQueue()
+        self.max_step = max_step if max_step is not None else config.event_max_step
+        self.vehicle_rate = vehicle_rate if vehicle_rate is not None else config.frequency_of_events
+        self.emergency_rate = emergency_rate if emergency_rate is not None else config.emergency_frequency_of_events
+        self.steps = 0
+        self.events_processed = 0
+
+    def schedule_arrival(self, kind):
+        """
+        Schedule the next arrival of the given kind after an exponential inter-arrival time.
+
+        Args:
+            - kind (str): 'vehicle_arrival' or 'emergency_arrival'.
+        """
+        rate = self.vehicle_rate if kind == 'vehicle_arrival' else self.emergency_rate
+        if rate > 0:
+            self.events.push(self.simulation.sim_time + random.expovariate(rate), kind)
+
+    def next_state_event_time(self):
+        """
+        Get the earliest upcoming event that follows from the current simulation state.
+
+        Returns:
+            - float: Simulation time of the event in seconds (infinity if nothing is pending).
+        """
+        sim = self.simulation
+        config = sim.config
+        now = sim.sim_time
+        candidates = [float('inf')]
+
+        # Light phase changes, and the moment a yellow light turns the crosswalks red
+        durations = {'GREEN': config.green_light_duration, 'YELLOW': config.yellow_light_duration, 'RED': config.red_light_duration}
+        for light in sim.traffic_lights:
+            if light.state in durations:
+                candidates.append(now + durations[light.state] - light.timer)
+            if light.state == 'YELLOW' and light.yellow_timer <= config.yellow_as_red_after:
+                candidates.append(now + config.yellow_as_red_after - light.yellow_timer)
+
+        # 4-way stop release for the vehicle that has waited longest
+        manager = sim.intersection_manager
+        if manager.four_way_active and manager.vehicles_at_intersection:
+            longest_wait = max(vehicle.four_way_timer for vehicle in manager.vehicles_at_intersection)
+            release_time = now + max(manager.buffer_delay, config.four_way_stop_wait - longest_wait)
+            if release_time > now:
+                candidates.append(release_time)
+
+        for vehicle in sim.vehicles:
+            if isinstance(vehicle, EmergencyVehicle):
+                # Emergency vehicle leaves the grid
+                step_x, step_y = DIRECTION_STEPS[vehicle.direction]
+                position = vehicle.x * step_x + vehicle.y * step_y
+                exit_position = config.grid_size if step_x + step_y > 0 else 0
+                remaining = (exit_position - position) * (step_x + step_y)
+                if remaining > 0:
+                    candidates.append(now + remaining / vehicle.speed)
+            elif vehicle.free_flow_until > now:
+                # Vehicle reaches the end of its free-flow path (stop line, queue, or emergency vehicle range)
+                candidates.append(vehicle.free_flow_until)
+
+        # End of the current analysis phase
+        if sim.analysis_mode:
+            phases_done = 2 if sim.analytics.phase_two_active else 1
+            candidates.append(sim.analysis_start_time + sim.analysis_phase_duration * phases_done)
+
+        return min(candidates)
+
+    def needs_fine_steps(self):
+        """
+        Check whether any vehicle currently needs per-step checks (queued, pulled over, or near the intersection).
+
+        Returns:
+            - bool: True if steps must be limited to max_step.
+        """
+        now = self.simulation.sim_time
+        for vehicle in self.simulation.vehicles:
+            if not isinstance(vehicle, EmergencyVehicle) and vehicle.free_flow_until <= now:
+                return True
+        return False
+
+    def step(self, until=float('inf')):
+        """
+        Advance the simulation to the next event (or by max_step if vehicles need per-step checks),
+        then process any arrivals that are due.
+
+        Args:
+            - until (float): Simulation time the step must not go past.
+        """
+        sim = self.simulation
+        now = sim.sim_time
+
+        if sim.spawn_stream:
+            next_arrival = sim.spawn_stream.next_time()
+        else:
+            if not self.events:
+                # No stream to spawn from: start drawing exponential arrivals from now
+                self.schedule_arrival('vehicle_arrival')
+                self.schedule_arrival('emergency_arrival')
+            next_arrival = self.events.peek_time()
+        target = min(next_arrival, self.next_state_event_time() + EVENT_TIME_EPSILON, until)
+        if self.needs_fine_steps():
+            target = min(target, now + self.max_step)
+
+        if target > now:
+            sim.update(target - now, spawn=False)
+            self.steps += 1
+
+        # Arrivals happen at the event instant, after the simulation has caught up to it
+        if sim.spawn_stream:
+            sim.spawn_due_arrivals()
+            return
+        while self.events.peek_time() <= sim.sim_time:
+            _, kind = self.events.pop()
+            if kind == 'vehicle_arrival':
+                sim.spawn_vehicle()
+            else:
+                sim.spawn_emergency_vehicle()
+            self.events_processed += 1
+            self.schedule_arrival(kind)
+
+    def run(self, duration=None, stop=None):
+        """
+        Advance the simulation until `duration` more seconds have been simulated or `stop()` returns True.
+
+        Args:
+            - duration (float): Seconds of simulated time to run for (None to run until stopped).
+            - stop (callable): Optional function checked after every step; the run ends when it returns True.
+        """
+        end_time = self.simulation.sim_time + duration if duration is not None else float('inf')
+        while self.simulation.sim_time < end_time and not (stop and stop()):
+            self.step(end_time)
+
+
+def run_event_driven_analysis(simulation, phase_duration, export=False, paired_seed=None):
+    """
+    Run a full ERTS off/on analysis headlessly with the event-driven engine.
+
+    Args:
+        - simulation (SimulationModel): A freshly reset simulation.
+        - phase_duration (int): Seconds of simulated time per phase.
+        - export (bool): Whether to export the results to JSON.
+        - paired_seed (int): Replay the same traffic, drawn from this seed, in both phases (None for independent traffic).
+
+    Returns:
+        - Analytics: The finalized analytics for the run.
+    """
+    simulation.begin_analysis(phase_duration, paired_seed)
+    engine = EventDrivenSimulation(simulation)
+    engine.run(stop=lambda: not simulation.analysis_mode)
+    simulation.analytics.finalize_analysis(export)
+    return simulation.analytics
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from demand import PROFILES
+    from simulation import SimulationModel
+    from telemetry import TelemetryServer
+
+    parser = argparse.ArgumentParser(description="Run a headless ERTS off/on analysis.")
+    parser.add_argument("phase_duration", type=int, nargs="?", default=300, help="seconds of simulated time per phase")
+    parser.add_argument("--export", action="store_true", help="export the results to JSON")
+    parser.add_argument("--paired", type=int, default=None, metavar="SEED",
+                        help="replay the same traffic, drawn from SEED, in both phases")
+    parser.add_argument("--profile", choices=sorted(PROFILES), help="spawn from a demand profile instead of constant rates")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the demand profile's arrivals")
+    parser.add_argument("--telemetry", type=int, nargs="?", const=TELEMETRY_PORT, default=None, metavar="PORT",
+                        help="stream live telemetry from http://127.0.0.1:PORT/events")
+    args = parser.parse_args()
+
+    simulation = SimulationModel()
+    if args.profile:
+        simulation.set_demand_profile(PROFILES[args.profile], args.seed, duration=args.phase_duration * 2)
+    if args.telemetry is not None:
+        simulation.telemetry = TelemetryServer(port=args.telemetry).start()
+        print(f"Telemetry at http://{simulation.telemetry.host}:{simulation.telemetry.port}/events")
+    run_event_driven_analysis(simulation, args.phase_duration, export=args.export, paired_seed=args.paired)
+    if simulation.telemetry:
+        simulation.telemetry.stop()
@@ -1,6 +1,8 @@
-import pygame as pg
+import math
+import random
 
-from config import TILE_SIZE
+import kernels
+from config import TILE_SIZE, CONFLICT_ZONE, IDLE_EVENT_TIMEOUT
 from entities.vehicle import EmergencyVehicle
 
 
@@ -18,6 +20,8 @@ def draw_split_tile(window, ns_color, ew_color, x, y):
     Returns:    
         None
     """
+    import pygame as pg
+
     # Define the corners of the selected tile that needs to be split
     top_left = (x * TILE_SIZE, y * TILE_SIZE)
     top_right = ((x + 1) * TILE_SIZE, y * TILE_SIZE)
@@ -39,84 +43,217 @@ def draw_split_tile(window, ns_color, ew_color, x, y):
         pg.draw.polygon(window, ns_color, [top_right, bottom_left, bottom_right])
 
 
-def collision_counter(vehicles, collision_count, collision_pairs, collision_cooldown):
+class CollisionRegistry:
+    """
+    Class to track which vehicle pairs are currently in contact, so each collision is only counted once.
+
+    Pairs are keyed by vehicle IDs (not list indices), so removing vehicles never shifts keys onto
+    unrelated vehicles. An entry expires once the pair has been out of contact for `cooldown` seconds,
+    and every entry involving a vehicle is dropped when that vehicle despawns, so the registry only
+    ever holds the handful of pairs that are touching right now.
+
+    Attributes:
+        - cooldown (float): Seconds without contact before a pair can be counted again
+        - last_contact (dict): Maps (id, id) pairs to the simulation time they were last seen in contact
+
+    Methods:
+        - make_pair: Build the registry key for two vehicles
+        - touch: Record contact for a pair and report whether it is a new collision
+        - expire: Drop pairs that have been out of contact for longer than the cooldown
+        - forget: Drop all pairs involving a despawned vehicle
+        - clear: Drop all pairs
+    """
+    def __init__(self, cooldown=1):
+        self.cooldown = cooldown
+        self.last_contact = {}
+
+    def __len__(self):
+        return len(self.last_contact)
+
+    @staticmethod
+    def make_pair(vehicle, other_vehicle):
+        """
+        Build the registry key for two vehicles, independent of argument order.
+
+        Returns:
+            tuple: The sorted (id, id) pair.
+        """
+        if vehicle.id < other_vehicle.id:
+            return (vehicle.id, other_vehicle.id)
+        return (other_vehicle.id, vehicle.id)
+
+    def touch(self, pair, now):
+        """
+        Record that a pair is in contact at the given time.
+
+        Args:
+            - pair (tuple): The (id, id) pair from make_pair.
+            - now (float): The current simulation time in seconds.
+
+        Returns:
+            bool: True if this is a new collision (the pair was not already in contact).
+        """
+        is_new = pair not in self.last_contact
+        self.last_contact[pair] = now
+        return is_new
+
+    def expire(self, now):
+        """
+        Drop pairs that have not been in contact for more than `cooldown` seconds.
+
+        Args:
+            - now (float): The current simulation time in seconds.
+        """
+        expired = [pair for pair, last in self.last_contact.items() if now - last > self.cooldown]
+        for pair in expired:
+            del self.last_contact[pair]
+
+    def forget(self, vehicle_id):
+        """
+        Drop all pairs involving a vehicle, called when the vehicle despawns.
+
+        Args:
+            - vehicle_id (int): The ID of the despawned vehicle.
+        """
+        stale = [pair for pair in self.last_contact if vehicle_id in pair]
+        for pair in stale:
+            del self.last_contact[pair]
+
+    def clear(self):
+        self.last_contact.clear()
+
+
+def collision_counter(vehicles, collision_count, collision_registry, now, use_kernels=False):
     """
     Count the total number of collisions for all vehicles in the simulation.
 
+    Each vehicle is swept along the path it travelled this tick, so crossings are caught
+    no matter how far a vehicle moves in a single step.
+
     Args:
         vehicles (list): List of vehicle objects.
         collision_count (int): The current collision count.
-        collision_pairs (dict): A dictionary to track counted collisions.
-        collision_cooldown (dict): A dictionary to track cooldowns for collisions.
+        collision_registry (CollisionRegistry): Registry of vehicle pairs currently in contact.
+        now (float): The current simulation time in seconds.
+        use_kernels (bool): Whether to find the collisions with the compiled kernel (see kernels.py).
 
     Returns:
         int: Updated collision count.
     """
-    intersection_tiles = [
-        (11, 11), (11, 12), (12, 11), (12, 12),
-        (11, 10), (12, 10), (9, 11), (9, 12),
-        (11, 13), (12, 13), (13, 11), (13, 12)
-    ]
-
-    for i, vehicle in enumerate(vehicles):
-        for j, other_vehicle in enumerate(vehicles):
-            if i != j:  # Ensure we don't check the same vehicle against itself
-                if detect_opposing_directions(vehicle, other_vehicle):
-                    if (int(vehicle.x), int(vehicle.y)) in intersection_tiles:
-                        if (int(other_vehicle.x), int(other_vehicle.y)) in intersection_tiles:
-                            if (isinstance(vehicle, EmergencyVehicle) or isinstance(other_vehicle, EmergencyVehicle)) and (not isinstance(vehicle, EmergencyVehicle) or not isinstance(other_vehicle, EmergencyVehicle)):
-                                pair = tuple(sorted([i, j]))  # Sort to avoid (i, j) and (j, i) being treated as different
-                                if pair not in collision_cooldown or collision_cooldown[pair] == 0:
-                                    collision_count, detected = detect_collision(vehicle, other_vehicle, collision_pairs, collision_count, pair)
-                                    if detected:
-                                        collision_cooldown[pair] = 60  # Set a cooldown of 30 frames (adjust as needed)
-                                else:
-                                    # Decrease the cooldown for this collision pair
-                                    collision_cooldown[pair] -= 1
-
-    # Remove any pairs from the cooldown list if their cooldown has expired
-    collision_cooldown = {pair: cooldown for pair, cooldown in collision_cooldown.items() if cooldown > 0}
+    pairs = kernels.collision_pairs(vehicles) if use_kernels else find_collisions(vehicles)
+    for vehicle, other_vehicle in pairs:
+        pair = CollisionRegistry.make_pair(vehicle, other_vehicle)
+        if collision_registry.touch(pair, now):
+            collision_count += 1
+
+    # Remove any pairs that have been out of contact for longer than the cooldown
+    collision_registry.expire(now)
 
     return collision_count
 
 
-def detect_collision(vehicle, other_vehicle, collision_pairs, collision_count, pair):
-    vehicle_positions = [(int(vehicle.x), int(vehicle.y))]
-    other_vehicle_positions = [(int(other_vehicle.x), int(other_vehicle.y))]
+def find_collisions(vehicles):
+    """
+    Find the vehicle pairs whose swept paths overlapped this tick: crossing traffic, one of them an
+    emergency vehicle.
 
-    # Add previous tile positions based on direction of travel
-    if vehicle.direction == 'N':
-        vehicle_positions.append((int(vehicle.x) + 1, int(vehicle.y)))
-    elif vehicle.direction == 'S':
-        vehicle_positions.append((int(vehicle.x) - 1, int(vehicle.y) - 1))
-    elif vehicle.direction == 'E':
-        vehicle_positions.append((int(vehicle.x), int(vehicle.y) - 1))
-    elif vehicle.direction == 'W':
-        vehicle_positions.append((int(vehicle.x), int(vehicle.y) + 1))
+    Args:
+        vehicles (list): List of vehicle objects.
 
-    if vehicle.direction == 'N' or vehicle.direction == 'S':
-        if other_vehicle.direction == 'E':
-            other_vehicle_positions.append((int(other_vehicle.x), int(other_vehicle.y) - 1))
-        elif other_vehicle.direction == 'W':
-            other_vehicle_positions.append((int(other_vehicle.x), int(other_vehicle.y - 1)))
-    if vehicle.direction == 'E' or vehicle.direction == 'W':
-        if other_vehicle.direction == 'N':
-            other_vehicle_positions.append((int(other_vehicle.x) + 1, int(other_vehicle.y)))
-        elif other_vehicle.direction == 'S':
-            other_vehicle_positions.append((int(other_vehicle.x) - 1, int(other_vehicle.y)))
-
-
-    # Check for collisions between all combinations of positions
-    for pos1 in vehicle_positions:
-        for pos2 in other_vehicle_positions:
-            if pos1 == pos2:
-                if pair not in collision_pairs:
-                    # Final check to make sure vehicles are moving in different directions
-                    collision_count += 1
-                    collision_pairs[pair] = True
-                    return collision_count, True
-
-    return collision_count, False
+    Returns:
+        list: (vehicle, other_vehicle) per collision, in the order of the vehicle list.
+    """
+    # Only vehicles whose path this tick touches the conflict zone can collide with crossing traffic
+    candidates = [vehicle for vehicle in vehicles if is_path_in_conflict_zone(vehicle)]
+
+    pairs = []
+    for i, vehicle in enumerate(candidates):
+        for other_vehicle in candidates[i + 1:]:
+            if detect_opposing_directions(vehicle, other_vehicle):
+                if isinstance(vehicle, EmergencyVehicle) != isinstance(other_vehicle, EmergencyVehicle):
+                    if detect_collision(vehicle, other_vehicle):
+                        pairs.append((vehicle, other_vehicle))
+    return pairs
+
+
+def is_path_in_conflict_zone(vehicle):
+    """
+    Check whether the area a vehicle swept this tick overlaps the conflict zone around the intersection.
+
+    Args:
+        vehicle (Vehicle): The vehicle to check.
+
+    Returns:
+        bool: True if any part of the vehicle's path lies in the conflict zone.
+    """
+    zone_min, zone_max = CONFLICT_ZONE
+    min_x, max_x = min(vehicle.start_x, vehicle.x), max(vehicle.start_x, vehicle.x) + 1
+    min_y, max_y = min(vehicle.start_y, vehicle.y), max(vehicle.start_y, vehicle.y) + 1
+    return min_x < zone_max and max_x > zone_min and min_y < zone_max and max_y > zone_min
+
+
+def detect_collision(vehicle, other_vehicle):
+    """
+    Check whether two vehicles overlapped at any moment during the current tick.
+
+    Returns:
+        bool: True if the vehicles overlapped.
+    """
+    return time_of_overlap(vehicle, other_vehicle) is not None
+
+
+def time_of_overlap(vehicle, other_vehicle):
+    """
+    Find the first moment in the current tick at which two vehicles overlap.
+
+    Vehicles are one-tile squares moving in a straight line from (start_x, start_y) to (x, y)
+    over the tick, so this is an exact swept box test rather than a per-tile sample.
+
+    Args:
+        vehicle (Vehicle): The first vehicle.
+        other_vehicle (Vehicle): The second vehicle.
+
+    Returns:
+        float or None: Fraction of the tick (0 to 1) at which the overlap begins, or None if they never overlap.
+    """
+    t_enter, t_exit = 0.0, 1.0
+    axes = (
+        (vehicle.start_x, vehicle.x, other_vehicle.start_x, other_vehicle.x),
+        (vehicle.start_y, vehicle.y, other_vehicle.start_y, other_vehicle.y),
+    )
+    for start, end, other_start, other_end in axes:
+        interval = axis_overlap_interval(start, end, other_start, other_end)
+        if interval is None:
+            return None
+        t_enter = max(t_enter, interval[0])
+        t_exit = min(t_exit, interval[1])
+        if t_enter >= t_exit:
+            return None
+    return t_enter
+
+
+def axis_overlap_interval(start, end, other_start, other_end):
+    """
+    Find when two unit-length segments moving along one axis overlap.
+
+    Args:
+        start (float): Start position of the first segment.
+        end (float): End position of the first segment.
+        other_start (float): Start position of the second segment.
+        other_end (float): End position of the second segment.
+
+    Returns:
+        tuple or None: The (enter, exit) times of the overlap, or None if they never overlap.
+    """
+    gap = start - other_start
+    closing_speed = (end - start) - (other_end - other_start)
+
+    if closing_speed == 0:
+        return (float('-inf'), float('inf')) if abs(gap) < 1 else None
+
+    t1 = (-1 - gap) / closing_speed
+    t2 = (1 - gap) / closing_speed
+    return (min(t1, t2), max(t1, t2))
 
 
 def detect_opposing_directions(vehicle, other_vehicle):
@@ -125,4 +262,62 @@ def detect_opposing_directions(vehicle, other_vehicle):
             return True
     elif vehicle.direction == 'E' or vehicle.direction == 'W':
         if other_vehicle.direction == 'N' or other_vehicle.direction == 'S':
-            return True
\ No newline at end of file
+            return True
+
+
+def poisson_arrivals(rate, dt):
+    """
+    Draw the number of arrivals in a time step for a Poisson process.
+
+    Drawing a count (rather than a single yes/no trial) keeps the arrival rate the same
+    whatever the step size.
+
+    Args:
+        rate (float): Expected arrivals per second.
+        dt (float): Length of the time step in seconds.
+
+    Returns:
+        int: The number of arrivals in this step.
+    """
+    threshold = math.exp(-rate * dt)
+    arrivals = 0
+    product = random.random()
+    while product > threshold:
+        arrivals += 1
+        product *= random.random()
+    return arrivals
+
+
+def wait_for_events(timeout=IDLE_EVENT_TIMEOUT):
+    """
+    Block until there is input, or `timeout` milliseconds pass, instead of polling for it in a busy loop.
+    Used by screens that only change on input (paused, analysis settings, analysis results).
+
+    Args:
+        timeout (int): Milliseconds to wait at most.
+
+    Returns:
+        list: Every pending event (empty if the wait timed out).
+    """
+    import pygame as pg
+
+    event = pg.event.wait(timeout)
+    if event.type == pg.NOEVENT:
+        return []
+    return [event] + pg.event.get()
+
+
+def needs_redraw(events):
+    """
+    Check whether an idle screen has to be redrawn: after a key press, which may change what it shows,
+    or when the window has been uncovered.
+
+    Args:
+        events (list): Events from wait_for_events.
+
+    Returns:
+        bool: Whether to redraw.
+    """
+    import pygame as pg
+
+    return any(event.type in (pg.KEYDOWN, pg.WINDOWEXPOSED, pg.VIDEOEXPOSE) for event in events)
@@ -0,0 +1,173 @@
+import math
+
+
+class LogHistogram:
+    """
+    Fixed-size histogram with log-linear buckets, in the style of an HDR histogram.
+
+    Values up to `sub_buckets` units are counted exactly, one bucket per unit. Above that, every power of
+    two is split into `sub_buckets / 2` equal buckets, so each value is kept to within 2 / sub_buckets of
+    its size (about 3% with 64 sub-buckets) however large it is. The number of buckets only depends on
+    the range, so percentiles are available at any run length in constant memory, and histograms with
+    the same layout can be merged, e.g. across parallel runs.
+
+    Attributes:
+        - unit (float): Smallest value told apart (values are counted in multiples of it)
+        - highest (float): Largest value told apart; larger values are counted in the top bucket
+        - sub_buckets (int): Buckets in the linear range, a power of two
+        - counts (list): Number of values recorded per bucket
+        - total (int): Number of values recorded
+        - sum (float): Sum of the values recorded
+        - min (float): Smallest value recorded
+        - max (float): Largest value recorded
+
+    Methods:
+        - record: Count a value
+        - percentile: Get a percentile of the recorded values
+        - mean: Get the mean of the recorded values
+        - merge: Add another histogram's counts to this one
+        - to_dict: Get the histogram as JSON-serializable data
+        - from_dict: Rebuild a histogram from to_dict data
+    """
+    def __init__(self, unit, highest, sub_buckets=64):
+        if sub_buckets < 2 or sub_buckets & (sub_buckets - 1):
+            raise ValueError("sub_buckets must be a power of two")
+        self.unit = unit
+        self.highest = highest
+        self.sub_buckets = sub_buckets
+        self.half = sub_buckets // 2
+        self.shift = sub_buckets.bit_length() - 1
+        self.counts = [0] * (self.index(highest) + 1)
+        self.total = 0
+        self.sum = 0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def __len__(self):
+        return self.total
+
+    def index(self, value):
+        """
+        Get the bucket a value is counted in.
+
+        Args:
+            - value (float): The value (negative values are counted as 0).
+
+        Returns:
+            - int: Index of the bucket.
+        """
+        units = value / self.unit
+        if units < self.sub_buckets:
+            return int(units) if units > 0 else 0
+        mantissa, exponent = math.frexp(units)      # units = mantissa * 2 ** exponent, 0.5 <= mantissa < 1
+        return self.sub_buckets + (exponent - self.shift - 1) * self.half + int((mantissa - 0.5) * self.sub_buckets)
+
+    def lowest_value(self, index):
+        """
+        Returns:
+            - float: The smallest value counted in a bucket.
+        """
+        if index < self.sub_buckets:
+            return index * self.unit
+        octave, position = divmod(index - self.sub_buckets, self.half)
+        return math.ldexp(0.5 + position / self.sub_buckets, octave + self.shift + 1) * self.unit
+
+    def record(self, value, count=1):
+        """
+        Count a value.
+
+        Args:
+            - value (float): The value.
+            - count (int): How many times to count it (e.g. the number of samples it stood for).
+        """
+        index = self.index(value)
+        self.counts[index if index < len(self.counts) else -1] += count
+        self.total += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """
+        Get a percentile of the recorded values, as the lowest value of the bucket it falls in (so it is
+        exact in the linear range and at most one bucket width low above it), kept within the recorded range.
+
+        Args:
+            - percent (float): The percentile, from 0 to 100.
+
+        Returns:
+            - float: The value (0 if nothing has been recorded).
+        """
+        if self.total == 0:
+            return 0
+        rank = max(1, math.ceil(percent / 100 * self.total))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(max(self.lowest_value(index), self.min), self.max)
+        return self.max
+
+    def mean(self):
+        """
+        Returns:
+            - float: The mean of the recorded values (0 if nothing has been recorded).
+        """
+        return self.sum / self.total if self.total else 0
+
+    def merge(self, other):
+        """
+        Add another histogram's counts to this one.
+
+        Args:
+            - other (LogHistogram): A histogram with the same layout (unit, highest and sub_buckets).
+
+        Raises:
+            - ValueError: If the layouts differ.
+        """
+        if (other.unit, other.highest, other.sub_buckets) != (self.unit, self.highest, self.sub_buckets):
+            raise ValueError("can only merge histograms with the same layout")
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self):
+        """
+        Returns:
+            - dict: The layout, totals and non-empty buckets, JSON-serializable.
+        """
+        return {
+            "unit": self.unit,
+            "highest": self.highest,
+            "sub_buckets": self.sub_buckets,
+            "total": self.total,
+            "sum": self.sum,
+            "min": self.min if self.total else None,
+            "max": self.max if self.total else None,
+            "counts": {str(index): count for index, count in enumerate(self.counts) if count},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a histogram from to_dict data.
+
+        Args:
+            - data (dict): Data from to_dict (possibly read back from JSON).
+
+        Returns:
+            - LogHistogram: The histogram.
+        """
+        histogram = cls(data["unit"], data["highest"], data["sub_buckets"])
+        for index, count in data["counts"].items():
+            histogram.counts[int(index)] = count
+        histogram.total = data["total"]
+        histogram.sum = data["sum"]
+        if data["total"]:
+            histogram.min, histogram.max = data["min"], data["max"]
+        return histogram
@@ -0,0 +1,305 @@
+import numpy as np
+
+from config import CONFLICT_ZONE
+from entities.vehicle import EmergencyVehicle
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """
+        Stand-in for numba.njit when numba isn't installed: the kernels stay plain Python functions.
+        """
+        return lambda function: function
+
+
+# Direction codes of the vehicle state arrays
+DIRECTION_CODES = {"N": 0, "S": 1, "E": 2, "W": 3}
+NORTH, SOUTH, EAST, WEST = 0, 1, 2, 3
+
+# Tile codes of the look-ahead grid (every tile a vehicle doesn't stop for is FREE)
+FREE, OCCUPIED, RED_LIGHT, FOUR_WAY_RED = 0, 1, 2, 3
+SIGNAL_CODES = {'red_light': RED_LIGHT, 'green_light': FREE, '4_way_red': FOUR_WAY_RED}
+
+# Results of the look-ahead, per vehicle
+CLEAR, BLOCKED, AT_FOUR_WAY = 0, 1, 2
+
+
+# ---- Kernels ----
+# Plain numeric code over arrays, compiled by Numba when it is installed. Each one does the same
+# floating-point operations in the same order as the Vehicle and helpers methods it stands in for,
+# so both paths produce identical results.
+
+@njit(cache=True)
+def _look_ahead(x, y, direction, codes, grid_size):
+    """
+    Vehicle.check_ahead for one vehicle, against the tile-code grid.
+
+    Returns:
+        - int: CLEAR, BLOCKED (a vehicle or red light ahead) or AT_FOUR_WAY (a 4-way stop ahead).
+    """
+    for i in range(1, 3):
+        next_x, next_y = int(x), int(y)
+        if direction == NORTH:
+            next_y -= i
+        elif direction == SOUTH:
+            next_y += i
+        elif direction == EAST:
+            next_x += i
+        else:
+            next_x -= i
+        if 0 <= next_y < grid_size and 0 <= next_x < grid_size:
+            code = codes[next_y, next_x]
+            if code == OCCUPIED or code == RED_LIGHT:
+                return BLOCKED
+            if code == FOUR_WAY_RED:
+                return AT_FOUR_WAY
+    return CLEAR
+
+
+@njit(cache=True)
+def _move_kernel(x, y, direction, speed, skip_check, codes, grid_size, dt, results, in_intersection):
+    """
+    Vehicle.move for a batch of vehicles (not pulled over, not emergency vehicles), in place.
+
+    Args:
+        - x, y (ndarray): Positions, advanced for the vehicles that move.
+        - direction (ndarray): Direction codes.
+        - speed (ndarray): Speeds in tiles per second.
+        - skip_check (ndarray): Whether each vehicle moves without looking ahead (in the intersection, or proceeding).
+        - codes (ndarray): The tile-code grid, indexed [row, column].
+        - grid_size (int): Width and height of the grid in tiles.
+        - dt (float): Seconds of simulated time to advance.
+        - results (ndarray): Filled with each vehicle's look-ahead result.
+        - in_intersection (ndarray): Filled with whether each moved vehicle is in the intersection.
+    """
+    for i in range(x.shape[0]):
+        result = CLEAR
+        if not skip_check[i]:
+            result = _look_ahead(x[i], y[i], direction[i], codes, grid_size)
+        results[i] = result
+        if result != CLEAR:
+            continue
+
+        distance = speed[i] * dt
+        if direction[i] == NORTH:
+            y[i] -= distance
+        elif direction[i] == SOUTH:
+            y[i] += distance
+        elif direction[i] == EAST:
+            x[i] += distance
+        else:
+            x[i] -= distance
+
+        if direction[i] == NORTH or direction[i] == SOUTH:
+            in_intersection[i] = 10 <= y[i] <= 13
+        else:
+            in_intersection[i] = 10 <= x[i] <= 13
+
+
+@njit(cache=True)
+def _emergency_nearby_kernel(x, y, direction, ev_x, ev_y, ev_direction, nearby):
+    """
+    Vehicle.is_emergency_vehicle_in_range for every vehicle against every emergency vehicle.
+
+    Args:
+        - x, y, direction (ndarray): Positions and direction codes of the vehicles to check.
+        - ev_x, ev_y, ev_direction (ndarray): Positions and direction codes of the emergency vehicles.
+        - nearby (ndarray): Filled with whether any emergency vehicle is in range of each vehicle.
+    """
+    for i in range(x.shape[0]):
+        nearby[i] = False
+        for j in range(ev_x.shape[0]):
+            if ev_direction[j] != direction[i]:
+                continue
+            if direction[i] == NORTH:
+                in_range = y[i] - 2 <= ev_y[j] <= y[i] + 5
+            elif direction[i] == SOUTH:
+                in_range = y[i] - 5 <= ev_y[j] <= y[i] + 2
+            elif direction[i] == EAST:
+                in_range = x[i] - 5 <= ev_x[j] <= x[i] + 2
+            else:
+                in_range = x[i] - 2 <= ev_x[j] <= x[i] + 5
+            if in_range:
+                nearby[i] = True
+                break
+
+
+@njit(cache=True)
+def _axis_overlap(start, end, other_start, other_end, t_enter, t_exit):
+    """
+    helpers.axis_overlap_interval, narrowing the (t_enter, t_exit) window of time_of_overlap.
+
+    Returns:
+        - tuple: The narrowed (t_enter, t_exit), or (1, 0) if the segments never overlap.
+    """
+    gap = start - other_start
+    closing_speed = (end - start) - (other_end - other_start)
+    if closing_speed == 0:
+        if abs(gap) < 1:
+            return t_enter, t_exit
+        return 1.0, 0.0
+    t1 = (-1 - gap) / closing_speed
+    t2 = (1 - gap) / closing_speed
+    return max(t_enter, min(t1, t2)), min(t_exit, max(t1, t2))
+
+
+@njit(cache=True)
+def _collision_kernel(start_x, start_y, x, y, vertical, emergency, zone_min, zone_max, pairs):
+    """
+    helpers.find_collisions over arrays: the vehicle pairs whose swept paths overlapped this tick.
+
+    Args:
+        - start_x, start_y, x, y (ndarray): Positions at the start and end of the tick.
+        - vertical (ndarray): Whether each vehicle travels north-south.
+        - emergency (ndarray): Whether each vehicle is an emergency vehicle.
+        - zone_min, zone_max (int): Bounds of the conflict zone.
+        - pairs (ndarray): Filled with the (i, j) indices of the colliding pairs, i < j.
+
+    Returns:
+        - int: Number of pairs found.
+    """
+    n = x.shape[0]
+    in_zone = np.zeros(n, np.bool_)
+    for i in range(n):
+        min_x, max_x = min(start_x[i], x[i]), max(start_x[i], x[i]) + 1
+        min_y, max_y = min(start_y[i], y[i]), max(start_y[i], y[i]) + 1
+        in_zone[i] = min_x < zone_max and max_x > zone_min and min_y < zone_max and max_y > zone_min
+
+    count = 0
+    for i in range(n):
+        if not in_zone[i]:
+            continue
+        for j in range(i + 1, n):
+            if not in_zone[j] or vertical[i] == vertical[j] or emergency[i] == emergency[j]:
+                continue
+            t_enter, t_exit = _axis_overlap(start_x[i], x[i], start_x[j], x[j], 0.0, 1.0)
+            if t_enter >= t_exit:
+                continue
+            t_enter, t_exit = _axis_overlap(start_y[i], y[i], start_y[j], y[j], t_enter, t_exit)
+            if t_enter >= t_exit:
+                continue
+            pairs[count, 0] = i
+            pairs[count, 1] = j
+            count += 1
+    return count
+
+
+# ---- Vehicle State Arrays ----
+# Gather the state the kernels need from the vehicle objects, run them, and write the results back.
+
+def tile_codes(city, grid_size):
+    """
+    Get the city grid as tile codes, as vehicles see it (signals first, then occupancy).
+
+    Args:
+        - city (CityGrid): The city grid.
+        - grid_size (int): Width and height of the grid in tiles.
+
+    Returns:
+        - ndarray: Tile code per [row, column].
+    """
+    codes = np.zeros((grid_size, grid_size), np.int8)
+    for row, column in city.occupied:
+        codes[row, column] = OCCUPIED
+    for (row, column), state in city.signals.items():
+        codes[row, column] = SIGNAL_CODES.get(state, FREE)
+    return codes
+
+
+def move_vehicles(vehicles, city, dt):
+    """
+    Move a batch of vehicles with the movement kernel, exactly as calling `move` on each would.
+
+    Only valid while the tiles don't change, which holds during the simulation's movement pass: occupancy
+    is rebuilt and signals updated after every vehicle has moved.
+
+    Args:
+        - vehicles (list): Vehicles (not emergency vehicles, not pulled over) to move.
+        - city (CityGrid): The city grid.
+        - dt (float): Seconds of simulated time to advance.
+
+    Modifies:
+        - Each vehicle's start position, position, stopped, in_intersection, wait_time and 4-way stop state.
+    """
+    grid_size = vehicles[0].config.grid_size
+    x = np.array([vehicle.x for vehicle in vehicles], np.float64)
+    y = np.array([vehicle.y for vehicle in vehicles], np.float64)
+    direction = np.array([DIRECTION_CODES[vehicle.direction] for vehicle in vehicles], np.int8)
+    speed = np.array([vehicle.speed for vehicle in vehicles], np.float64)
+    skip_check = np.array([vehicle.in_intersection or vehicle.four_way_state == "proceeding" for vehicle in vehicles])
+    results = np.empty(len(vehicles), np.int8)
+    in_intersection = np.zeros(len(vehicles), np.bool_)
+
+    _move_kernel(x, y, direction, speed, skip_check, tile_codes(city, grid_size), grid_size, dt, results, in_intersection)
+
+    for vehicle, new_x, new_y, result, inside in zip(vehicles, x.tolist(), y.tolist(), results.tolist(), in_intersection.tolist()):
+        vehicle.start_x, vehicle.start_y = vehicle.x, vehicle.y
+        if result != CLEAR:
+            vehicle.stopped = True
+            vehicle.wait_time += dt
+            if result == AT_FOUR_WAY:
+                vehicle.four_way_state = "waiting"
+                vehicle.four_way_timer += dt
+            continue
+        vehicle.stopped = False
+        # Only the coordinate along the direction of travel changes, as in Vehicle.move
+        if vehicle.direction in ('N', 'S'):
+            vehicle.y = new_y
+        else:
+            vehicle.x = new_x
+        vehicle.in_intersection = inside
+
+
+def emergency_nearby(vehicles, all_vehicles):
+    """
+    Check which vehicles have an emergency vehicle in range, with the range kernel.
+
+    Args:
+        - vehicles (list): Vehicles to check.
+        - all_vehicles (list): Every vehicle in the simulation (the emergency vehicles among them are checked against).
+
+    Returns:
+        - list: Whether an emergency vehicle is in range, per vehicle.
+    """
+    emergency_vehicles = [vehicle for vehicle in all_vehicles if isinstance(vehicle, EmergencyVehicle)]
+    if not emergency_vehicles:
+        return [False] * len(vehicles)
+    nearby = np.empty(len(vehicles), np.bool_)
+    _emergency_nearby_kernel(
+        np.array([vehicle.x for vehicle in vehicles], np.float64),
+        np.array([vehicle.y for vehicle in vehicles], np.float64),
+        np.array([DIRECTION_CODES[vehicle.direction] for vehicle in vehicles], np.int8),
+        np.array([vehicle.x for vehicle in emergency_vehicles], np.float64),
+        np.array([vehicle.y for vehicle in emergency_vehicles], np.float64),
+        np.array([DIRECTION_CODES[vehicle.direction] for vehicle in emergency_vehicles], np.int8),
+        nearby,
+    )
+    return nearby.tolist()
+
+
+def collision_pairs(vehicles):
+    """
+    Find the vehicle pairs whose swept paths overlapped this tick, with the collision kernel.
+
+    Args:
+        - vehicles (list): Every vehicle in the simulation.
+
+    Returns:
+        - list: (vehicle, other_vehicle) per collision, in the same order as helpers.find_collisions.
+    """
+    n = len(vehicles)
+    pairs = np.empty((n * (n - 1) // 2, 2), np.int64)
+    count = _collision_kernel(
+        np.array([vehicle.start_x for vehicle in vehicles], np.float64),
+        np.array([vehicle.start_y for vehicle in vehicles], np.float64),
+        np.array([vehicle.x for vehicle in vehicles], np.float64),
+        np.array([vehicle.y for vehicle in vehicles], np.float64),
+        np.array([vehicle.direction in ('N', 'S') for vehicle in vehicles]),
+        np.array([isinstance(vehicle, EmergencyVehicle) for vehicle in vehicles]),
+        CONFLICT_ZONE[0], CONFLICT_ZONE[1], pairs,
+    )
+    return [(vehicles[i], vehicles[j]) for i, j in pairs[:count].tolist()]
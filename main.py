@@ -1,211 +1,164 @@
+import argparse
+import os
 import pygame as pg
 import random
 import sys
 
-from analytics import Analytics
-from config import WIDTH, HEIGHT, GRID_SIZE, FREQUENCY_OF_EVENTS
-from city import CityGrid
-from helpers import draw_split_tile, collision_counter
+from config import WIDTH, HEIGHT, TILE_SIZE, FPS, DEFAULT_DT, DEFAULT_CONFIG, TELEMETRY_PORT, SNAPSHOT_EVERY_N_TICKS, SNAPSHOT_ON_COLLISION
+from helpers import draw_split_tile, wait_for_events, needs_redraw
+from entities.vehicle import draw_vehicle_tile
+from simulation import SimulationModel
+from capture import FrameCapture, PeriodicSnapshots
+from snapshot import SnapshotBuffer, SimulationThread
+from telemetry import TelemetryServer
+from twin import TwinSimulation
+from demand import PROFILES
 from entities.scoreboard import Scoreboard, Logo, ERTSLogo, AnalysisDisplay, AnalysisSettings
-from entities.traffic_light import TrafficLight, IntersectionManager
-from entities.vehicle import Vehicle, EmergencyVehicle, generate_vehicle, generate_emergency_vehicle
 
 
-# Initialize pygame
-pg.init()
-WIN = pg.display.set_mode((WIDTH, HEIGHT))
-pg.display.set_caption("ClearPath Simulation")
-clock = pg.time.Clock()
+def create_window(width=WIDTH):
+    """
+    Initialize pygame and open the simulation window.
 
+    Args:
+        width (int): Width of the window in pixels (twice WIDTH for side-by-side twins).
 
-class Simulation:
+    Returns:
+        tuple: The pygame window (Surface) and clock (Clock).
     """
-    Class to represent the simulation environment.
-    
-    Manages the entire simulation including vehicles, traffic lights, collisions, and analysis mode.
+    pg.init()
+    win = pg.display.set_mode((width, HEIGHT))
+    pg.display.set_caption("ClearPath Simulation")
+    return win, pg.time.Clock()
+
+
+class Simulation(SimulationModel):
+    """
+    Class to represent the interactive simulation: the simulation model plus its window, rendering and controls.
 
     Attributes:
         - win (Surface): The pygame window.
         - clock (Clock): The pygame clock.
-        - city (CityGrid): The city grid object.
-        - ew_traffic_lights (list): List of east-west traffic lights.
-        - ns_traffic_lights (list): List of north-south traffic lights.
-        - traffic_lights (list): List of all traffic lights.
         - split_tiles (list): List of split tiles that connect two lights.
-        - vehicles (list): List of all vehicles in the simulation.
-        - intersection_manager (IntersectionManager): The intersection manager object.
-        - direction_count (dict): Dictionary to track the number of vehicles in each direction.
-        - collision_count (int): The total number of collisions in the simulation.
-        - collision_pairs (dict): Dictionary to track counted collisions.
-        - collision_cooldown (dict): Dictionary to track cooldowns for collisions.
         - scoreboard (Scoreboard): The scoreboard object.
         - logo (Logo): The ClearPath logo object.
         - erts_logo (ERTSLogo): The ERTS logo object.
         - analysis_settings (AnalysisSettings): The analysis settings object.
-        - analysis_phase_duration (int): The duration of the analysis phase.
-        - analysis_timer (int): Timer to track the analysis phase.
-        - analysis_mode (bool): Flag to indicate if the simulation is in analysis mode.
-        - analysis_results_ready (bool): Flag to indicate if the analysis results are ready to be displayed.
-        - analytics (Analytics): The analytics object -- tracks collision rates, etc
         - analysis_display (AnalysisDisplay): The analysis display object.
-        - analysis_time_buffer (int): Buffer to account for time spent in other modes.
-        - veh_ct (int): Total number of vehicles added to the simulation. (used for analytics)
-        - emveh_ct (int): Total number of emergency vehicles added to the simulation. (used for analytics)
         - paused (bool): Flag to indicate if the simulation is paused.
+        - capture (FrameCapture): The active frame recorder (None when not recording).
+        - snapshots (PeriodicSnapshots): Snapshot trigger and writer of a headless run (None otherwise).
+        - (plus every attribute of SimulationModel)
 
     Methods:
         - run: Main loop for the simulation.
-        - update: Update the simulation state.
+        - run_threaded: Main loop with the simulation stepping on its own thread.
         - draw: Draw the simulation on the screen.
+        - draw_snapshot: Draw a snapshot published by the simulation thread.
+        - update: Advance the simulation, saving a snapshot if one is due.
         - handle_keydown: Handle keypress events for controlling the simulation.
-        - toggle_clearpath: Toggle the ClearPath mode.
         - reset_simulation: Reset the simulation to its initial state.
         - toggle_pause: Toggle the paused state of the simulation.
+        - toggle_capture: Start or stop recording rendered frames.
         - start_analysis: Start the analysis mode.
-        - update_analysis: Update the analysis phase.
-        - record_analysis_result: Record the current collision count during the analysis phase.
-        - activate_clearpath: Activate the ClearPath system.
+        - begin_analysis: Enable analysis mode with a given phase duration (no settings screen).
         - end_analysis: End the analysis phase.
-        - add_vehicle: Add a vehicle to the simulation.
         - quit: Quit the simulation and close the pygame window.
+        - (plus every method of SimulationModel)
     """
-    def __init__(self, win, clock):
+    def __init__(self, win, clock, config=DEFAULT_CONFIG):
         """
         Initialize the simulation environment.
         
         Args:
             win (Surface): The pygame window.
             clock (Clock): The pygame clock.
+            config (SimConfig): The simulation parameters.
         """
+        super().__init__(config)
         self.win = win
         self.clock = clock
-        self.city = CityGrid(GRID_SIZE)
-        self.city.set_city_elements()
-        self.ew_traffic_lights = [
-            TrafficLight(10, 9, 'GREEN'), TrafficLight(10, 14, 'GREEN'),
-            TrafficLight(13, 9, 'GREEN'), TrafficLight(13, 14, 'GREEN')
-        ]
-        self.ns_traffic_lights = [
-            TrafficLight(9, 10), TrafficLight(14, 10),
-            TrafficLight(9, 13), TrafficLight(14, 13)
-        ]
-        self.traffic_lights = self.ew_traffic_lights + self.ns_traffic_lights
         self.split_tiles = [(10,10), (10,13), (13,10), (13,13)]
-        self.vehicles = []
-        self.intersection_manager = IntersectionManager(self.city.grid, self.ew_traffic_lights, self.ns_traffic_lights)
-        self.direction_count = {"N": 0, "S": 0, "E": 0, "W": 0}
-        self.collision_count = 0
-        self.collision_pairs = {}
-        self.collision_cooldown = {}
         self.scoreboard = Scoreboard()
         self.logo = Logo()
         self.erts_logo = ERTSLogo()
         self.analysis_settings = AnalysisSettings()
-        self.analysis_phase_duration = 300
-        self.analysis_timer = 0
-        self.analysis_mode = False
-        self.analysis_results_ready = False
-        self.analytics = Analytics()
         self.analysis_display = AnalysisDisplay(self.analytics)
-        self.analysis_time_buffer = 0
-        self.veh_ct = 0
-        self.emveh_ct = 0
         self.paused = False
-
-        # Add traffic lights to city grid data structure
-        for light in self.traffic_lights:
-            self.city.add_traffic_light(light)
+        self.capture = None
+        self.snapshots = None
 
     # ---- Top Level Methods ----
     def run(self):
         """
         Main loop for the simulation.
         Handles event processing, updates, and rendering.
+
+        While paused (including on the analysis results), the loop blocks waiting for input instead of
+        polling, and only redraws when a key press may have changed what is shown.
         """
         running = True
         while running:
-            for event in pg.event.get():
+            events = wait_for_events() if self.paused else pg.event.get()
+            for event in events:
                 if event.type == pg.QUIT:
                     self.quit()
                 if event.type == pg.KEYDOWN:
                     self.handle_keydown(event)
 
             if not self.paused:
-                self.update()
+                self.update(DEFAULT_DT)
+                self.draw()
+                pg.display.flip()
+                if self.capture:
+                    self.capture.capture(self.win)
+                self.clock.tick(FPS)
+            elif needs_redraw(events):
                 self.draw()
                 pg.display.flip()
-                self.clock.tick(60)
         self.quit()
 
-    def update(self):
+    def run_threaded(self, speed=1.0):
         """
-        Update the simulation state, including vehicle movements, traffic light changes, and collisions.
-        """
-
-        # Analysis Mode
-        if self.analysis_mode:
-            self.update_analysis()
-            self.analytics.update(self.collision_count, self.veh_ct, self.emveh_ct, self.analysis_mode)
-
-        # Remove off-screen vehicles
-        vehicles_to_remove = [vehicle for vehicle in self.vehicles if vehicle.is_off_screen()]
-
-        # Update vehicles 
-        for vehicle in self.vehicles:
-            if vehicle.four_way_state == "waiting" and vehicle not in self.intersection_manager.vehicles_at_intersection:
-                self.intersection_manager.vehicles_at_intersection.append(vehicle)
-            vehicle.move()
-            
-        # Update traffic lights
-        for light in self.traffic_lights:
-            light.update()
-
-        # Flash Emergency Vehicle Lights
-        for vehicle in self.vehicles:
-            if isinstance(vehicle, EmergencyVehicle):
-                vehicle.flash_lights()
+        Main loop with the simulation stepping on its own thread at `speed` times real time.
 
-        # Have vehicles check behind for oncoming emergency vehicles
-        for vehicle in self.vehicles:
-            if not isinstance(vehicle, EmergencyVehicle):
-                vehicle.check_behind(self.vehicles)
-
-        # Add new vehicles
-        if random.random() < FREQUENCY_OF_EVENTS:
-            x, y, direction, color = generate_vehicle()
-            self.add_vehicle(direction, x, y, color)
-
-        # Add new emergency vehicles
-        if random.random() < FREQUENCY_OF_EVENTS / 5:
-            x, y, direction, color = generate_emergency_vehicle()
-            self.vehicles.append(EmergencyVehicle(x, y, direction, self.city))
-            self.emveh_ct += 1
-
-        # Check for collisions
-        if len(self.vehicles) > 1:
-            self.collision_count = collision_counter(self.vehicles, self.collision_count, self.collision_pairs, self.collision_cooldown)
-
-            # Update ERTS collision counters for analysis display element
-            if self.analysis_mode:
-                if self.analytics.phase_two_active:
-                    self.analytics.erts_collision_count = self.collision_count        # Save to analytics object
-                else:
-                    self.analytics.no_erts_collision_count = self.collision_count
-
-        self.scoreboard.update_collision_count(self.collision_count)
-
-        # Provide list of emergency vehicles to the city grid (used for 4-way look_both_ways())
-        emergency_vehicles = [vehicle for vehicle in self.vehicles if isinstance(vehicle, EmergencyVehicle)]
-        self.city.active_emergency_vehicles = emergency_vehicles
-
-        # Remove off-screen vehicles
-        for vehicle in vehicles_to_remove:
-            self.vehicles.remove(vehicle)
-            if not isinstance(vehicle, EmergencyVehicle):
-                self.direction_count[vehicle.direction] -= 1
+        The render loop draws the latest published snapshot at the display rate, so a slow draw no longer
+        holds back the simulation and an accelerated simulation still displays smoothly. Input that changes
+        the simulation is applied while holding the simulation thread's lock.
 
-        # Update the grid to reflect the current state of the intersection
-        self.intersection_manager.update_intersection()
+        Args:
+            speed (float): Simulated seconds per real second (None for as fast as possible).
+        """
+        buffer = SnapshotBuffer()
+        thread = SimulationThread(self, buffer, speed)
+        thread.start()
+        last_drawn = None
+        try:
+            while True:
+                # While paused no new snapshots arrive, so wait for input (the timeout still picks up the
+                # results snapshot, published just after the simulation pauses itself on it)
+                events = wait_for_events() if self.paused else pg.event.get()
+                for event in events:
+                    if event.type == pg.QUIT:
+                        self.quit()
+                    if event.type == pg.KEYDOWN:
+                        if event.key == pg.K_p or event.key == pg.K_SPACE:
+                            self.paused = not self.paused     # The simulation thread stops stepping while paused
+                        else:
+                            with thread.lock:
+                                self.handle_keydown(event)
+
+                # Only redraw when there is something new (the results screen is drawn once, as in run())
+                snapshot = buffer.latest()
+                if snapshot is not None and snapshot is not last_drawn:
+                    self.draw_snapshot(snapshot)
+                    pg.display.flip()
+                    if self.capture:
+                        self.capture.capture(self.win)
+                    last_drawn = snapshot
+                self.clock.tick(FPS)
+        finally:
+            thread.stop()
 
     def draw(self):
         """
@@ -225,8 +178,9 @@ class Simulation:
             vehicle.draw(self.win)
         
         # Draw the scoreboard or analysis results
+        self.scoreboard.update_collision_count(self.collision_count)
+        self.scoreboard.clearpath_enabled = self.intersection_manager.four_way_active
         if self.analysis_results_ready:
-            self.analytics.finalize_analysis(self.analysis_settings.export_results) # Pass bool from analysis_settings
             self.scoreboard.display_analysis_results(self.win, self.analytics)
         else:
             self.scoreboard.draw(self.win)
@@ -238,6 +192,41 @@ class Simulation:
         self.erts_logo.draw(self.win, self.intersection_manager.four_way_active)
         
         if self.analysis_mode:
+            self.analysis_display.update(self.win, self.analysis_timer)
+
+    def draw_snapshot(self, snapshot):
+        """
+        Draw the simulation from a snapshot instead of the live state (used by run_threaded).
+
+        Args:
+            snapshot (SimulationSnapshot): The snapshot to draw.
+        """
+        self.city.draw(self.win)    # Only static tile types affect how the grid is drawn
+        light_colors = {(x, y): color for x, y, color in snapshot.lights}
+        for (x, y) in self.split_tiles:
+            draw_split_tile(self.win, light_colors[(9, 10)], light_colors[(10, 9)], x, y)
+
+        for x, y, color in snapshot.lights:
+            pg.draw.rect(self.win, color, (y * TILE_SIZE, x * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+        for x, y, color in snapshot.vehicles:
+            draw_vehicle_tile(self.win, x, y, color)
+
+        self.scoreboard.update_collision_count(snapshot.collision_count)
+        self.scoreboard.clearpath_enabled = snapshot.four_way_active
+        self.scoreboard.analysis_mode_active = snapshot.analysis_mode
+        if snapshot.analysis_results_ready:
+            # The simulation is paused on the results, so the analytics are no longer changing
+            self.scoreboard.display_analysis_results(self.win, self.analytics)
+        else:
+            self.scoreboard.draw(self.win)
+
+        self.logo.draw(self.win)
+        self.erts_logo.draw(self.win, snapshot.four_way_active)
+
+        if snapshot.analysis_mode:
+            self.analysis_display.erts_disabled_collision_count = snapshot.no_erts_collision_count
+            self.analysis_display.erts_enabled_collision_count = snapshot.erts_collision_count
+            self.analysis_display.analysis_timer = snapshot.analysis_timer
             self.analysis_display.draw(self.win)
 
     # ---- Helper Methods ----
@@ -259,57 +248,50 @@ class Simulation:
             self.toggle_pause()
         elif event.key == pg.K_a:
             self.start_analysis()
+        elif event.key == pg.K_c:
+            self.toggle_capture()
 
-    def toggle_clearpath(self):
+    def reset_simulation(self):
         """
-        Toggle the ClearPath mode, which activates or deactivates the 4-way red lights.
+        Reset the simulation and its display to their initial state, reusing the loaded fonts and images.
         """
-        if self.intersection_manager.four_way_active:
-            self.intersection_manager.deactivate_four_way_red()
-            self.scoreboard.clearpath_enabled = False
-        else:
-            self.intersection_manager.activate_four_way_red()
-            self.scoreboard.clearpath_enabled = True
+        self.reset_state()
+        self.scoreboard.reset()
+        self.analysis_settings.reset()
+        self.analysis_display.reset(self.analytics)
+        self.paused = False
 
-    def reset_simulation(self):
+    def update(self, dt=DEFAULT_DT, spawn=True):
         """
-        Reset the simulation to its initial state.
+        Advance the simulation by one tick, then, if periodic snapshots are on and one is due (every N
+        ticks, or a collision was just counted), draw the simulation and queue it for writing. Ticks
+        without a snapshot due cost one comparison more than SimulationModel.update.
+
+        Args:
+            - dt (float): Seconds of simulated time to advance.
+            - spawn (bool): Whether to spawn new vehicles this tick.
         """
-        self.__init__(self.win, self.clock)
+        super().update(dt, spawn)
+        if self.snapshots and self.snapshots.due(self.tick, self.collisions_this_tick > 0):
+            self.draw()
+            self.snapshots.save(self.win, self.tick)
 
     def toggle_pause(self):
         """
-        Toggle the paused state of the simulation.
+        Toggle the paused state of the simulation (the run loop waits for input while paused).
         """
         self.paused = not self.paused
-        while self.paused:
-            for event in pg.event.get():
-                if event.type == pg.KEYDOWN:
-                    self.handle_keydown(event)
-                if event.type == pg.QUIT:
-                    self.quit()
 
-    def add_vehicle(self, direction, x, y, color):
+    def toggle_capture(self):
         """
-        Add a vehicle to the simulation.
-        
-        Args:
-            direction (str): The direction the vehicle is traveling.
-            x (int): The x-coordinate of the vehicle.
-            y (int): The y-coordinate of the vehicle.
-            color (tuple): The color of the vehicle.
+        Start recording rendered frames in the background, or stop and finish writing the recording.
         """
-        # Determine direction to set higher limits when light is green
-        light_coords = (9, 10) if direction in ["N", "S"] else (10, 9)
-        
-        if self.direction_count[direction] < 12 and self.intersection_manager.get_light_color(self.traffic_lights, light_coords[0] , light_coords[1]) == (0, 255, 0):
-            self.direction_count[direction] += 1
-            self.vehicles.append(Vehicle(x, y, direction, self.city, color))
-            self.veh_ct += 1
-        elif self.direction_count[direction] < 4:
-            self.direction_count[direction] += 1
-            self.vehicles.append(Vehicle(x, y, direction, self.city, color))
-            self.veh_ct += 1
+        if self.capture:
+            path = self.capture.close()
+            print(f"Capture saved to {path} ({self.capture.written} frames, {self.capture.dropped} dropped)")
+            self.capture = None
+        else:
+            self.capture = FrameCapture()
 
     def start_analysis(self):
         """
@@ -319,80 +301,145 @@ class Simulation:
         good_to_go = self.analysis_settings.get_analysis_settings(self.win)
         if not good_to_go:
             return
-        phase_duration = self.analysis_settings.analysis_time
-        self.analytics.phase_duration = phase_duration
-        self.analysis_phase_duration = phase_duration
-        self.analysis_time_buffer = pg.time.get_ticks()    # To account for time spent in other modes
-        self.analysis_mode = True
-        self.scoreboard.analysis_mode_active = True
-        self.scoreboard.analysis_start_time = pg.time.get_ticks()
-        self.analysis_timer = self.analysis_phase_duration - (pg.time.get_ticks() - self.analysis_time_buffer) // 1000
+        paired_seed = random.randrange(2 ** 32) if self.analysis_settings.paired else None
+        self.begin_analysis(self.analysis_settings.analysis_time, paired_seed)
         self.analysis_display.update(self.win, self.analysis_timer)
 
-    def update_analysis(self):
+    def begin_analysis(self, phase_duration, paired_seed=None):
         """
-        Records results at the end of each phase and updates the analysis display.
-        """
-        self.analysis_display.update(self.win, self.analysis_timer)
+        Enable analysis mode with the given phase duration and start the scoreboard's analysis timer.
 
-        if self.analytics.phase_two_active:
-            self.analysis_timer = self.analysis_phase_duration * 2 - (pg.time.get_ticks() - self.analysis_time_buffer) // 1000
-        else:
-            self.analysis_timer = self.analysis_phase_duration - (pg.time.get_ticks() - self.analysis_time_buffer) // 1000
-
-        if self.analysis_timer <= 0 and not self.analytics.phase_two_active:
-            self.record_analysis_result()
-            self.activate_clearpath()
-            self.analytics.phase_two_active = True
-        elif self.analysis_timer <= 0 and self.analytics.phase_two_active:
-            self.record_analysis_result()
-            self.end_analysis()
-            self.analysis_display.active = False
-            self.analytics.phase_two_active = False
-
-    def record_analysis_result(self):
-        """
-        Record the current collision count during the analysis phase.
-        """
-        self.analytics.update(self.collision_count, self.veh_ct, self.emveh_ct, self.analysis_mode)
-        self.collision_count = 0
-        self.veh_ct = 0
-        self.emveh_ct = 0
-
-    def activate_clearpath(self):
-        """
-        Activate the ClearPath system and reset the collision count.
+        Args:
+            phase_duration (int): Seconds of simulated time per phase (ERTS off, then ERTS on).
+            paired_seed (int): Seed of the traffic replayed in both phases (None for independent random traffic).
         """
-        self.scoreboard.clearpath_enabled = True
-        self.intersection_manager.activate_four_way_red()
+        super().begin_analysis(phase_duration, paired_seed)
+        self.scoreboard.analysis_mode_active = True
+        self.scoreboard.analysis_start_time = pg.time.get_ticks()
 
     def end_analysis(self):
         """
-        End the analysis phase and display the results.
+        End the analysis phase, finalize (and optionally export) the results once, and pause on the results screen.
         """
-        self.analysis_mode = False
+        super().end_analysis()
+        self.analytics.finalize_analysis(self.analysis_settings.export_results)    # Pass bool from analysis_settings
         self.scoreboard.analysis_mode_active = False
-        self.scoreboard.clearpath_enabled = False
-        self.intersection_manager.deactivate_four_way_red()
-        self.analysis_timer = 0
-        self.collision_count = 0
         self.paused = True
-        self.analysis_results_ready = True
-        print("----------------------------------------")
-        print("END OF ANALYSIS")
-        print(self.analytics.__repr__())
-        print("----------------------------------------")
 
     def quit(self):
         """
         Quit the simulation and close the pygame window.
         """
+        if self.capture:
+            self.toggle_capture()
         pg.quit()
         sys.exit()
 
 
+def run_twin(seed, config=DEFAULT_CONFIG, profile=None):
+    """
+    Show ERTS off (left) and ERTS on (right) side by side, stepping in lockstep on identical traffic.
+
+    Controls: 'p'/space to pause, 'r' to restart both from the start of the traffic, 'q'/esc to quit.
+
+    Args:
+        seed (int): Seed of the shared traffic.
+        config (SimConfig): The simulation parameters.
+        profile (DemandProfile): Demand profile of the shared traffic (None for constant rates).
+    """
+    win, clock = create_window(WIDTH * 2)
+    off = Simulation(win.subsurface((0, 0, WIDTH, HEIGHT)), clock, config)
+    on = Simulation(win.subsurface((WIDTH, 0, WIDTH, HEIGHT)), clock, config)
+    twin = TwinSimulation(seed, config, off, on, profile)
+    paused = False
+    while True:
+        events = wait_for_events() if paused else pg.event.get()
+        for event in events:
+            if event.type == pg.QUIT:
+                off.quit()
+            if event.type == pg.KEYDOWN:
+                if event.key == pg.K_ESCAPE or event.key == pg.K_q:
+                    off.quit()
+                elif event.key == pg.K_p or event.key == pg.K_SPACE:
+                    paused = not paused
+                elif event.key == pg.K_r:
+                    twin.reset()
+
+        if not paused:
+            twin.update(DEFAULT_DT)
+            off.draw()
+            on.draw()
+            pg.display.flip()
+            clock.tick(FPS)
+        elif needs_redraw(events):
+            off.draw()
+            on.draw()
+            pg.display.flip()
+
+
+def run_headless(duration, every_n_ticks=SNAPSHOT_EVERY_N_TICKS, on_collision=SNAPSHOT_ON_COLLISION,
+                 config=DEFAULT_CONFIG, profile=None):
+    """
+    Run the simulation without a window, rendering into an offscreen surface only when a PNG snapshot
+    is due, and writing the snapshots on a background thread.
+
+    Args:
+        duration (float): Seconds of simulated time to run.
+        every_n_ticks (int): Save a snapshot every N ticks (0 for none).
+        on_collision (bool): Also save a snapshot after every tick that counts a collision.
+        config (SimConfig): The simulation parameters.
+        profile (DemandProfile): Demand profile to spawn from (None for constant rates).
+
+    Returns:
+        Simulation: The simulation, at the end of the run.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pg.init()
+    sim = Simulation(pg.Surface((WIDTH, HEIGHT)), pg.time.Clock(), config)
+    if profile:
+        sim.set_demand_profile(profile, random.randrange(2 ** 32))
+    sim.snapshots = PeriodicSnapshots(every_n_ticks, on_collision)
+    for _ in range(round(duration / DEFAULT_DT)):
+        sim.update(DEFAULT_DT)
+    path = sim.snapshots.close()
+    print(f"Ran {sim.tick} ticks: {sim.collision_count} collisions, {sim.snapshots.writer.written} snapshots saved to {path}")
+    return sim
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ClearPath intersection simulation.")
+    parser.add_argument("--capture", action="store_true", help="record frames from the start")
+    parser.add_argument("--threaded", action="store_true", help="step the simulation on its own thread")
+    parser.add_argument("--speed", type=float, default=1.0, help="simulated seconds per real second (with --threaded)")
+    parser.add_argument("--twin", type=int, nargs="?", const=0, default=None, metavar="SEED",
+                        help="show ERTS off and on side by side on the same traffic")
+    parser.add_argument("--profile", choices=sorted(PROFILES), help="spawn from a demand profile instead of constant rates")
+    parser.add_argument("--telemetry", type=int, nargs="?", const=TELEMETRY_PORT, default=None, metavar="PORT",
+                        help="stream live telemetry from http://127.0.0.1:PORT/events")
+    parser.add_argument("--headless", type=float, metavar="SECONDS",
+                        help="run for SECONDS of simulated time without a window, saving PNG snapshots")
+    parser.add_argument("--snapshot-every", type=int, default=SNAPSHOT_EVERY_N_TICKS, metavar="N",
+                        help="ticks between snapshots (with --headless, 0 for none)")
+    parser.add_argument("--no-collision-snapshots", action="store_true",
+                        help="don't save a snapshot on every collision (with --headless)")
+    args = parser.parse_args()
+
+    if args.headless is not None:
+        run_headless(args.headless, args.snapshot_every, not args.no_collision_snapshots,
+                     profile=PROFILES.get(args.profile))
+        sys.exit()
+    if args.twin is not None:
+        run_twin(args.twin, profile=PROFILES.get(args.profile))
+
+    WIN, clock = create_window()
     sim = Simulation(WIN, clock)
-    sim.run()
+    if args.profile:
+        sim.set_demand_profile(PROFILES[args.profile], random.randrange(2 ** 32))
+    if args.telemetry is not None:
+        sim.telemetry = TelemetryServer(port=args.telemetry).start()
+    if args.capture:
+        sim.toggle_capture()
+    if args.threaded:
+        sim.run_threaded(args.speed)
+    else:
+        sim.run()
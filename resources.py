@@ -0,0 +1,49 @@
+import pygame as pg
+
+
+# Process-wide caches, so every font and image is loaded from disk once however many times the UI is rebuilt
+_fonts = {}
+_images = {}
+
+
+def get_font(size, name=None):
+    """
+    Get a font, loading it on first use.
+
+    Args:
+        - size (int): Font size in pixels.
+        - name (str): Path of the font file (None for the pygame default font).
+
+    Returns:
+        - Font: The shared font object.
+    """
+    key = (name, size)
+    if key not in _fonts:
+        _fonts[key] = pg.font.Font(name, size)
+    return _fonts[key]
+
+
+def get_image(path, size=None):
+    """
+    Get an image, loading (and scaling) it on first use.
+
+    Args:
+        - path (str): Path of the image file.
+        - size (tuple): (width, height) to scale the image to (None to keep its size).
+
+    Returns:
+        - Surface: The shared image surface (don't draw onto it).
+    """
+    key = (path, size)
+    if key not in _images:
+        image = pg.image.load(path) if size is None else pg.transform.scale(get_image(path), size)
+        _images[key] = image
+    return _images[key]
+
+
+def clear_resources():
+    """
+    Drop every cached font and image (e.g. before pygame is shut down and reinitialized).
+    """
+    _fonts.clear()
+    _images.clear()
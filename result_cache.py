@@ -0,0 +1,171 @@
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+
+from config import RESULT_CACHE_DIR, RESULT_CACHE_MAX_ENTRIES
+
+
+# Source files whose contents determine simulation results
+SIMULATION_SOURCES = (
+    'analytics.py', 'city.py', 'config.py', 'demand.py', 'event_engine.py', 'helpers.py', 'histogram.py', 'kernels.py',
+    'main.py', 'simulation.py', 'spawn_stream.py',
+    os.path.join('entities', 'traffic_light.py'), os.path.join('entities', 'vehicle.py'),
+)
+
+_code_version = None
+
+
+def simulation_code_version():
+    """
+    Hash the simulation source files, so cached results are invalidated whenever the code changes.
+
+    Returns:
+        - str: Hex digest of the simulation sources (computed once per process).
+    """
+    global _code_version
+    if _code_version is None:
+        root = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for name in SIMULATION_SOURCES:
+            digest.update(name.encode())
+            with open(os.path.join(root, name), 'rb') as file:
+                digest.update(file.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+class ResultCache:
+    """
+    On-disk cache of analysis results, keyed by a hash of everything that determines the result.
+
+    Each entry is a small JSON file named after its key. Writes go to a temporary file that is then
+    renamed into place, so concurrent sweep workers never see a partial entry. Hits refresh the file's
+    modification time, and the least recently used entries are evicted once the cache grows past
+    max_entries.
+
+    Attributes:
+        - directory (str): Directory holding the cache entries
+        - max_entries (int): Number of entries kept before the least recently used are evicted
+
+    Methods:
+        - make_key: Build the cache key for a run
+        - get: Look up a cached result
+        - put: Store a result
+        - evict: Remove the least recently used entries beyond max_entries
+        - clear: Remove every entry
+    """
+    def __init__(self, directory=RESULT_CACHE_DIR, max_entries=RESULT_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self.entry_paths())
+
+    @staticmethod
+    def make_key(config, seed, phase_duration, code_version=None):
+        """
+        Build the cache key for a run.
+
+        Args:
+            - config (SimConfig): The simulation parameters.
+            - seed (int): Seed for the random number generator.
+            - phase_duration (int): Seconds of simulated time per phase.
+            - code_version (str): Version of the simulation code (defaults to a hash of its sources).
+
+        Returns:
+            - str: Hex digest identifying the run.
+        """
+        payload = {
+            'config': dataclasses.asdict(config),
+            'seed': seed,
+            'phase_duration': phase_duration,
+            'code_version': code_version or simulation_code_version(),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def entry_path(self, key):
+        """
+        Returns:
+            - str: Path of the entry file for a key.
+        """
+        return os.path.join(self.directory, f"{key}.json")
+
+    def entry_paths(self):
+        """
+        Returns:
+            - list: Paths of every entry file in the cache.
+        """
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.json')]
+
+    def get(self, key):
+        """
+        Look up a cached result.
+
+        Args:
+            - key (str): Key from make_key.
+
+        Returns:
+            - dict: The cached Analytics summary, or None on a miss.
+        """
+        path = self.entry_path(key)
+        try:
+            with open(path) as file:
+                summary = json.load(file)
+            os.utime(path)      # Mark as recently used
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return summary
+
+    def put(self, key, summary):
+        """
+        Store a result atomically, then evict old entries if the cache is over its size bound.
+
+        Args:
+            - key (str): Key from make_key.
+            - summary (dict): The Analytics summary to store.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(summary, file)
+            os.replace(temp_path, self.entry_path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries beyond max_entries.
+
+        Modifies:
+            - directory: Deletes the oldest entry files.
+        """
+        paths = self.entry_paths()
+        if len(paths) <= self.max_entries:
+            return
+
+        def last_used(path):
+            try:
+                return os.path.getmtime(path)
+            except FileNotFoundError:
+                return 0
+
+        for path in sorted(paths, key=last_used)[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass    # Already evicted by another worker
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        for path in self.entry_paths():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
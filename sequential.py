@@ -0,0 +1,159 @@
+import math
+from statistics import NormalDist
+
+from config import SEQUENTIAL_BLOCK_DURATION, SEQUENTIAL_CONFIDENCE, SEQUENTIAL_MIN_PAIRS, SEQUENTIAL_MAX_PAIRS
+from event_engine import EventDrivenSimulation
+
+
+def t_critical(confidence, df):
+    """
+    Two-sided Student t critical value, from the normal quantile with the Cornish-Fisher expansion
+    (accurate to about 1% for df >= 4, without needing scipy).
+
+    Args:
+        - confidence (float): Confidence level, e.g. 0.95.
+        - df (int): Degrees of freedom.
+
+    Returns:
+        - float: The critical value.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+
+
+class SequentialTest:
+    """
+    Running confidence interval on the paired difference in collision rate (ERTS off minus ERTS on).
+
+    Attributes:
+        - confidence (float): Confidence level of the interval
+        - differences (list): Collision rate difference of each completed block pair
+
+    Methods:
+        - add_pair: Record the collision rates of one ERTS off / ERTS on block pair
+        - mean: Mean difference so far
+        - half_width: Half-width of the confidence interval on the mean difference
+    """
+    def __init__(self, confidence=SEQUENTIAL_CONFIDENCE):
+        self.confidence = confidence
+        self.differences = []
+
+    def __len__(self):
+        return len(self.differences)
+
+    def add_pair(self, no_erts_rate, erts_rate):
+        """
+        Record the collision rates of one ERTS off / ERTS on block pair.
+
+        Args:
+            - no_erts_rate (float): Collisions per emergency vehicle with ERTS inactive.
+            - erts_rate (float): Collisions per emergency vehicle with ERTS active.
+        """
+        self.differences.append(no_erts_rate - erts_rate)
+
+    def mean(self):
+        """
+        Returns:
+            - float: Mean difference so far (0 before any pairs).
+        """
+        return sum(self.differences) / len(self.differences) if self.differences else 0
+
+    def half_width(self):
+        """
+        Returns:
+            - float: Half-width of the confidence interval on the mean difference (infinity with fewer than 2 pairs).
+        """
+        n = len(self.differences)
+        if n < 2:
+            return float('inf')
+        mean = self.mean()
+        variance = sum((d - mean) ** 2 for d in self.differences) / (n - 1)
+        return t_critical(self.confidence, n - 1) * math.sqrt(variance / n)
+
+
+def run_sequential_analysis(simulation, precision, block_duration=SEQUENTIAL_BLOCK_DURATION, confidence=SEQUENTIAL_CONFIDENCE,
+                            min_pairs=SEQUENTIAL_MIN_PAIRS, max_pairs=SEQUENTIAL_MAX_PAIRS, export=False):
+    """
+    Compare ERTS off and on in alternating blocks, stopping once the collision rate difference is known to
+    the requested precision instead of running two fixed-length phases.
+
+    Each pair runs one block with ERTS inactive and one with it active, alternating which comes first
+    (off/on, then on/off) so carry-over between blocks cancels out. After every pair the confidence
+    interval on the mean rate difference is updated, and the analysis stops once its half-width is at
+    most `precision` (after at least `min_pairs` pairs), or after `max_pairs` pairs.
+
+    Args:
+        - simulation (SimulationModel): A freshly reset simulation.
+        - precision (float): Target confidence interval half-width, in collisions per emergency vehicle.
+        - block_duration (float): Seconds of simulated time per block.
+        - confidence (float): Confidence level of the interval.
+        - min_pairs (int): Pairs to run before stopping is considered.
+        - max_pairs (int): Pairs to run at most.
+        - export (bool): Whether to export the results to JSON.
+
+    Returns:
+        - dict: The analytics summary plus the pairs run, mean difference, interval half-width and whether
+          the requested precision was reached.
+    """
+    engine = EventDrivenSimulation(simulation)
+    analytics = simulation.analytics
+    test = SequentialTest(confidence)
+    totals = {True: [0, 0, 0], False: [0, 0, 0]}     # ERTS active -> [collisions, cars, emergency vehicles]
+    kpis = {True: analytics.erts_kpis, False: analytics.no_erts_kpis}
+
+    while len(test) < max_pairs:
+        order = (False, True) if len(test) % 2 == 0 else (True, False)
+        rates = {}
+        for erts_active in order:
+            if erts_active:
+                simulation.intersection_manager.activate_four_way_red()
+            else:
+                simulation.intersection_manager.deactivate_four_way_red()
+            simulation.collision_count = 0
+            simulation.veh_ct = 0
+            simulation.emveh_ct = 0
+            simulation.kpis = kpis[erts_active]
+
+            engine.run(block_duration)
+
+            collisions, cars, emergencies = simulation.collision_count, simulation.veh_ct, simulation.emveh_ct
+            rates[erts_active] = collisions / emergencies if emergencies > 0 else 0
+            for i, count in enumerate((collisions, cars, emergencies)):
+                totals[erts_active][i] += count
+
+        test.add_pair(rates[False], rates[True])
+        if len(test) >= min_pairs and test.half_width() <= precision:
+            break
+
+    # Report the pooled blocks through Analytics, like a regular two-phase analysis
+    analytics.no_erts_collision_count, analytics.no_erts_car_count, analytics.no_erts_emergency_count = totals[False]
+    analytics.erts_collision_count, analytics.erts_car_count, analytics.erts_emergency_count = totals[True]
+    analytics.phase_duration = int(block_duration * len(test))
+    analytics.finalize_analysis(export)
+
+    result = analytics.summary()
+    result.update({
+        "pairs": len(test),
+        "simulated_seconds": simulation.sim_time,
+        "mean_rate_difference": test.mean(),
+        "half_width": test.half_width(),
+        "precision_reached": test.half_width() <= precision,
+    })
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from simulation import SimulationModel
+
+    parser = argparse.ArgumentParser(description="Run an ERTS off/on analysis that stops once the result is precise enough.")
+    parser.add_argument("precision", type=float, help="target confidence interval half-width (collisions per emergency vehicle)")
+    parser.add_argument("--block", type=float, default=SEQUENTIAL_BLOCK_DURATION, help="seconds of simulated time per block")
+    parser.add_argument("--confidence", type=float, default=SEQUENTIAL_CONFIDENCE)
+    parser.add_argument("--export", action="store_true", help="export the results to JSON")
+    args = parser.parse_args()
+
+    result = run_sequential_analysis(SimulationModel(), args.precision, args.block, args.confidence, export=args.export)
+    for key, value in result.items():
+        print(f"{key}: {value}")
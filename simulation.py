@@ -0,0 +1,496 @@
+import random
+
+from analytics import Analytics, new_kpi_histograms
+import kernels
+from config import DEFAULT_DT, DEFAULT_CONFIG, DEBUG_OCCUPANCY, KPI_SAMPLE_INTERVAL, NUMBA_KERNELS
+from city import CityGrid
+from helpers import collision_counter, poisson_arrivals, CollisionRegistry
+from entities.traffic_light import TrafficLight, IntersectionManager
+from entities.vehicle import Vehicle, EmergencyVehicle, generate_vehicle, generate_emergency_vehicle
+from spawn_stream import SpawnStream
+from demand import compile_schedule
+
+
+class SimulationModel:
+    """
+    The simulation model: grid, vehicles, traffic lights, collisions and analysis, without any display.
+
+    Nothing here imports pygame, so headless runs (the event-driven engine, sweep workers) start quickly
+    and stay small. The interactive window in main.py subclasses this and adds rendering and input.
+
+    Attributes:
+        - config (SimConfig): The simulation parameters.
+        - city (CityGrid): The city grid object.
+        - ew_traffic_lights (list): List of east-west traffic lights.
+        - ns_traffic_lights (list): List of north-south traffic lights.
+        - traffic_lights (list): List of all traffic lights.
+        - vehicles (list): List of all vehicles in the simulation.
+        - intersection_manager (IntersectionManager): The intersection manager object.
+        - direction_count (dict): Dictionary to track the number of vehicles in each direction.
+        - collision_count (int): The total number of collisions in the simulation.
+        - collisions_this_tick (int): The number of new collisions counted by the last update.
+        - collision_registry (CollisionRegistry): Tracks vehicle pairs in contact so each collision is counted once.
+        - tick (int): Number of simulation updates since the last reset.
+        - sim_time (float): Seconds of simulated time since the last reset.
+        - free_flow_enabled (bool): Flag to move unconstrained vehicles analytically instead of checking them every tick.
+        - use_kernels (bool): Flag to move vehicles and find collisions with the compiled kernels (on when numba is installed).
+        - analysis_phase_duration (int): The duration of the analysis phase.
+        - analysis_timer (int): Timer to track the analysis phase.
+        - analysis_mode (bool): Flag to indicate if the simulation is in analysis mode.
+        - analysis_paired (bool): Flag to replay the same traffic in both analysis phases, from a fresh grid.
+        - analysis_results_ready (bool): Flag to indicate if the analysis results are ready to be displayed.
+        - analytics (Analytics): The analytics object -- tracks collision rates, etc
+        - analysis_start_time (float): Simulation time at which the analysis started.
+        - veh_ct (int): Total number of vehicles added to the simulation. (used for analytics)
+        - emveh_ct (int): Total number of emergency vehicles added to the simulation. (used for analytics)
+        - spawn_stream (SpawnStream): Pre-drawn arrivals the simulation spawns from (None to roll for arrivals every tick).
+        - demand_schedule (ArrivalSchedule): Arrivals compiled from a demand profile, replayed after every reset (None for constant rates).
+        - spawn_cap_lights (dict): The light whose state sets each direction's vehicle limit.
+        - telemetry (TelemetryServer): Optional server that the state is published to after every update.
+        - kpis (dict): KPI histograms being recorded into (the current phase's during an analysis).
+        - next_queue_sample (float): Simulation time of the next queue length sample.
+
+    Methods:
+        - update: Update the simulation state.
+        - reset_state: Clear all mutable simulation state in place.
+        - toggle_clearpath: Toggle the ClearPath mode.
+        - reset_simulation: Reset the simulation to its initial state.
+        - begin_analysis: Enable analysis mode with a given phase duration.
+        - update_analysis: Update the analysis phase.
+        - record_analysis_result: Record the current collision count during the analysis phase.
+        - activate_clearpath: Activate the ClearPath system.
+        - end_analysis: End the analysis phase.
+        - set_demand_profile: Spawn from a demand profile instead of constant rates.
+        - random_spawn_stream: Start a new stream of pre-drawn random arrivals.
+        - restart_traffic: Clear the grid and replay the spawn stream from the start (paired analysis).
+        - spawn_vehicle: Generate a random vehicle and add it to the simulation.
+        - spawn_emergency_vehicle: Generate a random emergency vehicle and add it to the simulation.
+        - spawn_due_arrivals: Spawn the spawn stream's arrivals that are due.
+        - add_vehicle: Add a vehicle to the simulation.
+        - add_emergency_vehicle: Add an emergency vehicle to the simulation.
+        - queue_lengths: Count the queued vehicles on each approach.
+        - sample_queues: Record the queue lengths for every sample time passed.
+        - record_trip: Record the KPIs of a vehicle leaving the grid.
+    """
+    def __init__(self, config=DEFAULT_CONFIG):
+        """
+        Initialize the simulation model.
+        
+        Args:
+            config (SimConfig): The simulation parameters.
+        """
+        self.config = config
+        self.city = CityGrid(config.grid_size)
+        self.city.set_city_elements()
+        self.ew_traffic_lights = [
+            TrafficLight(10, 9, 'GREEN', config), TrafficLight(10, 14, 'GREEN', config),
+            TrafficLight(13, 9, 'GREEN', config), TrafficLight(13, 14, 'GREEN', config)
+        ]
+        self.ns_traffic_lights = [
+            TrafficLight(9, 10, config=config), TrafficLight(14, 10, config=config),
+            TrafficLight(9, 13, config=config), TrafficLight(14, 13, config=config)
+        ]
+        self.traffic_lights = self.ew_traffic_lights + self.ns_traffic_lights
+        self.vehicles = []
+        self.intersection_manager = IntersectionManager(self.city, self.ew_traffic_lights, self.ns_traffic_lights, config)
+        self.collision_registry = CollisionRegistry(cooldown=config.collision_cooldown)
+        self.spawn_cap_lights = {"N": self.ns_traffic_lights[0], "S": self.ns_traffic_lights[0],
+                                 "E": self.ew_traffic_lights[0], "W": self.ew_traffic_lights[0]}
+
+        self.telemetry = None
+        self.demand_schedule = None
+
+        # Add traffic lights to city grid data structure
+        for light in self.traffic_lights:
+            self.city.add_traffic_light(light)
+
+        self.reset_state()
+
+    def reset_state(self):
+        """
+        Clear all mutable simulation state in place: the grid, lights, vehicles, counters and analysis.
+
+        The grid, lights and intersection manager are reused rather than rebuilt, so a reset is cheap
+        enough to run thousands of times in a batch.
+        """
+        self.city.reset()
+        for light in self.traffic_lights:
+            light.reset()
+        self.intersection_manager.reset()
+        self.vehicles.clear()
+        self.direction_count = {"N": 0, "S": 0, "E": 0, "W": 0}
+        self.collision_count = 0
+        self.collisions_this_tick = 0
+        self.collision_registry.clear()
+        self.tick = 0
+        self.sim_time = 0
+        self.free_flow_enabled = self.config.free_flow_enabled
+        self.use_kernels = NUMBA_KERNELS and kernels.NUMBA_AVAILABLE
+        self.analysis_phase_duration = 300
+        self.analysis_timer = 0
+        self.analysis_mode = False
+        self.analysis_paired = False
+        self.analysis_results_ready = False
+        self.analytics = Analytics()
+        self.kpis = new_kpi_histograms()
+        self.next_queue_sample = KPI_SAMPLE_INTERVAL
+        self.analysis_start_time = 0
+        self.veh_ct = 0
+        self.emveh_ct = 0
+        self.spawn_stream = self.demand_schedule
+        if self.spawn_stream:
+            self.spawn_stream.rewind(0)
+        else:
+            self.spawn_stream = self.random_spawn_stream()
+
+    def update(self, dt=DEFAULT_DT, spawn=True):
+        """
+        Update the simulation state, including vehicle movements, traffic light changes, and collisions.
+
+        All rates and timers are in seconds, so the simulation behaves the same at any step size.
+
+        Args:
+            dt (float): Seconds of simulated time to advance.
+            spawn (bool): Whether to draw random arrivals for this step (False when an event engine schedules them).
+        """
+        self.tick += 1
+        self.sim_time += dt
+        self.collisions_this_tick = 0
+
+        # Analysis Mode
+        if self.analysis_mode:
+            self.update_analysis()
+            self.analytics.update(self.collision_count, self.veh_ct, self.emveh_ct, self.analysis_mode)
+
+        # Remove off-screen vehicles
+        vehicles_to_remove = [vehicle for vehicle in self.vehicles if vehicle.is_off_screen()]
+
+        # Update vehicles (with the kernels, the ones that look ahead are moved together afterwards;
+        # no tile changes until every vehicle has moved, so the order doesn't matter)
+        batch = []
+        for vehicle in self.vehicles:
+            if vehicle.free_flow_until > self.sim_time:
+                vehicle.advance_free_flow(dt)
+                continue
+            if vehicle.four_way_state == "waiting" and vehicle not in self.intersection_manager.vehicles_at_intersection:
+                self.intersection_manager.vehicles_at_intersection.append(vehicle)
+            if self.use_kernels and not vehicle.pulled_over and not isinstance(vehicle, EmergencyVehicle):
+                batch.append(vehicle)
+            else:
+                vehicle.move(dt)
+        if batch:
+            kernels.move_vehicles(batch, self.city, dt)
+            
+        # Update traffic lights
+        for light in self.traffic_lights:
+            light.update(dt)
+
+        # Flash Emergency Vehicle Lights
+        for vehicle in self.vehicles:
+            if isinstance(vehicle, EmergencyVehicle):
+                vehicle.flash_lights(dt)
+
+        # Have vehicles check behind for oncoming emergency vehicles
+        if self.use_kernels:
+            checking = [vehicle for vehicle in self.vehicles
+                        if not isinstance(vehicle, EmergencyVehicle) and vehicle.free_flow_until <= self.sim_time]
+            for vehicle, nearby in zip(checking, kernels.emergency_nearby(checking, self.vehicles)):
+                vehicle.check_behind(self.vehicles, nearby)
+        else:
+            for vehicle in self.vehicles:
+                if not isinstance(vehicle, EmergencyVehicle) and vehicle.free_flow_until <= self.sim_time:
+                    vehicle.check_behind(self.vehicles)
+
+        # Add new vehicles and emergency vehicles
+        if spawn and self.spawn_stream:
+            if self.sim_time >= self.spawn_stream.next_due:
+                self.spawn_due_arrivals()
+        elif spawn:
+            for _ in range(poisson_arrivals(self.config.frequency_of_events, dt)):
+                self.spawn_vehicle()
+            for _ in range(poisson_arrivals(self.config.emergency_frequency_of_events, dt)):
+                self.spawn_emergency_vehicle()
+
+        # Check for collisions
+        if len(self.vehicles) > 1:
+            collisions = self.collision_count
+            self.collision_count = collision_counter(self.vehicles, self.collision_count, self.collision_registry,
+                                                     self.sim_time, self.use_kernels)
+            # Counted here rather than from the total, which an analysis phase change resets mid-update
+            self.collisions_this_tick = self.collision_count - collisions
+
+            # Update ERTS collision counters for analysis display element
+            if self.analysis_mode:
+                if self.analytics.phase_two_active:
+                    self.analytics.erts_collision_count = self.collision_count        # Save to analytics object
+                else:
+                    self.analytics.no_erts_collision_count = self.collision_count
+
+        # Provide list of emergency vehicles to the city grid (used for 4-way look_both_ways())
+        emergency_vehicles = [vehicle for vehicle in self.vehicles if isinstance(vehicle, EmergencyVehicle)]
+        self.city.active_emergency_vehicles = emergency_vehicles
+
+        # Remove off-screen vehicles
+        for vehicle in vehicles_to_remove:
+            self.vehicles.remove(vehicle)
+            self.collision_registry.forget(vehicle.id)
+            if not isinstance(vehicle, EmergencyVehicle):
+                self.direction_count[vehicle.direction] -= 1
+            self.record_trip(vehicle)
+
+        # Mark the tiles vehicles are on now, rebuilt from scratch so no stale tiles are left behind
+        signals = dict(self.city.signals) if DEBUG_OCCUPANCY else None
+        self.city.rebuild_occupancy(self.vehicles)
+        if DEBUG_OCCUPANCY:
+            self.city.check_occupancy(self.vehicles, signals)
+
+        # Update the grid to reflect the current state of the intersection
+        self.intersection_manager.update_intersection(dt)
+
+        # Put vehicles with a clear path on the free-flow path until their next interaction point
+        if self.free_flow_enabled:
+            for vehicle in self.vehicles:
+                if vehicle.free_flow_until <= self.sim_time and not isinstance(vehicle, EmergencyVehicle):
+                    vehicle.free_flow_until = self.sim_time + vehicle.get_free_flow_horizon(self.vehicles)
+
+        if self.sim_time >= self.next_queue_sample:
+            self.sample_queues()
+
+        if self.telemetry:
+            self.telemetry.publish(self)
+
+    def queue_lengths(self):
+        """
+        Count the queued vehicles on each approach: vehicles (not emergency vehicles) that are stopped or pulled over.
+
+        Returns:
+            dict: Direction of travel -> number of queued vehicles.
+        """
+        queues = {"N": 0, "S": 0, "E": 0, "W": 0}
+        for vehicle in self.vehicles:
+            if (vehicle.stopped or vehicle.pulled_over) and not isinstance(vehicle, EmergencyVehicle):
+                queues[vehicle.direction] += 1
+        return queues
+
+    def sample_queues(self):
+        """
+        Record the current queue lengths once for every sample time passed since the last sample. Only
+        steps with nothing queued are long enough to pass several, so this holds at any step size.
+        """
+        samples = int((self.sim_time - self.next_queue_sample) // KPI_SAMPLE_INTERVAL) + 1
+        for direction, length in self.queue_lengths().items():
+            self.kpis["queue_" + direction].record(length, samples)
+        self.next_queue_sample += samples * KPI_SAMPLE_INTERVAL
+
+    def record_trip(self, vehicle):
+        """
+        Record the KPIs of a vehicle leaving the grid: its delay and 4-way stop wait, or for an emergency
+        vehicle its time through the intersection.
+
+        Args:
+            vehicle (Vehicle): The vehicle leaving the grid.
+        """
+        if isinstance(vehicle, EmergencyVehicle):
+            self.kpis["ev_intersection_time"].record(vehicle.intersection_time)
+            return
+        self.kpis["stop_line_delay"].record(vehicle.wait_time)
+        if vehicle.four_way_timer > 0:
+            self.kpis["four_way_wait"].record(vehicle.four_way_timer)
+
+    def toggle_clearpath(self):
+        """
+        Toggle the ClearPath mode, which activates or deactivates the 4-way red lights.
+        """
+        if self.intersection_manager.four_way_active:
+            self.intersection_manager.deactivate_four_way_red()
+        else:
+            self.intersection_manager.activate_four_way_red()
+
+    def reset_simulation(self):
+        """
+        Reset the simulation to its initial state (keeping its configuration).
+        """
+        self.reset_state()
+
+    def spawn_vehicle(self):
+        """
+        Generate a random vehicle and add it to the simulation (subject to the per-direction limits).
+        """
+        x, y, direction, color = generate_vehicle(self.config.grid_size)
+        self.add_vehicle(direction, x, y, color)
+
+    def spawn_emergency_vehicle(self):
+        """
+        Generate a random emergency vehicle and add it to the simulation.
+        """
+        x, y, direction, color = generate_emergency_vehicle(self.config.grid_size)
+        self.add_emergency_vehicle(direction, x, y)
+
+    def spawn_due_arrivals(self):
+        """
+        Spawn every arrival from the spawn stream that is due by the current simulation time.
+        """
+        for arrival in self.spawn_stream.pop_due(self.sim_time):
+            if arrival.emergency:
+                self.add_emergency_vehicle(arrival.direction, arrival.x, arrival.y, arrival.speed)
+            else:
+                self.add_vehicle(arrival.direction, arrival.x, arrival.y, arrival.color, arrival.speed)
+
+    def add_vehicle(self, direction, x, y, color, speed=None):
+        """
+        Add a vehicle to the simulation.
+        
+        Args:
+            direction (str): The direction the vehicle is traveling.
+            x (int): The x-coordinate of the vehicle.
+            y (int): The y-coordinate of the vehicle.
+            color (tuple): The color of the vehicle.
+            speed (float): The speed of the vehicle (None for a random speed).
+        """
+        # Set higher limits when the light for this direction is green
+        if self.direction_count[direction] < 12 and self.spawn_cap_lights[direction].state == 'GREEN':
+            self.direction_count[direction] += 1
+            self.vehicles.append(Vehicle(x, y, direction, self.city, color, self.config, speed))
+            self.veh_ct += 1
+        elif self.direction_count[direction] < 4:
+            self.direction_count[direction] += 1
+            self.vehicles.append(Vehicle(x, y, direction, self.city, color, self.config, speed))
+            self.veh_ct += 1
+
+    def add_emergency_vehicle(self, direction, x, y, speed=None):
+        """
+        Add an emergency vehicle to the simulation.
+
+        Args:
+            direction (str): The direction the emergency vehicle is traveling.
+            x (int): The x-coordinate of the emergency vehicle.
+            y (int): The y-coordinate of the emergency vehicle.
+            speed (float): The speed of the emergency vehicle (None for a random speed).
+        """
+        self.vehicles.append(EmergencyVehicle(x, y, direction, self.city, config=self.config, speed=speed))
+        self.emveh_ct += 1
+
+        # A new emergency vehicle may catch up with anything in its lane, so recheck them
+        for vehicle in self.vehicles:
+            if vehicle.direction == direction:
+                vehicle.free_flow_until = 0
+
+    def begin_analysis(self, phase_duration, paired_seed=None):
+        """
+        Enable analysis mode with the given phase duration, starting from the current simulation time.
+
+        With a paired seed, both phases start from an empty grid and replay the same pre-drawn traffic
+        (arrival times, directions, speeds and emergency vehicles), so the only difference between them
+        is ERTS. This removes most of the run-to-run noise from the ERTS off/on comparison. With a demand
+        profile set, its schedule is what both phases replay.
+
+        Args:
+            phase_duration (int): Seconds of simulated time per phase (ERTS off, then ERTS on).
+            paired_seed (int): Seed of the traffic replayed in both phases (None for independent random traffic).
+        """
+        if paired_seed is not None and self.demand_schedule:
+            self.spawn_stream.rewind(self.sim_time)
+        elif paired_seed is not None:
+            self.spawn_stream = SpawnStream(self.config, paired_seed, self.sim_time, replayable=True)
+        self.analysis_paired = paired_seed is not None
+        self.analytics.phase_duration = phase_duration
+        self.kpis = self.analytics.no_erts_kpis
+        self.analysis_phase_duration = phase_duration
+        self.analysis_start_time = self.sim_time    # Phases are timed in simulated seconds, not wall time
+        self.analysis_mode = True
+        self.analysis_timer = self.analysis_phase_duration
+
+    def update_analysis(self):
+        """
+        Records results at the end of each phase and updates the analysis timer.
+        """
+        elapsed = int(self.sim_time - self.analysis_start_time)
+        if self.analytics.phase_two_active:
+            self.analysis_timer = self.analysis_phase_duration * 2 - elapsed
+        else:
+            self.analysis_timer = self.analysis_phase_duration - elapsed
+
+        if self.analysis_timer <= 0 and not self.analytics.phase_two_active:
+            self.record_analysis_result()
+            if self.analysis_paired:
+                self.restart_traffic()
+            self.activate_clearpath()
+            self.analytics.phase_two_active = True
+            self.kpis = self.analytics.erts_kpis
+        elif self.analysis_timer <= 0 and self.analytics.phase_two_active:
+            self.record_analysis_result()
+            self.end_analysis()
+            self.analytics.phase_two_active = False
+
+    def record_analysis_result(self):
+        """
+        Record the current collision count during the analysis phase.
+        """
+        self.analytics.update(self.collision_count, self.veh_ct, self.emveh_ct, self.analysis_mode)
+        self.collision_count = 0
+        self.veh_ct = 0
+        self.emveh_ct = 0
+
+    def activate_clearpath(self):
+        """
+        Activate the ClearPath system and reset the collision count.
+        """
+        self.intersection_manager.activate_four_way_red()
+
+    def restart_traffic(self):
+        """
+        Clear the grid, lights and vehicles and replay the spawn stream from its start (used between
+        paired analysis phases, so the second phase sees the same traffic from the same empty grid).
+        """
+        self.city.reset()
+        for light in self.traffic_lights:
+            light.reset()
+        self.intersection_manager.reset()
+        self.vehicles.clear()
+        self.direction_count = {"N": 0, "S": 0, "E": 0, "W": 0}
+        self.collision_registry.clear()
+        self.spawn_stream.rewind(self.sim_time)
+
+    def set_demand_profile(self, profile, seed, duration=None):
+        """
+        Spawn from a demand profile, compiled ahead of time into an arrival schedule that starts now and
+        is replayed from the start after every reset.
+
+        Args:
+            profile (DemandProfile): The demand profile (None to go back to constant random arrivals).
+            seed (int): Seed of the arrivals.
+            duration (float): Seconds to compile up front (one profile period by default; later periods are compiled as they are reached).
+        """
+        self.demand_schedule = compile_schedule(profile, seed, self.config, duration) if profile else None
+        if self.demand_schedule:
+            self.demand_schedule.rewind(self.sim_time)
+        self.spawn_stream = self.demand_schedule or self.random_spawn_stream()
+
+    def random_spawn_stream(self):
+        """
+        Start a new stream of random arrivals, drawn in bulk ahead of time. Its seed comes from the global
+        random generator, so seeding `random` still makes a run reproducible.
+
+        Returns:
+            SpawnStream: The stream, starting now (None if the config rolls for arrivals every tick instead).
+        """
+        if not self.config.pre_drawn_spawns:
+            return None
+        return SpawnStream(self.config, random.getrandbits(64), self.sim_time)
+
+    def end_analysis(self):
+        """
+        End the analysis phase and mark the results as ready.
+        """
+        self.analysis_mode = False
+        self.kpis = new_kpi_histograms()        # Keep traffic after the analysis out of its results
+        if self.analysis_paired:
+            self.spawn_stream = self.demand_schedule or self.random_spawn_stream()
+        self.intersection_manager.deactivate_four_way_red()
+        self.analysis_timer = 0
+        self.collision_count = 0
+        self.analysis_results_ready = True
+        print("----------------------------------------")
+        print("END OF ANALYSIS")
+        print(self.analytics.__repr__())
+        print("----------------------------------------")
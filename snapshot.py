@@ -0,0 +1,173 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from config import DEFAULT_DT
+
+
+@dataclass(frozen=True)
+class SimulationSnapshot:
+    """
+    Immutable copy of everything the renderer needs from the simulation at one instant.
+
+    Attributes:
+        - sim_time (float): Simulation time of the snapshot in seconds
+        - vehicles (tuple): (x, y, color) of every vehicle
+        - lights (tuple): (x, y, color) of every traffic light, with the color it currently shows
+        - four_way_active (bool): Whether the 4-way red (ERTS) is active
+        - collision_count (int): Collisions counted so far
+        - analysis_mode (bool): Whether an analysis is running
+        - analysis_timer (int): Seconds left in the current analysis phase
+        - analysis_results_ready (bool): Whether the analysis results are ready to be displayed
+        - no_erts_collision_count (int): Collisions counted in the ERTS inactive phase
+        - erts_collision_count (int): Collisions counted in the ERTS active phase
+    """
+    sim_time: float
+    vehicles: tuple
+    lights: tuple
+    four_way_active: bool
+    collision_count: int
+    analysis_mode: bool
+    analysis_timer: int
+    analysis_results_ready: bool
+    no_erts_collision_count: int
+    erts_collision_count: int
+
+    @classmethod
+    def take(cls, simulation):
+        """
+        Copy the current state of a simulation.
+
+        Args:
+            - simulation (SimulationModel): The simulation to copy.
+
+        Returns:
+            - SimulationSnapshot: The snapshot.
+        """
+        return cls(
+            sim_time=simulation.sim_time,
+            vehicles=tuple((vehicle.x, vehicle.y, vehicle.color) for vehicle in simulation.vehicles),
+            lights=tuple((light.x, light.y, light.get_display_color()) for light in simulation.traffic_lights),
+            four_way_active=simulation.intersection_manager.four_way_active,
+            collision_count=simulation.collision_count,
+            analysis_mode=simulation.analysis_mode,
+            analysis_timer=simulation.analysis_timer,
+            analysis_results_ready=simulation.analysis_results_ready,
+            no_erts_collision_count=simulation.analytics.no_erts_collision_count,
+            erts_collision_count=simulation.analytics.erts_collision_count,
+        )
+
+
+class SnapshotBuffer:
+    """
+    Double buffer of snapshots shared between the simulation thread (writer) and the render loop (reader).
+
+    The writer fills the back slot and then swaps it to the front under a lock. The reader only ever
+    sees a complete, immutable snapshot, and never waits for a simulation step to finish.
+
+    Attributes:
+        - front (SimulationSnapshot): The latest complete snapshot (None before the first publish)
+        - back (SimulationSnapshot): The slot being written
+        - lock (threading.Lock): Guards the swap
+
+    Methods:
+        - publish: Publish a new snapshot
+        - latest: Get the latest snapshot
+    """
+    def __init__(self):
+        self.front = None
+        self.back = None
+        self.lock = threading.Lock()
+
+    def publish(self, snapshot):
+        """
+        Publish a new snapshot.
+
+        Args:
+            - snapshot (SimulationSnapshot): The snapshot to publish.
+        """
+        self.back = snapshot
+        with self.lock:
+            self.front, self.back = self.back, self.front
+
+    def latest(self):
+        """
+        Returns:
+            - SimulationSnapshot: The latest complete snapshot (None before the first publish).
+        """
+        with self.lock:
+            return self.front
+
+
+class SimulationThread(threading.Thread):
+    """
+    Thread that steps a simulation on its own, publishing a snapshot after each batch of steps.
+
+    The simulation runs at `speed` times real time (or as fast as possible when speed is None), catching
+    up with several steps at a time when it falls behind, so the simulation rate doesn't depend on how
+    long drawing takes. Anything else that changes the simulation must hold `lock`.
+
+    Attributes:
+        - simulation (SimulationModel): The simulation being stepped
+        - buffer (SnapshotBuffer): Where snapshots are published
+        - speed (float): Simulated seconds per real second (None for as fast as possible)
+        - dt (float): Seconds of simulated time per update
+        - max_steps (int): Most updates per batch before publishing, so a slow machine doesn't spiral
+        - lock (threading.Lock): Held while the simulation is stepped
+        - stop_event (threading.Event): Set to stop the thread
+
+    Methods:
+        - run: Thread body; step and publish until stopped
+        - stop: Stop the thread and wait for it to finish
+    """
+    def __init__(self, simulation, buffer, speed=1.0, dt=DEFAULT_DT, max_steps=100):
+        super().__init__(daemon=True)
+        self.simulation = simulation
+        self.buffer = buffer
+        self.speed = speed
+        self.dt = dt
+        self.max_steps = max_steps
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def run(self):
+        """
+        Step the simulation and publish snapshots until stopped. Nothing is stepped while it is paused.
+        """
+        start = time.perf_counter()
+        simulated = 0
+        while not self.stop_event.is_set():
+            with self.lock:
+                if getattr(self.simulation, 'paused', False):
+                    steps = 0
+                elif self.speed is None:
+                    steps = self.max_steps
+                else:
+                    due = (time.perf_counter() - start) * self.speed
+                    steps = min(self.max_steps, int((due - simulated) / self.dt))
+                for step in range(steps):
+                    if getattr(self.simulation, 'paused', False):
+                        steps = step    # e.g. the analysis ended part way through the batch
+                        break
+                    self.simulation.update(self.dt)
+                if steps:
+                    self.buffer.publish(SimulationSnapshot.take(self.simulation))
+
+            if self.speed is not None:
+                # Drop the backlog if steps were capped or the simulation was paused
+                simulated += steps * self.dt
+                due = (time.perf_counter() - start) * self.speed
+                if due - simulated > self.max_steps * self.dt:
+                    simulated = due
+
+            if not steps:
+                time.sleep(self.dt / (self.speed or 1))
+            else:
+                time.sleep(0)   # Let the render loop take the lock between batches
+
+    def stop(self):
+        """
+        Stop the thread and wait for it to finish.
+        """
+        self.stop_event.set()
+        self.join()
@@ -0,0 +1,169 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from config import SPAWN_CHUNK_SIZE
+from entities.vehicle import spawn_position
+
+DIRECTIONS = ("N", "S", "E", "W")
+
+
+@dataclass(frozen=True)
+class Arrival:
+    """
+    One pre-drawn arrival: everything random about a vehicle, fixed before it spawns.
+
+    Attributes:
+        - time (float): Seconds after the start of the stream
+        - emergency (bool): Whether this is an emergency vehicle
+        - x (int): Starting x-coordinate
+        - y (int): Starting y-coordinate
+        - direction (str): Direction of travel (N, S, E, W)
+        - color (tuple): Color of the vehicle
+        - speed (float): Speed in tiles per second
+    """
+    time: float
+    emergency: bool
+    x: int
+    y: int
+    direction: str
+    color: tuple
+    speed: float
+
+
+class SpawnStream:
+    """
+    Replayable stream of arrivals drawn from a seed, in bulk and ahead of time.
+
+    Vehicles and emergency vehicles each have their own NumPy generator. Whenever a kind runs out,
+    the next SPAWN_CHUNK_SIZE arrivals (inter-arrival times, directions, colors and speeds) are drawn in
+    one vectorized call per attribute, and a cursor walks through them; the simulation never rolls for
+    spawns tick by tick. Every arrival is drawn whether or not the simulation admits it, so the stream
+    is the same whatever the simulation does with it, and two runs that rewind to the start of the
+    stream see exactly the same traffic. A replayable stream keeps every arrival it has drawn, so
+    rewinding is free; any other stream drops each chunk once it has been spawned, so it stays the
+    same size however long the simulation runs.
+
+    Attributes:
+        - config (SimConfig): The simulation parameters (arrival rates, grid size, base speed)
+        - seed (int): Seed the stream is drawn from
+        - start_time (float): Simulation time at which the stream (re)started
+        - chunk_size (int): Arrivals drawn per kind at a time
+        - replayable (bool): Whether drawn arrivals are kept so the stream can be rewound (paired analysis)
+        - times (dict): Arrival times kept (seconds after the start of the stream), per kind (emergency -> list)
+        - directions (dict): Directions kept, per kind
+        - colors (dict): Colors kept, per kind
+        - speeds (dict): Speeds kept, per kind
+        - cursors (dict): Index of the next arrival to spawn in the kept arrivals, per kind
+        - next_due (float): Simulation time of the next arrival of either kind
+
+    Methods:
+        - rewind: Replay the stream from the start at a new simulation time
+        - next_time: Get the simulation time of the next arrival
+        - pop_due: Remove and return the arrivals due by a simulation time
+    """
+    def __init__(self, config, seed, start_time=0, chunk_size=SPAWN_CHUNK_SIZE, replayable=False):
+        self.config = config
+        self.seed = seed
+        self.start_time = start_time
+        self.chunk_size = chunk_size
+        self.replayable = replayable
+        self.generators = {False: np.random.default_rng([seed, 0]), True: np.random.default_rng([seed, 1])}
+        self.rates = {False: config.frequency_of_events, True: config.emergency_frequency_of_events}
+        self.times = {False: [], True: []}
+        self.directions = {False: [], True: []}
+        self.colors = {False: [], True: []}
+        self.speeds = {False: [], True: []}
+        self.cursors = {False: 0, True: 0}
+        self.next_due = self.start_time + min(self.peek_time(False), self.peek_time(True))
+
+    def rewind(self, start_time):
+        """
+        Replay the stream from its first arrival, starting at the given simulation time.
+
+        Args:
+            - start_time (float): Simulation time of the start of the replay.
+
+        Raises:
+            - ValueError: If the stream isn't replayable (its spawned arrivals are gone).
+        """
+        if not self.replayable:
+            raise ValueError("only a replayable SpawnStream can be rewound")
+        self.start_time = start_time
+        self.cursors = {False: 0, True: 0}
+        self.next_due = self.start_time + min(self.peek_time(False), self.peek_time(True))
+
+    def draw_chunk(self, emergency):
+        """
+        Draw the next chunk of arrivals of one kind, one vectorized call per attribute. Unless the stream
+        is replayable, the arrivals already drawn (all spawned by now) are dropped first.
+
+        Args:
+            - emergency (bool): Whether to draw emergency vehicles.
+        """
+        rng = self.generators[emergency]
+        times = self.times[emergency]
+        low, high = (0.7, 1.2) if emergency else (0.3, 0.7)
+        last_time = times[-1] if times else 0
+        if not self.replayable:
+            for drawn in (times, self.directions[emergency], self.colors[emergency], self.speeds[emergency]):
+                drawn.clear()
+            self.cursors[emergency] = 0
+
+        times.extend((last_time + np.cumsum(rng.exponential(1 / self.rates[emergency], self.chunk_size))).tolist())
+        self.directions[emergency].extend(rng.choice(DIRECTIONS, self.chunk_size).tolist())
+        if emergency:
+            self.colors[emergency].extend([(255, 255, 255)] * self.chunk_size)
+        else:
+            self.colors[emergency].extend(map(tuple, rng.integers(0, 256, (self.chunk_size, 3)).tolist()))
+        self.speeds[emergency].extend((rng.uniform(low, high, self.chunk_size) * self.config.vehicle_base_speed).tolist())
+
+    def peek_time(self, emergency):
+        """
+        Get the time of the next arrival of one kind, drawing a new chunk if needed.
+
+        Args:
+            - emergency (bool): Whether to look at emergency vehicles.
+
+        Returns:
+            - float: Seconds after the start of the stream (infinity if that kind never arrives).
+        """
+        if self.rates[emergency] <= 0:
+            return float('inf')
+        if self.cursors[emergency] == len(self.times[emergency]):
+            self.draw_chunk(emergency)
+        return self.times[emergency][self.cursors[emergency]]
+
+    def next_time(self):
+        """
+        Returns:
+            - float: Simulation time of the next arrival of either kind (infinity if none).
+        """
+        return self.next_due
+
+    def pop_due(self, now):
+        """
+        Remove and return every arrival due at or before a simulation time, in time order.
+
+        Args:
+            - now (float): The current simulation time.
+
+        Returns:
+            - list: The due arrivals (Arrival).
+        """
+        if now < self.next_due:
+            return []      # Most ticks: nothing due, and no need to look any further
+
+        due = []
+        for emergency in (False, True):
+            while self.start_time + self.peek_time(emergency) <= now:
+                i = self.cursors[emergency]
+                direction = self.directions[emergency][i]
+                x, y = spawn_position(direction, self.config.grid_size)
+                due.append(Arrival(self.times[emergency][i], emergency, x, y, direction,
+                                   self.colors[emergency][i], self.speeds[emergency][i]))
+                self.cursors[emergency] = i + 1
+        if len(due) > 1:
+            due.sort(key=lambda arrival: arrival.time)
+        self.next_due = self.start_time + min(self.peek_time(False), self.peek_time(True))
+        return due
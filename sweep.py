@@ -0,0 +1,189 @@
+import argparse
+import csv
+import dataclasses
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from config import DEFAULT_CONFIG, RESULT_CACHE_DIR, SWEEP_SHARD_SIZE
+from event_engine import run_event_driven_analysis
+from result_cache import ResultCache
+from simulation import SimulationModel
+from sweep_queue import SweepQueue
+
+
+def expand_grid(base=DEFAULT_CONFIG, **axes):
+    """
+    Expand a parameter grid into one SimConfig per combination of values.
+
+    Example:
+        expand_grid(frequency_of_events=[1.2, 1.8], emergency_frequency_of_events=[0.2, 0.4])
+
+    Args:
+        - base (SimConfig): Configuration providing every parameter that isn't swept.
+        - **axes (list): Values to sweep, keyed by SimConfig field name.
+
+    Returns:
+        - list: SimConfig objects, one per point of the grid.
+    """
+    names = list(axes)
+    return [dataclasses.replace(base, **dict(zip(names, values)))
+            for values in itertools.product(*(axes[name] for name in names))]
+
+
+def run_point(config, seed, phase_duration, cache_dir=None):
+    """
+    Run one headless ERTS off/on analysis for a config and seed, or fetch it from the result cache.
+
+    Args:
+        - config (SimConfig): The simulation parameters.
+        - seed (int): Seed for the random number generator.
+        - phase_duration (int): Seconds of simulated time per phase.
+        - cache_dir (str): Result cache directory (None to always run the simulation).
+
+    Returns:
+        - dict: One row of the results table (config fields, seed, phase duration and analytics summary).
+    """
+    cache = ResultCache(cache_dir) if cache_dir else None
+    key = ResultCache.make_key(config, seed, phase_duration) if cache is not None else None
+    summary = cache.get(key) if cache is not None else None
+
+    if summary is None:
+        random.seed(seed)
+        summary = run_event_driven_analysis(SimulationModel(config), phase_duration).summary()
+        if cache is not None:
+            cache.put(key, summary)
+
+    row = dataclasses.asdict(config)
+    row["seed"] = seed
+    row["phase_duration"] = phase_duration
+    row.update(summary)
+    return row
+
+
+def _run_task(task):
+    return run_point(*task)
+
+
+def run_sweep(configs, seeds, phase_duration, workers=None, cache_dir=None):
+    """
+    Run every config with every seed across worker processes.
+
+    Args:
+        - configs (list): SimConfig objects to run.
+        - seeds (list): Seeds to run each config with.
+        - phase_duration (int): Seconds of simulated time per phase.
+        - workers (int): Number of worker processes (None for one per CPU, 1 to run in this process).
+        - cache_dir (str): Result cache directory shared by the workers (None to disable caching).
+
+    Returns:
+        - list: One result row per (config, seed), in the order of the inputs.
+    """
+    tasks = [(config, seed, phase_duration, cache_dir) for config in configs for seed in seeds]
+    if workers == 1:
+        return [_run_task(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_run_task, tasks))
+
+
+def _run_queue_worker(task):
+    directory, cache_dir, wait = task
+    return SweepQueue(directory).load().run_worker(cache_dir, wait)
+
+
+def run_queue(directory, workers=None, cache_dir=None, wait=True):
+    """
+    Work on the sweep in a queue directory with worker processes, alongside any other workers on it.
+
+    Args:
+        - directory (str): Directory holding the sweep queue (created with SweepQueue.create).
+        - workers (int): Number of worker processes (None for one per CPU, 1 to work in this process).
+        - cache_dir (str): Result cache directory shared by the workers (None to disable caching).
+        - wait (bool): Whether to wait for shards other workers are still running (see SweepQueue.run_worker).
+
+    Returns:
+        - int: Number of runs completed by these workers.
+    """
+    if workers == 1:
+        return _run_queue_worker((directory, cache_dir, wait))
+
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(_run_queue_worker, [(directory, cache_dir, wait)] * workers))
+
+
+def write_table(rows, path):
+    """
+    Write result rows to a CSV file.
+
+    Args:
+        - rows (list): Result rows from run_sweep.
+        - path (str): The CSV file to write.
+    """
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def parse_axis(text):
+    """
+    Parse a command line sweep axis of the form "name=value1,value2,...".
+
+    Args:
+        - text (str): The axis specification.
+
+    Returns:
+        - tuple: The SimConfig field name and the list of values (ints, floats or bools).
+    """
+    name, _, values = text.partition("=")
+    default = getattr(DEFAULT_CONFIG, name)
+    if isinstance(default, bool):
+        convert = lambda value: value.lower() in ("1", "true", "yes", "on")
+    else:
+        convert = lambda value: int(value) if value.lstrip("-").isdigit() else float(value)
+    return name, [convert(value) for value in values.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a ClearPath parameter sweep.")
+    parser.add_argument("--set", dest="axes", action="append", default=[], metavar="NAME=V1,V2",
+                        help="SimConfig field to sweep (repeat for a grid)")
+    parser.add_argument("--seeds", type=int, nargs="+", default=None, help="seeds to run each config with (default 0)")
+    parser.add_argument("--phase", type=int, default=300, help="seconds of simulated time per phase")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="exports/sweep.csv")
+    parser.add_argument("--cache", default=RESULT_CACHE_DIR, help="result cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="always rerun every point")
+    parser.add_argument("--queue", metavar="DIR", help="run through a resumable queue in this directory, which "
+                        "other workers can join (without --set/--seeds, join the sweep already in it)")
+    parser.add_argument("--shard-size", type=int, default=SWEEP_SHARD_SIZE, help="runs claimed at a time from the queue")
+    parser.add_argument("--no-wait", action="store_true", help="leave the queue once nothing is left to claim, "
+                        "instead of waiting for other workers' shards")
+    args = parser.parse_args()
+    cache_dir = None if args.no_cache else args.cache
+
+    if args.queue:
+        queue = SweepQueue(args.queue)
+        if args.axes or args.seeds:
+            configs = expand_grid(**dict(parse_axis(axis) for axis in args.axes))
+            queue.create(configs, args.seeds or [0], args.phase, args.shard_size)
+        else:
+            queue.load()
+        completed = run_queue(args.queue, args.workers, cache_dir, not args.no_wait)
+        finished, total = queue.progress()
+        print(f"Completed {completed} runs; {finished} of {total} are done")
+        if finished < total:
+            raise SystemExit(0)
+        rows = queue.rows()
+    else:
+        configs = expand_grid(**dict(parse_axis(axis) for axis in args.axes))
+        rows = run_sweep(configs, args.seeds or [0], args.phase, args.workers, cache_dir)
+    write_table(rows, args.out)
+    print(f"Wrote {len(rows)} rows to {args.out}")
@@ -0,0 +1,316 @@
+import dataclasses
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+
+from config import SimConfig, SWEEP_SHARD_SIZE, SWEEP_LEASE_DURATION
+from result_cache import simulation_code_version
+
+
+def _write_json(path, data):
+    """
+    Write JSON to a path atomically (a temporary file renamed into place), replacing any existing file.
+
+    Args:
+        - path (str): The file to write.
+        - data: JSON-serializable data.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(data, file)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _read_json(path):
+    """
+    Returns:
+        - The JSON data in a file, or None if it doesn't exist (yet).
+    """
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+class SweepQueue:
+    """
+    Resumable work queue for a parameter sweep, kept entirely in a directory.
+
+    The sweep's (config, seed) runs are split into shards. A worker claims a shard by creating its lease
+    file with O_EXCL, which only one worker can do, renews the lease while it works, and writes each run's
+    result to its own file as soon as it finishes. A shard whose lease hasn't been renewed for
+    `lease_duration` seconds (its worker crashed or was stopped) is taken over by the next worker that
+    looks at it, by creating the lease of the next generation; runs that already have results are not
+    rerun. Workers only coordinate through the directory, so any number of processes, on one machine or
+    on several sharing the directory, can join or leave at any point without a central service.
+
+    If a worker is merely slow and its lease is taken over, both may finish the same run; results are
+    deterministic and written atomically, so that only costs the duplicated work.
+
+    Layout:
+        - sweep.json: The runs (configs, seeds, phase duration), shard size and simulation code version
+        - leases/SHARD.GENERATION: One file per claim of a shard, naming its worker and rewritten on each renewal
+        - results/RUN.json: The result row of each finished run
+        - done/SHARD: Marks a shard whose runs all have results
+
+    Attributes:
+        - directory (str): Directory holding the queue
+        - lease_duration (float): Seconds a claim stays valid unless renewed
+        - worker_id (str): Name of this worker in the leases it writes
+        - manifest (dict): Contents of sweep.json (None until the sweep is created or loaded)
+
+    Methods:
+        - create: Create the sweep, or join it if the directory already holds the same sweep
+        - load: Join the sweep already in the directory
+        - claim: Claim a shard that is free, or whose lease has expired
+        - renew: Extend a lease held by this worker
+        - run_worker: Claim and run shards until none are left
+        - progress: Count the finished runs
+        - rows: Collect the result rows in the order of the runs
+    """
+    def __init__(self, directory, lease_duration=SWEEP_LEASE_DURATION, worker_id=None):
+        self.directory = directory
+        self.lease_duration = lease_duration
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.manifest = None
+        for name in ('leases', 'results', 'done'):
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, 'sweep.json')
+
+    @property
+    def shard_count(self):
+        runs, shard_size = len(self.manifest['runs']), self.manifest['shard_size']
+        return (runs + shard_size - 1) // shard_size
+
+    def create(self, configs, seeds, phase_duration, shard_size=SWEEP_SHARD_SIZE):
+        """
+        Create the sweep, or join it if the directory already holds the same sweep.
+
+        The manifest is published with a hard link, which fails if another worker published first, so
+        workers started together with the same arguments all end up on one sweep.
+
+        Args:
+            - configs (list): SimConfig objects to run.
+            - seeds (list): Seeds to run each config with.
+            - phase_duration (int): Seconds of simulated time per phase.
+            - shard_size (int): Runs per shard.
+
+        Returns:
+            - SweepQueue: self, for chaining.
+
+        Raises:
+            - ValueError: If the directory holds a different sweep, or one from different simulation code.
+        """
+        manifest = {
+            'runs': [[dataclasses.asdict(config), seed] for config in configs for seed in seeds],
+            'phase_duration': phase_duration,
+            'shard_size': shard_size,
+            'code_version': simulation_code_version(),
+        }
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(manifest, file)
+            os.link(temp_path, self.manifest_path)
+        except FileExistsError:
+            pass    # Already created, by an earlier run or another worker; checked below
+        finally:
+            os.remove(temp_path)
+
+        self.load()
+        if self.manifest != json.loads(json.dumps(manifest)):
+            raise ValueError(f"{self.directory} already holds a different sweep")
+        return self
+
+    def load(self):
+        """
+        Join the sweep already in the directory.
+
+        Returns:
+            - SweepQueue: self, for chaining.
+
+        Raises:
+            - ValueError: If there is no sweep, or it was created by different simulation code.
+        """
+        self.manifest = _read_json(self.manifest_path)
+        if self.manifest is None:
+            raise ValueError(f"{self.directory} holds no sweep")
+        if self.manifest['code_version'] != simulation_code_version():
+            raise ValueError(f"{self.directory} was created by a different version of the simulation code")
+        return self
+
+    def lease_path(self, shard, generation):
+        return os.path.join(self.directory, 'leases', f"{shard:05d}.{generation}")
+
+    def result_path(self, run):
+        return os.path.join(self.directory, 'results', f"{run:06d}.json")
+
+    def done_path(self, shard):
+        return os.path.join(self.directory, 'done', f"{shard:05d}")
+
+    def leases(self):
+        """
+        Returns:
+            - dict: Shard -> latest lease generation, for every shard that has been claimed.
+        """
+        latest = {}
+        for name in os.listdir(os.path.join(self.directory, 'leases')):
+            shard, _, generation = name.partition('.')
+            if generation.isdigit():
+                latest[int(shard)] = max(latest.get(int(shard), -1), int(generation))
+        return latest
+
+    def lease_expiry(self, shard, generation):
+        """
+        Get when a lease expires: `lease_duration` after it was last written, going by the file's
+        modification time, so a lease whose worker died before writing it still expires.
+
+        Returns:
+            - float: Wall-clock time at which the lease expires (0 if it no longer exists).
+        """
+        try:
+            return os.path.getmtime(self.lease_path(shard, generation)) + self.lease_duration
+        except FileNotFoundError:
+            return 0
+
+    def claim(self):
+        """
+        Claim a shard that is free, or whose lease has expired. Shards are tried from a random starting
+        point, so workers starting together rarely race for the same one.
+
+        Returns:
+            - tuple: (shard, generation) of the claimed lease, or None if every unfinished shard is leased.
+        """
+        if self.shard_count == 0:
+            return None
+        done = set(int(name) for name in os.listdir(os.path.join(self.directory, 'done')))
+        leases = self.leases()
+        now = time.time()
+        start = random.randrange(self.shard_count)
+        for offset in range(self.shard_count):
+            shard = (start + offset) % self.shard_count
+            if shard in done:
+                continue
+            generation = leases.get(shard, -1) + 1
+            if generation > 0 and self.lease_expiry(shard, generation - 1) > now:
+                continue    # Someone is working on it
+            try:
+                fd = os.open(self.lease_path(shard, generation), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue    # Another worker claimed it first
+            os.close(fd)
+            self.renew(shard, generation)
+            return shard, generation
+        return None
+
+    def renew(self, shard, generation):
+        """
+        Extend a lease held by this worker.
+
+        Args:
+            - shard (int): The leased shard.
+            - generation (int): Generation of the lease.
+
+        Returns:
+            - bool: False if the shard has been taken over by another worker (the lease is then left alone).
+        """
+        if os.path.exists(self.lease_path(shard, generation + 1)):
+            return False
+        _write_json(self.lease_path(shard, generation), {'worker': self.worker_id, 'renewed': time.time()})
+        return True
+
+    def run_shard(self, shard, generation, cache_dir=None):
+        """
+        Run every run of a claimed shard that has no result yet, renewing the lease in the background.
+
+        Args:
+            - shard (int): The claimed shard.
+            - generation (int): Generation of the lease.
+            - cache_dir (str): Result cache directory (None to always run the simulation).
+
+        Returns:
+            - int: Number of runs completed.
+        """
+        # Imported here, as sweep.py imports this module
+        from sweep import run_point
+
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(self.lease_duration / 3):
+                if not self.renew(shard, generation):
+                    lost.set()
+                    return
+
+        thread = threading.Thread(target=heartbeat, daemon=True)
+        thread.start()
+        completed = 0
+        try:
+            shard_size = self.manifest['shard_size']
+            for run in range(shard * shard_size, min((shard + 1) * shard_size, len(self.manifest['runs']))):
+                if lost.is_set():
+                    return completed    # Taken over; leave the rest to the new owner
+                if os.path.exists(self.result_path(run)):
+                    continue            # Finished before a crash or takeover
+                config, seed = self.manifest['runs'][run]
+                row = run_point(SimConfig(**config), seed, self.manifest['phase_duration'], cache_dir)
+                _write_json(self.result_path(run), row)
+                completed += 1
+            open(self.done_path(shard), 'w').close()
+        finally:
+            stop.set()
+            thread.join()
+        return completed
+
+    def run_worker(self, cache_dir=None, wait=True):
+        """
+        Claim and run shards until every shard is done.
+
+        Args:
+            - cache_dir (str): Result cache directory (None to always run the simulation).
+            - wait (bool): Whether to wait for shards leased by other workers, taking them over if their
+              leases expire, rather than leaving as soon as there is nothing left to claim.
+
+        Returns:
+            - int: Number of runs this worker completed.
+        """
+        completed = 0
+        while True:
+            claimed = self.claim()
+            if claimed is not None:
+                completed += self.run_shard(*claimed, cache_dir)
+                continue
+            finished, total = self.progress()
+            if finished == total or not wait:
+                return completed
+            time.sleep(min(self.lease_duration / 3, 5))
+
+    def progress(self):
+        """
+        Returns:
+            - tuple: (runs with results, total runs).
+        """
+        results = [name for name in os.listdir(os.path.join(self.directory, 'results')) if name.endswith('.json')]
+        return len(results), len(self.manifest['runs'])
+
+    def rows(self):
+        """
+        Collect the result rows in the order of the runs.
+
+        Returns:
+            - list: One result row per run (None for runs that haven't finished).
+        """
+        return [_read_json(self.result_path(run)) for run in range(len(self.manifest['runs']))]
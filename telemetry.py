@@ -0,0 +1,223 @@
+import asyncio
+import json
+import threading
+import time
+import urllib.request
+
+from config import TELEMETRY_HOST, TELEMETRY_PORT, TELEMETRY_MAX_RATE, TELEMETRY_SEND_TIMEOUT
+from entities.vehicle import EmergencyVehicle
+
+
+def telemetry_state(simulation, tick_rate):
+    """
+    Build the telemetry record for the current simulation state.
+
+    Args:
+        - simulation (SimulationModel): The simulation to report on.
+        - tick_rate (float): Simulation updates per wall-clock second since the last record.
+
+    Returns:
+        - dict: JSON-serializable telemetry record.
+    """
+    if simulation.analysis_results_ready:
+        phase = "results"
+    elif simulation.analysis_mode:
+        phase = "analysis_erts_on" if simulation.analytics.phase_two_active else "analysis_erts_off"
+    else:
+        phase = "free_run"
+
+    emergency_count = sum(1 for vehicle in simulation.vehicles if isinstance(vehicle, EmergencyVehicle))
+    state = {
+        "sim_time": simulation.sim_time,
+        "tick": simulation.tick,
+        "tick_rate": tick_rate,
+        "phase": phase,
+        "erts_active": simulation.intersection_manager.four_way_active,
+        "analysis_timer": simulation.analysis_timer,
+        "vehicles": len(simulation.vehicles) - emergency_count,
+        "emergency_vehicles": emergency_count,
+        "vehicles_spawned": simulation.veh_ct,
+        "emergency_vehicles_spawned": simulation.emveh_ct,
+        "collision_count": simulation.collision_count,
+        # Rate so far in the current phase (the analytics rates are only filled in when a run finishes)
+        "collision_rate": simulation.collision_count / simulation.emveh_ct if simulation.emveh_ct > 0 else 0,
+    }
+    state.update(simulation.analytics.summary())
+    return state
+
+
+class TelemetryServer:
+    """
+    Local HTTP server that streams simulation telemetry to dashboards as server-sent events.
+
+    The server runs an asyncio event loop on a background thread. The simulation only calls `publish`,
+    which does nothing more often than `max_rate` times per second, and otherwise just replaces the latest
+    record. Each client gets the latest record at most `max_rate` times per second; intermediate states
+    are coalesced away. A slow client only delays its own stream, and one that stops reading for
+    `send_timeout` seconds is disconnected, so clients can never stall the simulation loop.
+
+    Endpoints:
+        - GET /events: text/event-stream of JSON telemetry records
+        - GET /stats: the latest telemetry record as JSON
+
+    Attributes:
+        - host (str): Interface to listen on (localhost by default)
+        - port (int): Port to listen on (0 picks a free port; the bound port is stored here once started)
+        - max_rate (float): Most telemetry records built and sent per second
+        - send_timeout (float): Seconds a client may block a send before it is disconnected
+        - latest (str): The latest telemetry record, as JSON
+        - version (int): Incremented each time a record is published
+        - loop (asyncio.AbstractEventLoop): The server's event loop
+        - thread (threading.Thread): The thread running the event loop
+
+    Methods:
+        - start: Start the server on its background thread
+        - stop: Stop the server
+        - publish: Offer the current simulation state to connected clients
+    """
+    def __init__(self, host=TELEMETRY_HOST, port=TELEMETRY_PORT, max_rate=TELEMETRY_MAX_RATE, send_timeout=TELEMETRY_SEND_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.max_rate = max_rate
+        self.send_timeout = send_timeout
+        self.latest = json.dumps({})
+        self.version = 0
+        self.last_publish = None
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.ready = threading.Event()
+
+    def start(self):
+        """
+        Start the server on its background thread and wait until it is listening.
+
+        Returns:
+            - TelemetryServer: self, for chaining.
+        """
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        return self
+
+    def serve(self):
+        """
+        Background thread: run the event loop until stopped.
+        """
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(asyncio.start_server(self.handle_client, self.host, self.port))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            # Disconnect any clients still streaming before closing the loop
+            self.server.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    def stop(self):
+        """
+        Stop the server and wait for its thread to finish.
+        """
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop = None
+
+    def publish(self, simulation):
+        """
+        Offer the current simulation state to connected clients (cheap to call every tick).
+
+        Args:
+            - simulation (SimulationModel): The simulation to report on.
+        """
+        now = time.monotonic()
+        if self.last_publish is not None and now - self.last_publish[0] < 1 / self.max_rate:
+            return
+
+        tick_rate = 0
+        if self.last_publish is not None:
+            last_time, last_tick = self.last_publish
+            tick_rate = (simulation.tick - last_tick) / (now - last_time)
+        self.last_publish = (now, simulation.tick)
+
+        # Replacing the string is atomic, so the server thread always reads a complete record
+        self.latest = json.dumps(telemetry_state(simulation, tick_rate))
+        self.version += 1
+
+    async def handle_client(self, reader, writer):
+        """
+        Serve one HTTP connection (a single request).
+
+        Args:
+            - reader (asyncio.StreamReader): The request stream.
+            - writer (asyncio.StreamWriter): The response stream.
+        """
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), self.send_timeout)
+            while (await asyncio.wait_for(reader.readline(), self.send_timeout)) not in (b"\r\n", b"\n", b""):
+                pass    # Headers are not needed
+            parts = request_line.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else "/"
+
+            if path == "/events":
+                await self.stream_events(writer)
+            elif path == "/stats":
+                body = self.latest.encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Access-Control-Allow-Origin: *\r\nConnection: close\r\n"
+                             + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+                await asyncio.wait_for(writer.drain(), self.send_timeout)
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await asyncio.wait_for(writer.drain(), self.send_timeout)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass    # Client went away or stopped reading
+        except asyncio.CancelledError:
+            pass    # Server shutting down; end the connection quietly
+        finally:
+            writer.close()
+
+    async def stream_events(self, writer):
+        """
+        Stream the latest telemetry record to a client whenever it changes, at most max_rate times per second.
+
+        Args:
+            - writer (asyncio.StreamWriter): The response stream.
+        """
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Access-Control-Allow-Origin: *\r\nConnection: keep-alive\r\n\r\n")
+        sent_version = None
+        while True:
+            if self.version != sent_version:
+                sent_version = self.version
+                writer.write(f"data: {self.latest}\n\n".encode())
+                await asyncio.wait_for(writer.drain(), self.send_timeout)
+            await asyncio.sleep(1 / self.max_rate)
+
+
+def read_events(url, count, timeout=10):
+    """
+    Minimal local client: read telemetry records from a /events stream.
+
+    Args:
+        - url (str): URL of the /events endpoint, e.g. "http://127.0.0.1:8765/events".
+        - count (int): Number of records to read.
+        - timeout (float): Socket timeout in seconds.
+
+    Returns:
+        - list: The telemetry records (dicts).
+    """
+    records = []
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        for line in response:
+            if line.startswith(b"data: "):
+                records.append(json.loads(line[len(b"data: "):]))
+                if len(records) >= count:
+                    break
+    return records
@@ -0,0 +1,54 @@
+import os
+import shutil
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pg = pytest.importorskip("pygame")
+
+from capture import FrameCapture
+
+
+def in_thread(function, timeout=5):
+    """Run a function on a daemon thread, so a call that blocks forever fails the test instead of hanging it."""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = function()
+        except Exception as error:
+            outcome['error'] = error
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), f"{function.__name__} blocked"
+    return outcome
+
+
+def test_writer_errors_are_raised_instead_of_blocking(tmp_path):
+    surface = pg.Surface((8, 8))
+    recorder = FrameCapture(str(tmp_path), every_n=1, queue_size=1, drop_frames=False, use_ffmpeg=False)
+    shutil.rmtree(recorder.output_path)     # Every PNG write now fails
+
+    def capture_until_it_fails():
+        for _ in range(10):
+            recorder.capture(surface)
+
+    outcome = in_thread(capture_until_it_fails)
+    assert isinstance(outcome.get('error'), pg.error) and recorder.error is outcome['error']
+    assert in_thread(recorder.close)['error'] is recorder.error
+
+
+def test_close_writes_queued_frames(tmp_path):
+    surface = pg.Surface((8, 8))
+    recorder = FrameCapture(str(tmp_path), every_n=2, queue_size=2, drop_frames=False, use_ffmpeg=False)
+    for _ in range(6):
+        recorder.capture(surface)
+
+    assert in_thread(recorder.close)['result'] == recorder.output_path
+    assert recorder.error is None and recorder.written == 3
+    assert sorted(os.listdir(recorder.output_path)) == ['frame-000000.png', 'frame-000001.png', 'frame-000002.png']
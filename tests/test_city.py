@@ -0,0 +1,48 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation import SimulationModel
+
+
+def busy_model(seconds=20):
+    random.seed(3)
+    model = SimulationModel()
+    for _ in range(int(seconds * 60)):
+        model.update(1 / 60)
+    return model
+
+
+def test_check_occupancy_passes_after_rebuild():
+    model = busy_model()
+    signals = dict(model.city.signals)
+    model.city.rebuild_occupancy(model.vehicles)
+
+    assert model.vehicles and model.city.occupied
+    model.city.check_occupancy(model.vehicles, signals)
+
+
+def test_check_occupancy_catches_corruption():
+    model = busy_model()
+    city = model.city
+    city.rebuild_occupancy(model.vehicles)
+    road = next((11, column) for column in range(city.grid_size) if (11, column) not in city.occupied)
+
+    city.occupied.add(road)
+    with pytest.raises(AssertionError, match="ghost|tiles occupied"):
+        city.check_occupancy(model.vehicles)
+
+    city.rebuild_occupancy(model.vehicles)
+    city.occupied.discard(next(iter(city.occupied)))
+    with pytest.raises(AssertionError, match="unmarked"):
+        city.check_occupancy(model.vehicles)
+
+    city.rebuild_occupancy(model.vehicles)
+    signals = dict(city.signals)
+    city.set_signal(*city.crosswalks[0], 'green_light' if signals.get(city.crosswalks[0]) != 'green_light' else 'red_light')
+    with pytest.raises(AssertionError, match="signal layer"):
+        city.check_occupancy(model.vehicles, signals)
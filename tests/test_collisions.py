@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entities.vehicle import EmergencyVehicle, Vehicle
+from helpers import CollisionRegistry, axis_overlap_interval, collision_counter, time_of_overlap
+
+
+def moved(vehicle, start_x, start_y, x, y):
+    vehicle.start_x, vehicle.start_y, vehicle.x, vehicle.y = start_x, start_y, x, y
+    return vehicle
+
+
+def crossing_pair(step=12):
+    """A car heading east and an emergency vehicle heading north that pass through tile (11, 11) mid-tick."""
+    car = moved(Vehicle(0, 0, 'E', None, speed=1), 11 - step / 2, 11, 11 + step / 2, 11)
+    ambulance = moved(EmergencyVehicle(0, 0, 'N', None, speed=1), 11, 11 + step / 2, 11, 11 - step / 2)
+    return car, ambulance
+
+
+def test_axis_overlap_interval():
+    assert axis_overlap_interval(0, 4, 2, 2) == pytest.approx((0.25, 0.75))
+    assert axis_overlap_interval(0, 0, 0.5, 0.5) == (float('-inf'), float('inf'))
+    assert axis_overlap_interval(0, 0, 3, 3) is None
+
+
+def test_swept_test_catches_vehicles_that_pass_through_each_other():
+    car, ambulance = crossing_pair()
+
+    # Both end the tick far apart, so a test of the end positions alone would miss this
+    assert abs(car.x - ambulance.x) > 1 and abs(car.y - ambulance.y) > 1
+    assert time_of_overlap(car, ambulance) == pytest.approx(5 / 12)
+
+    # Same paths, but the ambulance is a tick behind: the paths cross, the vehicles never meet
+    moved(ambulance, 11, 23, 11, 11)
+    assert time_of_overlap(car, ambulance) is None
+
+
+def test_registry_counts_contact_once_until_cooldown_expires():
+    car, ambulance = crossing_pair()
+    registry = CollisionRegistry(cooldown=1)
+
+    count = collision_counter([car, ambulance], 0, registry, now=0.0)
+    assert count == 1 and len(registry) == 1
+
+    # Still in contact half a second later: the same collision, not a new one
+    count = collision_counter([car, ambulance], count, registry, now=0.5)
+    assert count == 1
+
+    # Apart for longer than the cooldown, the pair expires and the next contact counts again
+    moved(car, 30, 30, 30, 30)
+    count = collision_counter([car, ambulance], count, registry, now=1.6)
+    assert count == 1 and len(registry) == 0
+    moved(car, 5, 11, 17, 11)
+    assert collision_counter([car, ambulance], count, registry, now=1.7) == 2
+
+
+def test_registry_forgets_despawned_vehicles():
+    registry = CollisionRegistry(cooldown=1)
+    registry.touch((1, 2), 0.0)
+    registry.touch((2, 3), 0.0)
+    registry.touch((4, 5), 0.0)
+
+    registry.forget(2)
+    assert set(registry.last_contact) == {(4, 5)}
+    assert not registry.touch((4, 5), 0.9)
+    registry.expire(1.5)
+    assert len(registry) == 1
+    registry.expire(2.0)
+    assert len(registry) == 0
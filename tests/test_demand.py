@@ -0,0 +1,40 @@
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from demand import PROFILES, compile_schedule
+
+
+def test_schedule_keeps_arriving_after_one_period():
+    for profile in PROFILES.values():
+        schedule = compile_schedule(profile, seed=0)
+        replay = schedule.copy()
+        late = schedule.pop_due(profile.period * 2.5)
+
+        assert math.isfinite(schedule.next_time())
+        assert any(arrival.time > profile.period * 2 for arrival in late)
+        # Copies share the extra periods, so a replay sees the same traffic
+        assert replay.pop_due(profile.period * 2.5) == late
+
+
+def test_next_time_has_no_side_effects():
+    schedule = compile_schedule(PROFILES["constant"], seed=0)
+    schedule.pop_due(PROFILES["constant"].period - 1e-6)
+    state = (schedule.period, schedule.cursor, dict(schedule.compiled.extra_periods))
+
+    assert schedule.next_time() == schedule.next_time() == schedule.next_due
+    assert (schedule.period, schedule.cursor, dict(schedule.compiled.extra_periods)) == state
+
+
+def test_passed_periods_are_dropped_and_recompiled_on_replay():
+    profile = PROFILES["constant"]
+    schedule = compile_schedule(profile, seed=1)
+    popped = schedule.pop_due(profile.period * 5.5)
+
+    # Only the period the schedule is in is kept (besides the first, which every rewind replays)
+    assert list(schedule.compiled.extra_periods) == [schedule.period] == [5]
+
+    schedule.rewind(0)
+    assert schedule.pop_due(profile.period * 5.5) == popped
@@ -0,0 +1,41 @@
+import os
+import sys
+from multiprocessing import shared_memory
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ensemble
+from ensemble import Ensemble
+
+
+def test_failed_allocation_unlinks_the_blocks_already_created(monkeypatch):
+    created = []
+
+    class FailingSharedMemory(shared_memory.SharedMemory):
+        def __init__(self, *args, **kwargs):
+            if len(created) == 2:
+                raise OSError("out of shared memory")
+            super().__init__(*args, **kwargs)
+            created.append(self.name)
+
+    monkeypatch.setattr(ensemble.shared_memory, "SharedMemory", FailingSharedMemory)
+    with pytest.raises(OSError):
+        Ensemble(seeds=[0, 1], phase_duration=10)
+    monkeypatch.undo()
+
+    assert len(created) == 2
+    for name in created:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_analytics_of_no_replicates_is_an_error():
+    with Ensemble(seeds=[3], phase_duration=10, sample_interval=5) as replicates:
+        replicates.run(workers=1)
+        pooled = replicates.analytics([0])
+
+        assert pooled.no_erts_car_count == replicates.analytics().no_erts_car_count > 0
+        with pytest.raises(ValueError, match="no replicates"):
+            replicates.analytics([])
@@ -0,0 +1,34 @@
+import dataclasses
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DEFAULT_CONFIG
+from event_engine import EventDrivenSimulation
+from simulation import SimulationModel
+
+
+def test_spawn_stream_arrivals_leave_the_global_generator_alone():
+    random.seed(1)
+    simulation = SimulationModel()
+    state = random.getstate()
+    engine = EventDrivenSimulation(simulation)
+
+    assert random.getstate() == state
+    engine.run(60)
+    assert len(engine.events) == 0 and engine.events_processed == 0
+    assert simulation.veh_ct > 0
+
+
+def test_exponential_arrivals_without_a_stream():
+    random.seed(1)
+    simulation = SimulationModel(dataclasses.replace(DEFAULT_CONFIG, pre_drawn_spawns=False))
+    engine = EventDrivenSimulation(simulation)
+    engine.run(120)
+
+    assert simulation.spawn_stream is None
+    # Every arrival is an event, whether or not the simulation has room to spawn the vehicle
+    assert engine.events_processed >= simulation.veh_ct + simulation.emveh_ct > 0
+    assert {kind for _, _, kind in engine.events.heap} == {'vehicle_arrival', 'emergency_arrival'}
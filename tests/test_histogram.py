@@ -0,0 +1,61 @@
+import json
+import math
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from histogram import LogHistogram
+
+
+def exact_percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(percent / 100 * len(ordered))) - 1]
+
+
+def test_percentiles_within_one_bucket_of_exact():
+    rng = random.Random(5)
+    values = [rng.lognormvariate(2, 1.5) for _ in range(20000)]
+    histogram = LogHistogram(unit=0.01, highest=1e6)
+    for value in values:
+        histogram.record(value)
+
+    for percent in (1, 10, 50, 90, 99, 99.9, 100):
+        exact = exact_percentile(values, percent)
+        estimate = histogram.percentile(percent)
+        # The bucket's lowest value: never above the exact value, and at most 2 / sub_buckets below it
+        assert exact * (1 - 2 / 64) - histogram.unit <= estimate <= exact
+    assert histogram.mean() == pytest.approx(sum(values) / len(values))
+    assert histogram.percentile(0) == min(values)
+
+
+def test_linear_range_is_exact():
+    histogram = LogHistogram(unit=1, highest=1000, sub_buckets=16)
+    for value in range(16):
+        histogram.record(value)
+
+    assert [histogram.percentile(100 * (k + 1) / 16) for k in range(16)] == list(range(16))
+    assert LogHistogram(unit=1, highest=10).percentile(50) == 0
+
+
+def test_merge_matches_recording_everything_in_one():
+    rng = random.Random(9)
+    values = [rng.expovariate(1 / 30) for _ in range(5000)]
+    whole, left, right = (LogHistogram(unit=0.1, highest=1e4) for _ in range(3))
+    for i, value in enumerate(values):
+        whole.record(value)
+        (left if i % 3 else right).record(value)
+
+    left.merge(right)
+    assert left.counts == whole.counts
+    assert (left.total, left.min, left.max) == (whole.total, whole.min, whole.max)
+    assert left.sum == pytest.approx(whole.sum)
+    assert left.percentile(95) == whole.percentile(95)
+
+    restored = LogHistogram.from_dict(json.loads(json.dumps(left.to_dict())))
+    assert restored.counts == left.counts and restored.percentile(50) == left.percentile(50)
+    with pytest.raises(ValueError):
+        left.merge(LogHistogram(unit=1, highest=1e4))
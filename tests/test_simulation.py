@@ -0,0 +1,20 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation import SimulationModel
+
+
+def test_collisions_this_tick_add_up_across_a_phase_change():
+    random.seed(1)
+    model = SimulationModel()
+    model.begin_analysis(60)
+    counted = []
+    while model.analysis_mode:
+        model.update(1 / 60)
+        counted.append(model.collisions_this_tick)
+
+    # The total is reset when phase two starts; the per-tick counts are not affected by that
+    assert sum(counted) == model.analytics.no_erts_collision_count + model.analytics.erts_collision_count > 0
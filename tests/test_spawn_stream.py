@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DEFAULT_CONFIG
+from spawn_stream import SpawnStream
+
+
+def pop_in_ticks(stream, start, end, dt=1 / 60):
+    arrivals, now = [], start
+    while now < end:
+        now += dt
+        arrivals.extend(stream.pop_due(now))
+    return arrivals
+
+
+def test_rewound_stream_replays_the_same_arrivals():
+    # A small chunk size so the run crosses several chunk boundaries
+    stream = SpawnStream(DEFAULT_CONFIG, seed=7, chunk_size=16, replayable=True)
+    first = pop_in_ticks(stream, 0, 300)
+
+    stream.rewind(1000)
+    assert stream.next_time() == pytest.approx(1000 + first[0].time)
+    replay = pop_in_ticks(stream, 1000, 1300)
+
+    assert len(first) > 3 * 16
+    assert any(arrival.emergency for arrival in first)
+    assert replay == first
+
+
+def test_stream_is_the_same_however_it_is_consumed():
+    kept = SpawnStream(DEFAULT_CONFIG, seed=7, chunk_size=16, replayable=True)
+    dropped = SpawnStream(DEFAULT_CONFIG, seed=7, chunk_size=16)
+
+    assert pop_in_ticks(kept, 0, 300) == dropped.pop_due(300)
+    assert len(dropped.times[False]) == 16
+    with pytest.raises(ValueError):
+        dropped.rewind(300)
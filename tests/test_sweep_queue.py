@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DEFAULT_CONFIG
+from sweep_queue import SweepQueue
+
+
+def age_lease(queue, shard, generation, seconds):
+    then = time.time() - seconds
+    os.utime(queue.lease_path(shard, generation), (then, then))
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    first = SweepQueue(str(tmp_path), lease_duration=60, worker_id='first').create([DEFAULT_CONFIG], [0, 1, 2], 30, shard_size=1)
+    second = SweepQueue(str(tmp_path), lease_duration=60, worker_id='second').load()
+
+    claims = [first.claim() for _ in range(3)]
+    assert sorted(claims) == [(0, 0), (1, 0), (2, 0)]
+    assert first.claim() is None and second.claim() is None
+
+    # One shard is finished, and the worker holding the others stops renewing them
+    open(first.done_path(0), 'w').close()
+    for shard in (0, 1, 2):
+        age_lease(first, shard, 0, 61)
+    first.renew(2, 0)
+
+    # Only the expired, unfinished shard is taken over, by the next generation of its lease
+    assert second.claim() == (1, 1)
+    assert second.claim() is None
+    assert not first.renew(1, 0)
+    assert second.renew(1, 1)
+    assert second.leases() == {0: 0, 1: 1, 2: 0}
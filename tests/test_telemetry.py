@@ -0,0 +1,43 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation import SimulationModel
+from telemetry import TelemetryServer, read_events
+
+
+def test_events_round_trip_through_read_events():
+    random.seed(2)
+    model = SimulationModel()
+    server = TelemetryServer(port=0, max_rate=50).start()
+    server.publish(model)
+    done = threading.Event()
+
+    def simulate():
+        while not done.is_set():
+            model.update(1 / 60)
+            server.publish(model)
+            time.sleep(0.005)
+
+    thread = threading.Thread(target=simulate, daemon=True)
+    thread.start()
+    try:
+        records = read_events(f"http://127.0.0.1:{server.port}/events", 3)
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/stats", timeout=10) as response:
+            stats = json.loads(response.read())
+    finally:
+        done.set()
+        thread.join()
+        server.stop()
+
+    assert len(records) == 3
+    ticks = [record["tick"] for record in records]
+    assert ticks == sorted(ticks) and ticks[0] < ticks[-1]
+    assert records[0]["phase"] == "free_run"
+    assert set(records[0]) <= set(stats) and stats["tick"] >= ticks[-1]
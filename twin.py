@@ -0,0 +1,177 @@
+import csv
+
+from analytics import Analytics
+from config import DEFAULT_DT, DEFAULT_CONFIG
+from event_engine import EventDrivenSimulation
+from simulation import SimulationModel
+from spawn_stream import SpawnStream
+from demand import PROFILES, compile_schedule
+
+
+def twin_state(simulation):
+    """
+    Get the per-moment state of one twin that is compared between ERTS off and on.
+
+    Args:
+        - simulation (SimulationModel): One of the twins.
+
+    Returns:
+        - dict: Collisions, vehicles on the grid, and queued (stopped or pulled over) vehicles per direction.
+    """
+    queues = simulation.queue_lengths()
+    return {
+        "collisions": simulation.collision_count,
+        "vehicles": len(simulation.vehicles),
+        "queued": sum(queues.values()),
+        **{f"queued_{direction}": count for direction, count in queues.items()},
+    }
+
+
+class TwinSimulation:
+    """
+    Two simulations, ERTS off and ERTS on, stepped in lockstep from identical traffic.
+
+    Both twins spawn from their own copy of the same SpawnStream, so they see exactly the same arrivals
+    at the same moments and differ only in ERTS. Running them together gives both arms of an analysis in
+    one phase duration instead of two, and a moment-by-moment comparison of collisions and queues.
+
+    Attributes:
+        - seed (int): Seed of the shared traffic
+        - schedule (ArrivalSchedule): Traffic compiled from a demand profile (None for constant rates)
+        - off (SimulationModel): The twin with ERTS inactive
+        - on (SimulationModel): The twin with ERTS active
+        - history (list): Per-moment comparison records added by `record`
+
+    Methods:
+        - reset: Restart both twins from an empty grid and the start of the traffic
+        - update: Step both twins by the same time step
+        - record: Append a per-moment comparison of the twins to the history
+        - run: Run both twins headlessly with the event-driven engine, recording at a fixed interval
+        - analytics: Get the ERTS off/on comparison as an Analytics object
+    """
+    def __init__(self, seed, config=DEFAULT_CONFIG, off=None, on=None, profile=None):
+        """
+        Args:
+            - seed (int): Seed of the shared traffic.
+            - config (SimConfig): The simulation parameters.
+            - profile (DemandProfile): Demand profile of the shared traffic (None for constant rates).
+            - off (SimulationModel): Simulation to use for the ERTS off twin (a new SimulationModel by default).
+            - on (SimulationModel): Simulation to use for the ERTS on twin (a new SimulationModel by default).
+        """
+        self.seed = seed
+        self.schedule = compile_schedule(profile, seed, config) if profile else None
+        self.off = off if off is not None else SimulationModel(config)
+        self.on = on if on is not None else SimulationModel(config)
+        self.history = []
+        self.reset()
+
+    @property
+    def twins(self):
+        """
+        Returns:
+            - tuple: The ERTS off and ERTS on twins.
+        """
+        return (self.off, self.on)
+
+    def reset(self):
+        """
+        Restart both twins from an empty grid and the start of the traffic, and clear the history.
+        """
+        for twin in self.twins:
+            twin.reset_simulation()
+            twin.spawn_stream = self.schedule.copy() if self.schedule else SpawnStream(twin.config, self.seed)
+        self.on.intersection_manager.activate_four_way_red()
+        self.history = []
+
+    def update(self, dt=DEFAULT_DT):
+        """
+        Step both twins by the same time step.
+
+        Args:
+            - dt (float): Seconds of simulated time to advance.
+        """
+        for twin in self.twins:
+            twin.update(dt)
+
+    def record(self):
+        """
+        Append a per-moment comparison of the twins (ERTS off and on side by side) to the history.
+
+        Returns:
+            - dict: The record.
+        """
+        row = {"sim_time": self.off.sim_time}
+        for name, twin in (("off", self.off), ("on", self.on)):
+            row.update({f"{name}_{key}": value for key, value in twin_state(twin).items()})
+        self.history.append(row)
+        return row
+
+    def run(self, duration, sample_interval=60):
+        """
+        Run both twins headlessly with the event-driven engine, recording the comparison every
+        `sample_interval` simulated seconds. Each twin is advanced to the next sample time in turn, so
+        the records compare both at exactly the same moment.
+
+        Args:
+            - duration (float): Seconds of simulated time to run.
+            - sample_interval (float): Seconds of simulated time between records.
+
+        Returns:
+            - list: The history.
+        """
+        engines = [EventDrivenSimulation(twin) for twin in self.twins]
+        end_time = self.off.sim_time + duration
+        while self.off.sim_time < end_time:
+            sample_time = min(end_time, self.off.sim_time + sample_interval)
+            for engine in engines:
+                engine.run(sample_time - engine.simulation.sim_time)
+            self.record()
+        return self.history
+
+    def analytics(self, export=False):
+        """
+        Get the ERTS off/on comparison so far as a finalized Analytics object.
+
+        Args:
+            - export (bool): Whether to export the results to JSON.
+
+        Returns:
+            - Analytics: The analytics, with the off twin as the no-ERTS phase and the on twin as the ERTS phase.
+        """
+        analytics = Analytics()
+        analytics.phase_duration = int(self.off.sim_time)
+        analytics.no_erts_collision_count = self.off.collision_count
+        analytics.no_erts_car_count = self.off.veh_ct
+        analytics.no_erts_emergency_count = self.off.emveh_ct
+        analytics.erts_collision_count = self.on.collision_count
+        analytics.erts_car_count = self.on.veh_ct
+        analytics.erts_emergency_count = self.on.emveh_ct
+        analytics.no_erts_kpis = self.off.kpis
+        analytics.erts_kpis = self.on.kpis
+        analytics.finalize_analysis(export)
+        return analytics
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run ERTS off and ERTS on twins together on identical traffic.")
+    parser.add_argument("duration", type=float, nargs="?", default=300, help="seconds of simulated time")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the shared traffic")
+    parser.add_argument("--profile", choices=sorted(PROFILES), help="demand profile of the shared traffic")
+    parser.add_argument("--interval", type=float, default=60, help="seconds of simulated time between records")
+    parser.add_argument("--out", help="write the per-moment comparison to this CSV file")
+    parser.add_argument("--export", action="store_true", help="export the results to JSON")
+    args = parser.parse_args()
+
+    twin = TwinSimulation(args.seed, profile=PROFILES.get(args.profile))
+    history = twin.run(args.duration, args.interval)
+    for row in history:
+        print(f"{row['sim_time']:8.0f}s  collisions {row['off_collisions']:4d} / {row['on_collisions']:4d}"
+              f"  queued {row['off_queued']:3d} / {row['on_queued']:3d}   (ERTS off / on)")
+    if args.out:
+        with open(args.out, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(history[0]))
+            writer.writeheader()
+            writer.writerows(history)
+    print(twin.analytics(args.export))